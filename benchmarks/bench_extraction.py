@@ -0,0 +1,63 @@
+"""Benchmarks the targeted extraction against full document parsing.
+
+Every saved page in the given directory is parsed by its vendor parser both
+ways: a full `html.parser` tree, as checks used to do, and a tree restricted
+to the vendor targets built with the fastest parser backend installed. Pages
+are matched to their vendor by file name prefix, e.g. `coolmod_in_stock.html`.
+
+Usage, from the repository root:
+
+    python -m benchmarks.bench_extraction <pages directory> [--rounds N]
+"""
+import os
+import sys
+import argparse
+
+import library.vendors as vendors
+from library.extract import make_soup, PARSER
+from benchmarks.corpus import measure
+
+#######################################################################
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('pages', help='Directory with the saved vendor pages')
+    parser.add_argument('--rounds', type=int, default=20,
+        help='Number of times each page is parsed')
+    args = parser.parse_args()
+
+    print(f"Targeted parser backend: {PARSER}")
+    print(f"{'page':40} {'full ms':>9} {'full KB':>9} " \
+          + f"{'target ms':>9} {'target KB':>9} {'speedup':>8}")
+
+    mismatches: int = 0
+
+    for filename in sorted(os.listdir(args.pages)):
+        vendor = vendors.get_vendor(filename.split("_")[0])
+        if vendor is None or not filename.endswith(".html"):
+            continue
+
+        with open(os.path.join(args.pages, filename), encoding="utf-8") as f:
+            page: str = f.read()
+
+        full = measure(
+            lambda: vendor.parse(make_soup(page, None, "html.parser")),
+            args.rounds)
+        targeted = measure(
+            lambda: vendor.parse(make_soup(page, vendor.strainer)),
+            args.rounds)
+
+        print(f"{filename:40} {full[0]:9.2f} {full[1]/1024:9.0f} " \
+              + f"{targeted[0]:9.2f} {targeted[1]/1024:9.0f} " \
+              + f"{full[0]/max(targeted[0], 1e-9):7.1f}x")
+
+        if full[2] != targeted[2]:
+            mismatches += 1
+            print(f"  Result mismatch! full={full[2]} targeted={targeted[2]}")
+
+    return 1 if mismatches else 0
+
+#######################################################################
+
+if __name__ == "__main__":
+    sys.exit(main())
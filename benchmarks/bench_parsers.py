@@ -0,0 +1,93 @@
+"""Benchmarks the parse time and peak memory of each vendor on the fixture
+pages, as checks parse them once fetched.
+
+Results can be saved, and compared against a previous run to catch
+regressions: the command fails if any vendor got slower, or needs more
+memory, than the baseline allows.
+
+Usage, from the repository root:
+
+    python -m benchmarks.bench_parsers [--rounds N] [--save FILE]
+                                       [--baseline FILE] [--tolerance 0.25]
+"""
+import sys
+import json
+import logging
+import argparse
+
+from benchmarks.corpus import FIXTURES_DIR, load_corpus, parse_page, measure
+from library.extract import PARSER
+
+#######################################################################
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', default=FIXTURES_DIR,
+        help='Directory with the vendor fixture pages')
+    parser.add_argument('--rounds', type=int, default=50,
+        help='Number of times each page is parsed')
+    parser.add_argument('--save', default=None,
+        help='File to save the results to, as JSON')
+    parser.add_argument('--baseline', default=None,
+        help='Results of a previous run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+        help='Fraction a vendor may be slower or bigger than the baseline')
+    args = parser.parse_args()
+
+    # Parsers warn about the pages missing a price on purpose
+    logging.disable(logging.WARNING)
+
+    results: dict[str, dict[str, float]] = {}
+
+    for fixture in load_corpus(args.pages):
+        vendor = fixture["vendor"]
+        elapsed, peak, _ = measure(lambda: parse_page(vendor, fixture["page"]),
+                                   args.rounds)
+
+        totals: dict[str, float] = results.setdefault(
+            vendor.name, {"pages": 0, "ms": 0.0, "peak_kb": 0.0})
+        totals["pages"] += 1
+        totals["ms"] += elapsed
+        totals["peak_kb"] = max(totals["peak_kb"], peak / 1024)
+
+    for totals in results.values():
+        totals["ms"] /= totals["pages"]
+
+    baseline: dict[str, dict[str, float]] = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(f"Parser backend: {PARSER}")
+    print(f"{'vendor':16} {'pages':>5} {'ms/page':>9} {'peak KB':>9} {'baseline':>18}")
+
+    regressions: int = 0
+
+    for name, totals in sorted(results.items()):
+        comparison: str = ""
+        previous: dict[str, float] = baseline.get(name, {})
+
+        if previous:
+            slower: bool = totals["ms"] > previous["ms"] * (1 + args.tolerance)
+            bigger: bool = totals["peak_kb"] > previous["peak_kb"] * (1 + args.tolerance)
+            comparison = f"{totals['ms'] / max(previous['ms'], 1e-9):6.2f}x time " \
+                + f"{totals['peak_kb'] / max(previous['peak_kb'], 1e-9):5.2f}x mem"
+
+            if slower or bigger:
+                regressions += 1
+                comparison += " REGRESSION"
+
+        print(f"{name:16} {int(totals['pages']):5} {totals['ms']:9.2f} " \
+              + f"{totals['peak_kb']:9.0f} {comparison:>18}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+            f.write("\n")
+
+    return 1 if regressions else 0
+
+#######################################################################
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""Benchmarks whole check cycles against the local stand-in vendor server.
+
+For each cycle size, that many products are spread over the fixture pages
+and checked once with `ProductLibrary.check_products`. Their URLs keep the
+vendor hostnames, so vendors and rate limits resolve as usual, and are
+rewritten to the local server when fetched.
+
+Reports products checked per second, check latency percentiles, browsers
+started and the resident memory of the process after each cycle. With
+`--shards`, checks run in that many worker processes, and only the products
+per second and the memory of the coordinator are reported. With
+`--pipeline`, checks run through `ProductLibrary.check_products_async`, and
+latencies are not reported either.
+
+Usage, from the repository root:
+
+    python -m benchmarks.bench_throughput [--sizes 10,100,1000,10000]
+        [--workers N] [--vendor-workers N] [--shards N] [--pipeline] [--rate R]
+        [--latency 0.05] ...
+"""
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import functools
+import statistics
+import multiprocessing
+
+from typing import Optional
+
+import library.processes as processes
+from library.fetch import add_rewrite, clear_rewrites
+from library.store import ProductStore
+from library.ratelimit import RateLimiter
+from library.history import HistoryRecorder
+from library.results import ResultCache
+from library.scheduler import PollScheduler
+from benchmarks.corpus import FIXTURES_DIR, load_corpus
+from benchmarks.vendor_server import VendorServer
+
+#######################################################################
+
+def _serve(port: int, pages: str, latency: float, jitter: float,
+           error_rate: float, throttle: float, etag: bool) -> None:
+    VendorServer(("127.0.0.1", port), pages, latency, jitter,
+                 error_rate, throttle, etag).serve_forever()
+
+def _rss_mb() -> float:
+    """Returns the resident memory of the process in MB, or its peak if
+    the current one is not available.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    import resource
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def _percentiles(latencies: list[float]) -> tuple[float, float, float]:
+    if len(latencies) < 2:
+        value: float = latencies[0] if latencies else 0.0
+        return (value, value, value)
+
+    cuts: list[float] = statistics.quantiles(latencies, n=100, method="inclusive")
+
+    return (cuts[49], cuts[94], cuts[98])
+
+def _reset_library() -> None:
+    """Starts each cycle from an empty library, so no result is reused.
+    """
+    processes.ProductLibrary.products = ProductStore()
+    processes.ProductLibrary.scheduler = PollScheduler()
+    processes.ProductLibrary.rate_limiter = RateLimiter()
+    processes.ProductLibrary.history = HistoryRecorder()
+    processes.ProductLibrary.result_cache = ResultCache(0)
+    processes.ProductLibrary.fetch_cache = {}
+    processes.ProductLibrary.fetch_cache_dirty = set()
+
+#######################################################################
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default="10,100,1000,10000",
+        help='Comma separated number of products of each cycle')
+    parser.add_argument('--workers', type=int, default=processes.CHECK_WORKERS)
+    parser.add_argument('--vendor-workers', type=int, default=processes.VENDOR_WORKERS)
+    parser.add_argument('--browsers', type=int, default=2)
+    parser.add_argument('--shards', type=int, default=0,
+        help='Worker processes the checks are split across, in this process if 1 or less')
+    parser.add_argument('--shard-by', choices=('url', 'vendor'), default='url')
+    parser.add_argument('--pipeline', action='store_true',
+        help='Check products through the asyncio pipeline')
+    parser.add_argument('--chromium', default="",
+        help='Path to the Chromium binary, for vendors rendered in the browser')
+    parser.add_argument('--rate', type=float, default=0.0,
+        help='Requests per second allowed per vendor, unlimited if 0')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--pages', default=FIXTURES_DIR,
+        help='Directory with the vendor fixture pages')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle', type=float, default=0.0)
+    parser.add_argument('--etag', action='store_true')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    fixtures = load_corpus(args.pages)
+    if not fixtures:
+        print("No fixture pages found!")
+        return 1
+
+    # Vendor limits are meant for live sites
+    for fixture in fixtures:
+        fixture["vendor"].rate_limit = args.rate if args.rate > 0 else 1e9
+
+    server = multiprocessing.Process(target=_serve, daemon=True, args=(
+        args.port, args.pages, args.latency, args.jitter,
+        args.error_rate, args.throttle, args.etag))
+    server.start()
+    time.sleep(0.5)
+
+    for fixture in fixtures:
+        vendor = fixture["vendor"]
+        add_rewrite(f"https://www.{vendor.hosts[0]}/", f"http://127.0.0.1:{args.port}/")
+
+    latencies: list[float] = []
+    check_product = processes._check_product
+
+    @functools.wraps(check_product)
+    def timed_check(*check_args, **check_kwargs):
+        start: float = time.perf_counter()
+        try:
+            return check_product(*check_args, **check_kwargs)
+        finally:
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    processes._check_product = timed_check
+    sharded: bool = args.shards > 1
+    if sharded:
+        processes.ProductLibrary.start_shards(args.chromium, args.shards,
+                                              args.shard_by, args.browsers)
+    else:
+        pool = processes.ProductLibrary.start_browser_pool(args.chromium, args.browsers)
+
+    print(f"{'products':>8} {'checked':>8} {'prod/s':>8} {'p50 ms':>8} " \
+          + f"{'p95 ms':>8} {'p99 ms':>8} {'browsers':>8} {'RSS MB':>8}")
+
+    try:
+        for size in (int(size) for size in args.sizes.split(",")):
+            _reset_library()
+            latencies.clear()
+
+            rows: list[tuple] = []
+            resolved: dict[str, Optional[object]] = {}
+            for i in range(size):
+                fixture = fixtures[i % len(fixtures)]
+                vendor = fixture["vendor"]
+                case: str = fixture["name"][len(vendor.name) + 1:-len(".html")]
+                url: str = f"https://www.{vendor.hosts[0]}/{vendor.name}/{case}/{i}"
+                rows.append((i + 1, url, "bench"))
+                resolved[url] = vendor
+
+            processes.ProductLibrary.products.load(rows, resolved)
+
+            start: float = time.perf_counter()
+            if args.pipeline:
+                results = asyncio.run(processes.ProductLibrary.check_products_async(
+                    args.chromium, args.workers, args.vendor_workers))
+            else:
+                results = processes.ProductLibrary.check_products(
+                    args.chromium, args.workers, args.vendor_workers)
+            elapsed: float = time.perf_counter() - start
+
+            if sharded or args.pipeline:
+                print(f"{size:8} {len(results):8} {len(results) / elapsed:8.1f} " \
+                      + f"{'-':>8} {'-':>8} {'-':>8} {'-':>8} {_rss_mb():8.0f}")
+                continue
+
+            p50, p95, p99 = _percentiles(latencies)
+            print(f"{size:8} {len(results):8} {len(results) / elapsed:8.1f} " \
+                  + f"{p50:8.1f} {p95:8.1f} {p99:8.1f} {pool.started:8} {_rss_mb():8.0f}")
+
+    finally:
+        processes._check_product = check_product
+        processes.ProductLibrary.shutdown()
+        clear_rewrites()
+        server.terminate()
+
+    return 0
+
+#######################################################################
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Checks every vendor parser against the fixture pages, without network
+or browser. Each page must be parsed to the result stored in
+`expected.json`, so broken selectors are caught before deploying.
+
+Usage, from the repository root:
+
+    python -m benchmarks.check_parsers [--vendor NAME] [--pages DIRECTORY]
+"""
+import sys
+import argparse
+
+from benchmarks.corpus import FIXTURES_DIR, load_corpus, parse_page
+
+#######################################################################
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', default=FIXTURES_DIR,
+        help='Directory with the vendor fixture pages')
+    parser.add_argument('--vendor', default=None,
+        help='Only check the pages of this vendor')
+    args = parser.parse_args()
+
+    failures: int = 0
+    fixtures = load_corpus(args.pages, args.vendor)
+
+    for fixture in fixtures:
+        try:
+            result: object = parse_page(fixture["vendor"], fixture["page"])
+        except Exception as e:
+            result = f"{type(e).__name__}: {e}"
+
+        if fixture["expected"] is None:
+            status: str = "MISSING"
+        elif result == fixture["expected"]:
+            status = "OK"
+        else:
+            status = "FAIL"
+
+        if status != "OK":
+            failures += 1
+
+        print(f"{fixture['name']:40} {status:8} expected={fixture['expected']} got={result}")
+
+    print(f"{len(fixtures) - failures}/{len(fixtures)} pages parsed as expected")
+
+    return 1 if failures or not fixtures else 0
+
+#######################################################################
+
+if __name__ == "__main__":
+    sys.exit(main())
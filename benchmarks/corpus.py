@@ -0,0 +1,113 @@
+"""Vendor pages used to check and benchmark the parsers offline.
+
+The pages shipped are synthetic, hand-written after the markup each parser
+reads, so they show the parsers handle that markup, not that the vendors
+still serve it. Real pages can be added with `record_fixture`.
+
+Pages are saved in `benchmarks/fixtures`, named after their vendor and the
+case they cover, e.g. `coolmod_out_of_stock.html`. The result each page must
+be parsed to is stored in `benchmarks/fixtures/expected.json`.
+"""
+import os
+import json
+import time
+import tracemalloc
+
+from typing import Callable, Optional, TypedDict
+
+from bs4 import BeautifulSoup
+
+import library.vendors as vendors
+from library.vendors import Vendor
+from library.extract import make_soup
+
+#######################################################################
+
+FIXTURES_DIR: str = os.path.join(os.path.dirname(__file__), "fixtures")
+EXPECTED_FILE: str = "expected.json"
+
+class Fixture(TypedDict):
+    name:     str
+    vendor:   Vendor
+    page:     str
+    expected: Optional[tuple[bool, float]]
+
+#######################################################################
+
+def load_expected(directory: str = FIXTURES_DIR) -> dict[str, tuple[bool, float]]:
+    """Reads the expected result of each page of the directory.
+    """
+    path: str = os.path.join(directory, EXPECTED_FILE)
+
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding="utf-8") as f:
+        return {name: (bool(available), float(price))
+                for name, (available, price) in json.load(f).items()}
+
+def save_expected(expected: dict[str, tuple[bool, float]],
+                  directory: str = FIXTURES_DIR) -> None:
+    with open(os.path.join(directory, EXPECTED_FILE), "w", encoding="utf-8") as f:
+        json.dump({name: list(result) for name, result in sorted(expected.items())},
+                  f, indent=4)
+        f.write("\n")
+
+def load_corpus(directory: str = FIXTURES_DIR,
+                vendor_name: Optional[str] = None) -> list[Fixture]:
+    """Loads the pages of the directory whose vendor is registered,
+    optionally only the ones of a vendor.
+    """
+    expected: dict[str, tuple[bool, float]] = load_expected(directory)
+    fixtures: list[Fixture] = []
+
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".html"):
+            continue
+
+        vendor: Optional[Vendor] = vendors.get_vendor(filename.split("_")[0])
+        if vendor is None or (vendor_name and vendor.name != vendor_name):
+            continue
+
+        with open(os.path.join(directory, filename), encoding="utf-8") as f:
+            page: str = f.read()
+
+        fixtures.append({
+            "name": filename,
+            "vendor": vendor,
+            "page": page,
+            "expected": expected.get(filename)
+        })
+
+    return fixtures
+
+def parse_page(vendor: Vendor, page: str) -> tuple[bool, float]:
+    """Parses a page as checks do once it's fetched: pages without the
+    vendor marker are rejected, and only the vendor targets are parsed.
+    """
+    if vendor.marker and vendor.marker not in page:
+        raise ValueError(f"Marker {vendor.marker} not found")
+
+    soup: BeautifulSoup = make_soup(page, vendor.strainer)
+
+    return vendor.parse(soup)
+
+def measure(parse: Callable[[], tuple[bool, float]],
+            rounds: int) -> tuple[float, int, tuple[bool, float]]:
+    """Runs `parse` the given rounds.
+
+    Returns:
+    - A `tuple` with the mean time in ms, the peak memory in bytes of a
+    single round and the parse result
+    """
+    tracemalloc.start()
+    result: tuple[bool, float] = parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start: float = time.perf_counter()
+    for _ in range(rounds):
+        parse()
+    elapsed: float = (time.perf_counter() - start) * 1000 / max(1, rounds)
+
+    return (elapsed, peak, result)
@@ -0,0 +1,52 @@
+"""Records a live product page into the fixture corpus.
+
+The page is fetched through plain HTTP, saved as `<vendor>_<case>.html` and
+its current parse result is stored as the expected one. Review both before
+committing them: the result is only as right as the parser that produced it.
+
+Usage, from the repository root:
+
+    python -m benchmarks.record_fixture <url> <case> [--pages DIRECTORY]
+"""
+import os
+import sys
+import argparse
+
+import library.vendors as vendors
+from library.fetch import get_web_through_http
+from benchmarks.corpus import FIXTURES_DIR, load_expected, save_expected, parse_page
+
+#######################################################################
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('url', help='URL of the product page')
+    parser.add_argument('case', help='Case covered by the page, e.g. out_of_stock')
+    parser.add_argument('--pages', default=FIXTURES_DIR,
+        help='Directory with the vendor fixture pages')
+    args = parser.parse_args()
+
+    vendor = vendors.resolve(args.url)
+    if vendor is None:
+        print(f"Webpage not supported! {args.url}")
+        return 1
+
+    page: str = get_web_through_http(args.url)
+    result: tuple[bool, float] = parse_page(vendor, page)
+
+    filename: str = f"{vendor.name}_{args.case}.html"
+    with open(os.path.join(args.pages, filename), "w", encoding="utf-8") as f:
+        f.write(page)
+
+    expected = load_expected(args.pages)
+    expected[filename] = result
+    save_expected(expected, args.pages)
+
+    print(f"{filename} recorded, parsed as {result}")
+
+    return 0
+
+#######################################################################
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Local stand-in of the supported vendors, serving the fixture pages.
+
+Pages are served at `/<vendor>/<case>/<anything>`, e.g.
+`/coolmod/in_stock/42` serves `coolmod_in_stock.html`, so any number of
+distinct product URLs can be pointed at the same fixture.
+
+The server can be made to behave like a real vendor under load:
+- `latency` and `jitter` delay every answer, in seconds
+- `error_rate` answers that fraction of the requests with a 503
+- `throttle` answers with a 429 and `Retry-After` the requests of a vendor
+beyond that many per second
+- `etag` sends an `ETag` per page, and answers 304 to conditional requests
+
+Usage, from the repository root:
+
+    python -m benchmarks.vendor_server [--port 8900] [--latency 0.1] ...
+"""
+import os
+import sys
+import time
+import random
+import hashlib
+import argparse
+import threading
+
+from typing import Optional
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from benchmarks.corpus import FIXTURES_DIR
+
+#######################################################################
+
+DEFAULT_PORT: int = 8900
+
+class VendorServer(ThreadingHTTPServer):
+    """HTTP server holding the fixture pages and the behaviour settings.
+    """
+    daemon_threads = True
+    request_queue_size = 512
+
+    def __init__(self,
+                 address: tuple[str, int],
+                 pages: str = FIXTURES_DIR,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 error_rate: float = 0.0,
+                 throttle: float = 0.0,
+                 etag: bool = False):
+        super().__init__(address, VendorHandler)
+
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.error_rate: float = error_rate
+        self.throttle: float = throttle
+        self.etag: bool = etag
+
+        self.pages: dict[str, bytes] = {}
+        for filename in os.listdir(pages):
+            if filename.endswith(".html"):
+                with open(os.path.join(pages, filename), "rb") as f:
+                    self.pages[filename[:-len(".html")]] = f.read()
+
+        self._windows: dict[str, tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def throttled(self, vendor: str) -> bool:
+        """Counts a request of the vendor in the current second, and checks
+        if it goes beyond the throttle.
+        """
+        if self.throttle <= 0:
+            return False
+
+        second: int = int(time.monotonic())
+
+        with self._lock:
+            window, count = self._windows.get(vendor, (second, 0))
+            if window != second:
+                window, count = second, 0
+            self._windows[vendor] = (window, count + 1)
+
+        return count + 1 > self.throttle
+
+class VendorHandler(BaseHTTPRequestHandler):
+    server: VendorServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _answer(self, status: int, body: bytes = b"",
+                headers: Optional[dict[str, str]] = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        server: VendorServer = self.server
+        parts: list[str] = [part for part in self.path.split("?")[0].split("/") if part]
+
+        if server.latency or server.jitter:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+
+        page: Optional[bytes] = server.pages.get("_".join(parts[:2])) if len(parts) >= 2 else None
+        if page is None:
+            self._answer(404)
+            return
+
+        if server.throttled(parts[0]):
+            self._answer(429, headers={"Retry-After": "1"})
+            return
+
+        if random.random() < server.error_rate:
+            self._answer(503)
+            return
+
+        headers: dict[str, str] = {"Content-Type": "text/html; charset=utf-8"}
+
+        if server.etag:
+            etag: str = '"' + hashlib.sha1(page).hexdigest() + '"'
+            headers["ETag"] = etag
+
+            if self.headers.get("If-None-Match") == etag:
+                self._answer(304, headers={"ETag": etag})
+                return
+
+        self._answer(200, page, headers)
+
+#######################################################################
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--pages', default=FIXTURES_DIR,
+        help='Directory with the vendor fixture pages')
+    parser.add_argument('--latency', type=float, default=0.0,
+        help='Seconds every answer is delayed')
+    parser.add_argument('--jitter', type=float, default=0.0,
+        help='Maximum random seconds added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+        help='Fraction of requests answered with a 503')
+    parser.add_argument('--throttle', type=float, default=0.0,
+        help='Requests per second and vendor answered before 429s, unlimited if 0')
+    parser.add_argument('--etag', action='store_true',
+        help='Send ETags and answer conditional requests with 304')
+    args = parser.parse_args()
+
+    server = VendorServer((args.host, args.port), args.pages, args.latency,
+                          args.jitter, args.error_rate, args.throttle, args.etag)
+    print(f"Serving {len(server.pages)} pages on http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    return 0
+
+#######################################################################
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,23 @@
 import os
 import time
-import emoji
 import sqlite3
 import logging
 import platform
-from typing import Optional, Callable, TypedDict
+from typing import Optional, Callable, TypedDict, TYPE_CHECKING
 
 from urllib.parse import urlparse, uses_relative
 from datetime import datetime as dt
 
-from library.emojis import *
 import library.database as db
-import library.processes as processes
 
-if "pronotify" in __name__:
-    import pronotify.main as main # type: ignore
-else:
-    import main as main
+# The library is only imported by the menu and the commands checking products
+if TYPE_CHECKING:
+    import library.daemon as daemon
 
+DEBUG: bool = False
 DB_NAME: str = "pronotify"
 POLL_SECONDS: int = 30
+MAX_POLL_SECONDS: int = 3600
 
 platforms: dict[str, str] = {
     "darwin": "clear",
@@ -30,11 +28,55 @@ PLATFORM: str = platform.system().lower()
 CLEAN_CMD: str = platforms.get(PLATFORM, "clear")
 
 CHROMIUM_PATH: Optional[str] = None
+BROWSER_POOL_SIZE: int = 2
+BROWSER_MAX_PAGES: int = 50
+NOTIFY_SINKS: list[str] = []
+NOTIFY_WINDOW: float = 60.0
+API_HOST: str = "127.0.0.1"
+API_PORT: int = 0
+METRICS_FILE: str = ""
+DUMP_PAGES: str = ""
+DUMP_MAX_MB: int = 50
+SHARDS: int = 0
+SHARD_BY: str = "url"
+RESULT_TTL: float = 15.0
+PIPELINE: bool = False
+CHECK_WORKERS: int = 4
+VENDOR_WORKERS: int = 2
 
 class MenuOption(TypedDict):
     text: str
     function: Callable[[sqlite3.Connection], None]
 
+#######################################################################
+
+def library_settings() -> "daemon.LibrarySettings":
+    """Returns the settings of the product library, from the globals set
+    on the command line.
+    """
+    import library.daemon as daemon
+
+    return daemon.LibrarySettings(
+        chromium_path=CHROMIUM_PATH or "",
+        pool_size=BROWSER_POOL_SIZE,
+        max_pages=BROWSER_MAX_PAGES,
+        poll_seconds=POLL_SECONDS,
+        max_poll_seconds=MAX_POLL_SECONDS,
+        notify=NOTIFY_SINKS,
+        notify_window=NOTIFY_WINDOW,
+        db_name=DB_NAME,
+        api_port=API_PORT,
+        api_host=API_HOST,
+        metrics_file=METRICS_FILE,
+        dump_pages=DUMP_PAGES,
+        dump_max_bytes=DUMP_MAX_MB * 1024 * 1024,
+        shards=SHARDS,
+        shard_by=SHARD_BY,
+        result_ttl=RESULT_TTL
+    )
+
+#######################################################################
+
 def _ask_bool_user(msg: str, default:bool = False) -> bool:
     """Ask anything to the user and returns a boolean.
 
@@ -126,7 +168,7 @@ def generate_menu(db_conn: sqlite3.Connection) -> bool:
         }
     }
 
-    if not main.DEBUG:
+    if not DEBUG:
         os.system(CLEAN_CMD)
 
     print("############### pronotify ###############")
@@ -168,32 +210,25 @@ def generate_menu(db_conn: sqlite3.Connection) -> bool:
 
 #######################################################################
 
-def load_product(product: tuple) -> None:
-    """Loads a product from the DB into memory.
-    """
-    #product_id: int = product[0]
-    product_url: str = product[1]
-    product_group: str = product[2]
-
-    if not processes.ProductLibrary.add_product(product_url, product_group):
-        logging.warning(f"Failed to load product {product} into memory...")
-
-#######################################################################
-
 def add_product(db_conn: sqlite3.Connection) -> None:
     """Adds a product to the memory and to the DB.
     """
+    import library.processes as processes
 
-    product_url: str = _ask_str_user("Please, insert URL to the product")
+    product_url: str = processes.vendors.canonical_url(
+        _ask_str_user("Please, insert URL to the product"))
     logging.debug(f"Product URL: {product_url}")
 
     product_group: str = _ask_str_user("Specify a group if desired", "")
     logging.debug(f"Product Group: {product_group}")
 
-    if not processes.ProductLibrary.add_product(product_url, product_group):
-        logging.warning(f"Product not saved in memory!")
-    elif not db.insert_product(db_conn, (product_url, product_group)):
+    product_id: Optional[int] = db.insert_product(db_conn, (product_url, product_group))
+
+    if not product_id:
         logging.warning(f"Product not saved in DB!")
+    elif not processes.ProductLibrary.add_product(product_url, product_group,
+                                                  product_id=product_id):
+        logging.warning(f"Product not saved in memory!")
     else:
         print(f"Product added successfully :)")
 
@@ -202,8 +237,10 @@ def add_product(db_conn: sqlite3.Connection) -> None:
 def del_product(db_conn: sqlite3.Connection):
     """Deletes a product from memory and from the DB.
     """
+    import library.processes as processes
 
-    product_url: str = _ask_str_user("Please, insert URL to remove")
+    product_url: str = processes.vendors.canonical_url(
+        _ask_str_user("Please, insert URL to remove"))
     logging.debug(f"Product URL: {product_url}")
 
     product_group: str = _ask_str_user("Specify a group where it belongs", "")
@@ -220,87 +257,82 @@ def del_product(db_conn: sqlite3.Connection):
 
 def check_products(db_conn: sqlite3.Connection) -> None:
     """
-    Checks the products in memory and shows their status.
+    Checks the products in memory as they become due and shows their
+    status in a dashboard, filtered and sorted as the user asks.
 
-    db_conn parameters is not used, but is defined to avoid more complex
-    parameters management in main function menu.
+    db_conn is used to persist the fetch cache and the check results after
+    each cycle.
     """
-    check: bool = True
-
-    while check:
-        try:
-            # Update data
-            assert CHROMIUM_PATH is not None, "Chromium path is not set!"
-            processes.ProductLibrary.check_products(CHROMIUM_PATH)
-
-            if not main.DEBUG:
-                os.system(CLEAN_CMD)
-            print(emoji.emojize(f"{ETIME} Last Update {dt.now()} {ETIME}")
-            )
-            print("")
-
-            for group in processes.ProductLibrary.products:
-
-                print(emoji.emojize(f"{EGROUP} {group} {EGROUP}")
-                )
-                print("")
-
-                for product in processes.ProductLibrary.products[group]:
-
-                    # vendor = urlparse(product).netloc
-
-                    try:
-                        availability, price = \
-                            processes.ProductLibrary.products[group][product]
-                    except Exception as e:
-                        logging.warning(f"Error: {e}")
-                        availability = False
-                        price = -1
+    # Emojis are only resolved when the status screen is shown
+    import library.dashboard as dashboard
+    import library.processes as processes
+
+    group: str = _ask_str_user("Filter by group (empty for all)", "")
+    available_only: bool = _ask_bool_user("Show only available products?")
+    sort: str = _ask_str_user(f"Sort by {', '.join(dashboard.SORT_KEYS)}",
+                              dashboard.SORT_GROUP).lower()
+
+    if sort not in dashboard.SORT_KEYS:
+        logging.warning(f"Unknown sort key {sort}, sorting by group")
+        sort = dashboard.SORT_GROUP
+
+    # In debug mode the log is printed too, so rows can't be redrawn in place
+    screen = dashboard.Dashboard(group=group, available_only=available_only,
+                                 sort=sort, ansi=False if DEBUG else None)
+    updated: Optional[dt] = None
+
+    def show_progress(progress: dict[str, tuple[int, int]]) -> None:
+        # Products are drawn once, then each check only moves the progress
+        if screen.drawn:
+            screen.render_progress(progress)
+        else:
+            screen.render(screen.records(processes.ProductLibrary.products), updated, progress)
 
-                    print(f"Product URL: {product}")
+    check: bool = True
 
-                    if availability:
-                        availability = EVALID
-                    else:
-                        availability = ECROSS
-                    print(emoji.emojize(f"Availability: {availability} - Price: {price}€"))
+    try:
+        while check:
+            try:
+                # Update data
+                assert CHROMIUM_PATH is not None, "Chromium path is not set!"
+                wait: float = processes.ProductLibrary.check_due_products(
+                    CHROMIUM_PATH, CHECK_WORKERS, VENDOR_WORKERS, show_progress)
+                processes.ProductLibrary.persist(db_conn)
 
-                print("")
+                updated = dt.now()
+                screen.render(screen.records(processes.ProductLibrary.products), updated)
 
-            print(f"++ Control ++")
-            print(f"Please, hit Ctrl+C in case you want to stop monitoring...")
+                time.sleep(max(1.0, wait))
 
-            time.sleep(POLL_SECONDS)
+            except KeyboardInterrupt:
+                check = False
 
-        except KeyboardInterrupt:
-            check = False
+    finally:
+        screen.close()
 
 #######################################################################
 
 def menu() -> None:
     """Generates and controls the menu for the app.
     """
+    import library.daemon as daemon
+    import library.processes as processes
 
     db_conn = db.open_database(DB_NAME)
     if not db_conn:
         logging.error("Database connection could not be established!")
         return
 
-    # Database setup
-    print(f"1. Checking and creating products table in DB...")
-    db._create_products_table(db_conn)
-
-    print(f"2. Loading database into memory...")
-    products = db.read_products(db_conn)
-
-    if products:
-        for item in products:
-            load_product(item)
+    print(f"Loading database into memory...")
+    daemon.start_library(db_conn, library_settings())
 
     # Menu
-    generate = generate_menu(db_conn)
-
-    while generate:
+    try:
         generate = generate_menu(db_conn)
 
-    db.close_database(db_conn)
+        while generate:
+            generate = generate_menu(db_conn)
+
+    finally:
+        processes.ProductLibrary.shutdown()
+        db.close_database(db_conn)
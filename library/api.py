@@ -0,0 +1,354 @@
+import json
+import asyncio
+import logging
+import sqlite3
+import threading
+
+from http import HTTPStatus
+from typing import Any, Callable, Optional
+from urllib.parse import urlsplit, parse_qs, unquote
+from concurrent.futures import ThreadPoolExecutor
+
+if "pronotify" in __name__:
+    import pronotify.library.database as database # type: ignore
+    import pronotify.library.vendors as vendors # type: ignore
+else:
+    import library.database as database
+    import library.vendors as vendors
+
+#######################################################################
+
+DEFAULT_HOST: str = "127.0.0.1"
+DEFAULT_PORT: int = 8787
+
+REQUEST_TIMEOUT: float = 10.0
+MAX_BODY_SIZE: int = 64 * 1024
+HISTORY_LIMIT: int = 1000
+
+class HTTPError(Exception):
+    """Error answered to the client with the given status.
+    """
+
+    def __init__(self, status: HTTPStatus, message: str = ""):
+        super().__init__(message or status.phrase)
+        self.status: HTTPStatus = status
+
+#######################################################################
+
+class StatusServer:
+    """Local HTTP server exposing the state of the product library as JSON.
+
+    It runs an asyncio loop in its own thread. Status reads are answered
+    from `library.snapshot`, which each check cycle replaces at once, so
+    they never wait for the checks. History queries and product changes
+    go through a dedicated database connection, owned by a single worker
+    thread.
+
+    Endpoints:
+    - `GET /status`: every product and the time of the last update
+    - `GET /metrics`: check metrics in Prometheus text format, or JSON with
+    `?format=json`
+    - `GET /deals`: the products available at or under their minimum price
+    - `GET /groups`: the groups and their number of products
+    - `GET /groups/<group>`: the products of a group
+    - `GET /products/<id>/history?since=<timestamp>&limit=<n>`: change-points
+    - `POST /products` with `{"url": ..., "group": ..., "target_price": ...}`:
+    adds a product
+    - `DELETE /products/<id>`: removes a product
+    """
+
+    def __init__(self,
+                 library: Any,
+                 db_name: str,
+                 host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT):
+        self.library = library
+        self.db_name: str = db_name
+        self.host: str = host
+        self.port: int = port
+
+        self._db_executor = ThreadPoolExecutor(max_workers=1,
+                                               thread_name_prefix="api-db")
+        self._db_conn: Optional[sqlite3.Connection] = None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._started = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Starts serving in a background thread.
+        """
+        self._thread = threading.Thread(target=asyncio.run, args=(self._serve(),),
+                                        name="api-server", daemon=True)
+        self._thread.start()
+        self._started.wait(REQUEST_TIMEOUT)
+
+    async def _serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+
+        try:
+            server = await asyncio.start_server(self._handle, self.host, self.port)
+        except OSError as e:
+            logging.error(f"Status API couldn't listen on {self.host}:{self.port}: {e}")
+            self._started.set()
+            return
+
+        logging.info(f"Status API listening on http://{self.host}:{self.port}")
+        self._started.set()
+
+        async with server:
+            await self._stopped.wait()
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stops the server and closes its database connection.
+        """
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+        self._db_executor.submit(self._close_database).result(timeout)
+        self._db_executor.shutdown()
+
+    #######################################################################
+
+    def _open_database(self) -> sqlite3.Connection:
+        if self._db_conn is None:
+            self._db_conn = database.open_database(self.db_name)
+
+        if self._db_conn is None:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Database not available")
+
+        return self._db_conn
+
+    def _close_database(self) -> None:
+        if self._db_conn is not None:
+            database.close_database(self._db_conn)
+            self._db_conn = None
+
+    async def _in_database(self, function: Callable[..., Any], *args: Any) -> Any:
+        """Runs `function(connection, *args)` in the database thread.
+        """
+        def call() -> Any:
+            return function(self._open_database(), *args)
+
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor, call)
+
+    #######################################################################
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        status: HTTPStatus = HTTPStatus.OK
+        body: Any = None
+
+        try:
+            method, path, query, payload = await asyncio.wait_for(
+                self._read_request(reader), REQUEST_TIMEOUT)
+            status, body = await self._route(method, path, query, payload)
+
+        except HTTPError as e:
+            status, body = e.status, {"error": str(e)}
+        except asyncio.TimeoutError:
+            status, body = HTTPStatus.REQUEST_TIMEOUT, {"error": "Request timed out"}
+        except Exception as e:
+            logging.warning(f"Status API request failed: {e}")
+            status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal error"}
+
+        # Text bodies are Prometheus metrics
+        if isinstance(body, str):
+            content: bytes = body.encode("utf-8")
+            content_type: str = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            content = json.dumps(body).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+
+        head: str = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+
+        try:
+            writer.write(head.encode("ascii") + content)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> tuple[str, str, dict, Any]:
+        """Reads a request, returning its method, unquoted path, query
+        parameters and decoded JSON body.
+        """
+        request_line: str = (await reader.readline()).decode("latin-1").strip()
+        parts: list[str] = request_line.split()
+
+        if len(parts) != 3:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+        headers: dict[str, str] = {}
+        while True:
+            line: str = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length: int = int(headers.get("content-length", "0") or 0)
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+
+        payload: Any = None
+        if length > 0:
+            try:
+                payload = json.loads(await reader.readexactly(length))
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Body is not valid JSON")
+
+        url = urlsplit(parts[1])
+
+        return parts[0].upper(), unquote(url.path), parse_qs(url.query), payload
+
+    async def _route(self, method: str, path: str, query: dict, payload: Any) -> tuple[HTTPStatus, Any]:
+        segments: list[str] = [segment for segment in path.split("/") if segment]
+
+        if method == "GET" and segments == ["status"]:
+            return HTTPStatus.OK, self._status()
+
+        if method == "GET" and segments == ["metrics"]:
+            if query.get("format", [""])[0] == "json":
+                return HTTPStatus.OK, self.library.metrics.to_json()
+            return HTTPStatus.OK, self.library.metrics.to_prometheus()
+
+        if method == "GET" and segments == ["deals"]:
+            return HTTPStatus.OK, self._deals()
+
+        if method == "GET" and segments == ["groups"]:
+            return HTTPStatus.OK, self._groups()
+
+        if method == "GET" and len(segments) == 2 and segments[0] == "groups":
+            return HTTPStatus.OK, self._group(segments[1])
+
+        if method == "GET" and len(segments) == 3 \
+                and segments[0] == "products" and segments[2] == "history":
+            return HTTPStatus.OK, await self._history(_product_id(segments[1]), query)
+
+        if method == "POST" and segments == ["products"]:
+            return HTTPStatus.CREATED, await self._add_product(payload)
+
+        if method == "DELETE" and len(segments) == 2 and segments[0] == "products":
+            return HTTPStatus.OK, await self._remove_product(_product_id(segments[1]))
+
+        raise HTTPError(HTTPStatus.NOT_FOUND)
+
+    #######################################################################
+
+    def _status(self) -> dict:
+        snapshot = self.library.snapshot
+
+        return {"updated": snapshot["updated"], "products": snapshot["products"]}
+
+    def _deals(self) -> dict:
+        snapshot = self.library.snapshot
+
+        return {"updated": snapshot["updated"], "products": snapshot["deals"]}
+
+    def _groups(self) -> dict:
+        snapshot = self.library.snapshot
+
+        return {
+            "updated": snapshot["updated"],
+            "groups": {group: len(products) for group, products in snapshot["groups"].items()}
+        }
+
+    def _group(self, group: str) -> dict:
+        snapshot = self.library.snapshot
+
+        if group not in snapshot["groups"]:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Group {group} doesn't exist")
+
+        return {"updated": snapshot["updated"], "group": group,
+                "products": snapshot["groups"][group]}
+
+    async def _history(self, product_id: int, query: dict) -> dict:
+        since: str = query.get("since", [""])[0]
+
+        try:
+            limit: int = min(HISTORY_LIMIT, int(query.get("limit", [HISTORY_LIMIT])[0]))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "limit must be an integer")
+
+        rows: Optional[list] = await self._in_database(database.read_checks,
+                                                        product_id, since, limit)
+        if rows is None:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "History not available")
+
+        return {
+            "product_id": product_id,
+            "checks": [
+                {"available": bool(available), "price": price,
+                 "timestamp": timestamp, "last_seen": last_seen}
+                for available, price, timestamp, last_seen in rows
+            ]
+        }
+
+    async def _add_product(self, payload: Any) -> dict:
+        if not isinstance(payload, dict) or not isinstance(payload.get("url"), str) \
+                or not payload["url"]:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "A url is required")
+
+        url: str = vendors.canonical_url(payload["url"])
+        group: str = str(payload.get("group") or "")
+
+        try:
+            target_price: float = max(0.0, float(payload.get("target_price") or 0))
+        except (TypeError, ValueError):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "target_price must be a number")
+
+        if self.library.products.find(url, group or "default") is not None:
+            raise HTTPError(HTTPStatus.CONFLICT, "Product already in this group")
+
+        def add(con: sqlite3.Connection) -> Optional[int]:
+            product_id: Optional[int] = database.insert_product(con, (url, group))
+
+            if product_id is not None:
+                if target_price > 0:
+                    database.set_target_price(con, product_id, target_price)
+                self.library.add_product(url, group, target_price, product_id)
+
+            return product_id
+
+        product_id: Optional[int] = await self._in_database(add)
+        if product_id is None:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Product not saved in DB")
+
+        return {"id": product_id, "url": url, "group": group or "default",
+                "target_price": target_price}
+
+    async def _remove_product(self, product_id: int) -> dict:
+        record = self.library.products.get(product_id)
+
+        if record is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Product {product_id} doesn't exist")
+
+        def remove(con: sqlite3.Connection) -> bool:
+            # Negative IDs are products only kept in memory
+            if product_id >= 0 and not database.remove_product_by_id(con, product_id):
+                return False
+
+            return self.library.del_product(record.url, record.group)
+
+        if not await self._in_database(remove):
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Product not removed")
+
+        return {"id": product_id, "url": record.url, "group": record.group}
+
+def _product_id(segment: str) -> int:
+    try:
+        return int(segment)
+    except ValueError:
+        raise HTTPError(HTTPStatus.NOT_FOUND, "Product IDs are integers")
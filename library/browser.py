@@ -0,0 +1,199 @@
+import queue
+import logging
+import platform
+import threading
+
+from typing import Iterator, Optional, TYPE_CHECKING
+from contextlib import contextmanager
+
+# Selenium is only imported once the first driver is started
+if TYPE_CHECKING:
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.remote.webdriver import WebDriver
+
+#######################################################################
+
+DEFAULT_POOL_SIZE: int = 2
+DEFAULT_MAX_PAGES: int = 50
+
+# Requests never needed to read prices: images, fonts, and third-party
+# analytics, ads and chat scripts
+BLOCKED_URLS: tuple[str, ...] = (
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*facebook.com/tr*",
+    "*hotjar.com*", "*criteo.com*", "*criteo.net*", "*tiktok.com*",
+    "*clarity.ms*", "*bing.com/bat*", "*zendesk.com*", "*trustpilot.com*",
+)
+
+#######################################################################
+
+def _build_chrome_options(chromium_path: str) -> "Options":
+    """Builds the options used by every headless driver of the pool.
+    """
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument("--window-size=1920x1080")
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-infobars')
+    chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+
+    # `get` returns once the DOM is ready, without waiting for every
+    # resource: checks wait for the elements their vendor needs instead
+    chrome_options.page_load_strategy = "eager"
+
+    # Just in case of windows execution
+    # https://bugs.chromium.org/p/chromium/issues/detail?id=737678
+    if platform.system().lower() == "windows":
+        chrome_options.add_argument('--disable-gpu')
+
+    if chromium_path is not None and len(chromium_path) > 0:
+        chrome_options.binary_location = chromium_path
+
+    # Supress chrome logs
+    # https://stackoverflow.com/questions/47392423/python-selenium-devtools-listening-on-ws-127-0-0-1
+    chrome_options.add_argument("--log-level=3")
+    chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
+
+    return chrome_options
+
+#######################################################################
+
+class BrowserPool:
+    """Pool of long-lived headless chromium drivers.
+
+    Drivers are started on demand up to `size`, borrowed for a single page
+    load and then returned to the pool. Requests matching `blocked_urls`
+    are never sent by the drivers. A driver is recycled (quit and
+    replaced on next demand) after serving `max_pages` pages, or straight
+    away if it failed while borrowed.
+    """
+
+    def __init__(self,
+                 chromium_path: Optional[str] = "",
+                 size: int = DEFAULT_POOL_SIZE,
+                 max_pages: int = DEFAULT_MAX_PAGES,
+                 blocked_urls: tuple[str, ...] = BLOCKED_URLS):
+        self.chromium_path: str = chromium_path or ""
+        self.size: int = max(1, size)
+        self.max_pages: int = max(1, max_pages)
+        self.blocked_urls: tuple[str, ...] = blocked_urls
+
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._pages: dict[int, int] = {}
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._closed: bool = False
+        self.started: int = 0
+
+    @property
+    def running(self) -> int:
+        """Number of drivers alive, idle or borrowed.
+        """
+        return len(self._pages)
+
+    def _start_driver(self) -> "WebDriver":
+        """Launches a new headless driver.
+        """
+        from selenium import webdriver
+
+        logging.info("Starting new headless driver")
+        driver = webdriver.Chrome(options=_build_chrome_options(self.chromium_path))
+
+        if self.blocked_urls:
+            try:
+                driver.execute_cdp_cmd("Network.enable", {})
+                driver.execute_cdp_cmd("Network.setBlockedURLs",
+                                       {"urls": list(self.blocked_urls)})
+            except Exception as e:
+                logging.warning(f"Couldn't block resources in the driver: {e}")
+
+        with self._lock:
+            self._pages[id(driver)] = 0
+            self.started += 1
+
+        return driver
+
+    def _quit_driver(self, driver: "WebDriver") -> None:
+        """Quits a driver, ignoring errors from already dead browsers.
+        """
+        with self._lock:
+            self._pages.pop(id(driver), None)
+
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.warning(f"Couldn't quit driver cleanly: {e}")
+
+    def acquire(self) -> "WebDriver":
+        """Borrows a driver from the pool, starting a new one if there is no
+        idle driver available. Blocks while `size` drivers are borrowed.
+        """
+        if self._closed:
+            raise RuntimeError("Browser pool is already shut down!")
+
+        self._slots.acquire()
+
+        try:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                return self._start_driver()
+
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, driver: "WebDriver", broken: bool = False) -> None:
+        """Returns a borrowed driver to the pool. Broken or worn out drivers
+        are quit instead of being kept.
+        """
+        try:
+            with self._lock:
+                pages: int = self._pages.get(id(driver), 0) + 1
+                self._pages[id(driver)] = pages
+
+            if broken or self._closed or pages >= self.max_pages:
+                if not broken and not self._closed:
+                    logging.info(f"Recycling driver after {pages} pages")
+                self._quit_driver(driver)
+            else:
+                self._idle.put(driver)
+
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def driver(self) -> Iterator["WebDriver"]:
+        """Context manager that borrows a driver and returns it on exit. If
+        the body raises, the driver is considered crashed and recycled.
+        """
+        driver: "WebDriver" = self.acquire()
+
+        try:
+            yield driver
+        except Exception:
+            self.release(driver, broken=True)
+            raise
+        else:
+            self.release(driver)
+
+    def shutdown(self) -> None:
+        """Quits every idle driver. Drivers still borrowed are quit as soon
+        as they are released.
+        """
+        self._closed = True
+
+        while True:
+            try:
+                driver: "WebDriver" = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit_driver(driver)
+
+        logging.info("Browser pool shut down")
@@ -0,0 +1,72 @@
+import logging
+import sqlite3
+
+from typing import Optional
+
+if "pronotify" in __name__:
+    import pronotify.library.database as db # type: ignore
+else:
+    import library.database as db
+
+#######################################################################
+
+def _vendors():
+    """Imports the vendors, and their third-party plugins, only for the
+    commands resolving URLs, so the others load nothing but the database.
+    """
+    if "pronotify" in __name__:
+        import pronotify.library.vendors as vendors # type: ignore
+    else:
+        import library.vendors as vendors
+
+    vendors.load_plugins()
+
+    return vendors
+
+#######################################################################
+
+def add_product(db_conn: sqlite3.Connection,
+                url: str,
+                group: str,
+                target_price: float = 0.0) -> bool:
+    """Adds a product to the DB, by its canonical URL. A `target_price`
+    makes it a deal when it's available at or under that price.
+    """
+    vendors = _vendors()
+
+    if vendors.resolve(url) is None:
+        logging.warning(f"Webpage not supported! {url}")
+
+    product_id: Optional[int] = db.insert_product(
+        db_conn, (vendors.canonical_url(url), group))
+
+    if product_id is not None and target_price > 0:
+        return db.set_target_price(db_conn, product_id, target_price)
+
+    return product_id is not None
+
+def remove_product(db_conn: sqlite3.Connection, url: str, group: str) -> bool:
+    """Removes a product from the DB.
+    """
+    return db.remove_product(db_conn, (_vendors().canonical_url(url), group))
+
+def import_products(db_conn: sqlite3.Connection, path: str) -> int:
+    """Imports a watchlist into the DB, by the canonical URL of each product.
+
+    Returns:
+    - An `int` with the number of products imported, -1 if none was
+    """
+    return db.import_products(db_conn, path, _vendors().canonical_url)
+
+def list_deals(db_conn: sqlite3.Connection) -> None:
+    """Prints the products last seen available at or under their target
+    price, one per line: ID, group, price, target price, URL.
+    """
+    for product_id, url, group, price, target_price, currency in db.read_deals(db_conn) or []:
+        print(f"{product_id}\t{group}\t{price:.2f} {currency}\t{target_price:.2f} {currency}\t{url}")
+
+def list_products(db_conn: sqlite3.Connection) -> None:
+    """Prints the products stored in the DB, one per line: ID, group, URL.
+    """
+    for product_id, url, group in db.read_products(db_conn) or []:
+        print(f"{product_id}\t{group}\t{url}")
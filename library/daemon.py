@@ -0,0 +1,239 @@
+import signal
+import sqlite3
+import logging
+import threading
+
+from typing import Optional
+from dataclasses import dataclass, field
+
+if "pronotify" in __name__:
+    import pronotify.library.database as db # type: ignore
+    import pronotify.library.processes as processes # type: ignore
+    import pronotify.library.scheduler as scheduler # type: ignore
+    from pronotify.library.store import ProductRecord # type: ignore
+    from pronotify.library.notify import Notifier, make_sink, DEFAULT_WINDOW # type: ignore
+    from pronotify.library.metrics import PageDumper, DEFAULT_DUMP_SIZE # type: ignore
+    from pronotify.library.results import ResultCache, DEFAULT_TTL # type: ignore
+else:
+    import library.database as db
+    import library.processes as processes
+    import library.scheduler as scheduler
+    from library.store import ProductRecord
+    from library.notify import Notifier, make_sink, DEFAULT_WINDOW
+    from library.metrics import PageDumper, DEFAULT_DUMP_SIZE
+    from library.results import ResultCache, DEFAULT_TTL
+
+#######################################################################
+
+def _format_status(record: ProductRecord) -> str:
+    """Formats a product status as a tab separated line:
+    availability, price, currency, group and URL.
+    """
+    currency: str = record.vendor.currency if record.vendor else "-"
+    state: str = "available" if record.available else "unavailable"
+
+    return f"{state}\t{record.price}\t{currency}\t{record.group}\t{record.url}"
+
+def print_status() -> None:
+    """Prints the status of every product in memory, one per line.
+    """
+    for record in processes.ProductLibrary.products:
+        print(_format_status(record))
+
+#######################################################################
+
+class Daemon:
+    """Non-interactive monitoring loop, meant to be run under a service
+    manager. `SIGTERM` and `SIGINT` stop it once the checks in progress
+    finish; a second signal stops it straight away.
+
+    With `pipeline`, each cycle runs the checks through the asyncio
+    pipeline, persisting the results as they come.
+    """
+
+    def __init__(self,
+                 db_conn: sqlite3.Connection,
+                 chromium_path: str,
+                 workers: int = processes.CHECK_WORKERS,
+                 vendor_workers: int = processes.VENDOR_WORKERS,
+                 pipeline: bool = False):
+        self.db_conn: sqlite3.Connection = db_conn
+        self.chromium_path: str = chromium_path
+        self.workers: int = workers
+        self.vendor_workers: int = vendor_workers
+        self.pipeline: bool = pipeline
+
+        self._stop = threading.Event()
+
+    def stop(self, signum: Optional[int] = None, frame=None) -> None:
+        """Asks the loop to stop. As a signal handler, restores the default
+        handler so a second signal terminates the process.
+        """
+        if signum is not None:
+            logging.info(f"Signal {signum} received, stopping...")
+            signal.signal(signum, signal.SIG_DFL)
+
+        self._stop.set()
+
+    def _install_signal_handlers(self) -> None:
+        """Installs `stop` as handler of the termination signals.
+        """
+        for name in ("SIGTERM", "SIGINT", "SIGHUP"):
+            signum = getattr(signal, name, None)
+            if signum is not None:
+                signal.signal(signum, self.stop)
+
+    def run_cycle(self) -> float:
+        """Checks the products due, and persists what changed.
+
+        Returns:
+        - A `float` with the seconds until the next product is due
+        """
+        if self.pipeline:
+            import asyncio
+
+            wait: float = asyncio.run(processes.ProductLibrary.check_due_products_async(
+                self.chromium_path, self.workers, self.vendor_workers,
+                db_conn=self.db_conn))
+        else:
+            wait = processes.ProductLibrary.check_due_products(
+                self.chromium_path, self.workers, self.vendor_workers)
+
+        processes.ProductLibrary.persist(self.db_conn)
+
+        return wait
+
+    def run(self) -> None:
+        """Runs the checks until stopped.
+        """
+        if threading.current_thread() is threading.main_thread():
+            self._install_signal_handlers()
+
+        logging.info("Daemon started")
+
+        try:
+            while not self._stop.is_set():
+                try:
+                    wait: float = self.run_cycle()
+                except Exception as e:
+                    logging.error(f"Check cycle failed: {e}")
+                    wait = float(scheduler.MIN_INTERVAL)
+
+                self._stop.wait(max(1.0, wait))
+
+        finally:
+            processes.ProductLibrary.shutdown()
+            logging.info("Daemon stopped")
+
+#######################################################################
+
+@dataclass
+class LibrarySettings:
+    """Settings of `start_library`, as given on the command line.
+
+    - `notify`: notification sink specs, see `make_sink`
+    - `db_name`: database the status API opens its own connection to
+    - `api_port`: port of the status API, not served if 0
+    - `metrics_file`: file the check metrics are written to after each cycle
+    - `dump_pages`: directory the fetched pages are saved into as samples,
+    keeping no more than `dump_max_bytes` there
+    - `shards`: worker processes the checks run in, split by `shard_by`
+    - `result_ttl`: seconds check results are reused for
+    """
+    chromium_path: str = ""
+    pool_size: int = processes.DEFAULT_POOL_SIZE
+    max_pages: int = processes.DEFAULT_MAX_PAGES
+    poll_seconds: float = scheduler.MIN_INTERVAL
+    max_poll_seconds: float = scheduler.MAX_INTERVAL
+    notify: list[str] = field(default_factory=list)
+    notify_window: float = DEFAULT_WINDOW
+    db_name: str = ""
+    api_port: int = 0
+    api_host: str = "127.0.0.1"
+    metrics_file: str = ""
+    dump_pages: str = ""
+    dump_max_bytes: int = DEFAULT_DUMP_SIZE
+    shards: int = 0
+    shard_by: str = "url"
+    result_ttl: float = DEFAULT_TTL
+
+def start_library(db_conn: sqlite3.Connection, settings: LibrarySettings) -> int:
+    """Prepares the product library to run checks: loads vendor plugins and
+    the database, and starts the scheduler, the browser pool and, if any
+    sink is given, the notifier. If an API port is given, the status API is
+    served on it, using its own connection to the database.
+
+    Check metrics are written to the metrics file after each cycle, if
+    given, and fetched pages are saved as samples into the dump directory,
+    if given.
+
+    With more than one shard, checks run in that many worker processes,
+    each with its own browser pool. Pages are not dumped by the workers.
+
+    Check results are reused for `result_ttl` seconds by the products of
+    every group watching the same URL.
+
+    Returns:
+    - An `int` with the number of products loaded
+    """
+    processes.vendors.load_plugins()
+    processes.ProductLibrary.scheduler = scheduler.PollScheduler(settings.poll_seconds,
+                                                                 settings.max_poll_seconds)
+    loaded: int = processes.ProductLibrary.load_database(db_conn)
+
+    if settings.shards > 1:
+        processes.ProductLibrary.start_shards(settings.chromium_path, settings.shards,
+                                              settings.shard_by, settings.pool_size,
+                                              settings.max_pages)
+    else:
+        processes.ProductLibrary.start_browser_pool(settings.chromium_path,
+                                                    settings.pool_size, settings.max_pages)
+
+    if settings.notify:
+        processes.ProductLibrary.notifier = Notifier([make_sink(spec) for spec in settings.notify],
+                                                     settings.notify_window)
+
+    processes.ProductLibrary.metrics_file = settings.metrics_file
+    processes.ProductLibrary.result_cache = ResultCache(settings.result_ttl)
+
+    if settings.dump_pages:
+        processes.ProductLibrary.page_dumper = PageDumper(settings.dump_pages,
+                                                          settings.dump_max_bytes)
+
+    if settings.api_port:
+        # Imported only when served, along with asyncio
+        if "pronotify" in __name__:
+            from pronotify.library.api import StatusServer # type: ignore
+        else:
+            from library.api import StatusServer
+
+        processes.ProductLibrary.api_server = StatusServer(processes.ProductLibrary,
+                                                           settings.db_name,
+                                                           settings.api_host,
+                                                           settings.api_port)
+        processes.ProductLibrary.api_server.start()
+
+    return loaded
+
+def check_once(db_conn: sqlite3.Connection,
+               chromium_path: str,
+               workers: int = processes.CHECK_WORKERS,
+               vendor_workers: int = processes.VENDOR_WORKERS,
+               pipeline: bool = False) -> None:
+    """Checks every product once, through the asyncio pipeline if
+    `pipeline` is set, and prints their status.
+    """
+    try:
+        if pipeline:
+            import asyncio
+
+            asyncio.run(processes.ProductLibrary.check_products_async(
+                chromium_path, workers, vendor_workers, db_conn=db_conn))
+        else:
+            processes.ProductLibrary.check_products(chromium_path, workers, vendor_workers)
+
+        processes.ProductLibrary.persist(db_conn)
+        print_status()
+
+    finally:
+        processes.ProductLibrary.shutdown()
@@ -0,0 +1,289 @@
+import sys
+import shutil
+import unicodedata
+
+from typing import Optional, TextIO
+from datetime import datetime as dt
+
+if "pronotify" in __name__:
+    from pronotify.library.emojis import ETIME, EGROUP, ECROSS, EVALID # type: ignore
+    from pronotify.library.store import ProductStore, ProductRecord # type: ignore
+else:
+    from library.emojis import ETIME, EGROUP, ECROSS, EVALID
+    from library.store import ProductStore, ProductRecord
+
+#######################################################################
+
+SORT_GROUP: str = "group"
+SORT_AVAILABILITY: str = "availability"
+SORT_PRICE: str = "price"
+
+SORT_KEYS: tuple[str, ...] = (SORT_GROUP, SORT_AVAILABILITY, SORT_PRICE)
+
+PROGRESS_WIDTH: int = 20
+
+CURRENCY_SYMBOLS: dict[str, str] = {
+    "EUR": "€",
+    "JPY": "¥"
+}
+
+# ANSI escape sequences
+_HOME: str = "\x1b[H"
+_CLEAR_SCREEN: str = "\x1b[2J"
+_CLEAR_LINE: str = "\x1b[K"
+_CLEAR_BELOW: str = "\x1b[J"
+_HIDE_CURSOR: str = "\x1b[?25l"
+_SHOW_CURSOR: str = "\x1b[?25h"
+
+def _move(row: int) -> str:
+    """Moves the cursor to the start of a row, counted from 0.
+    """
+    return f"\x1b[{row + 1};1H"
+
+def _char_width(char: str) -> int:
+    """Returns the terminal cells a character takes: 2 for wide ones, like
+    most emojis, 0 for combining marks and variation selectors.
+    """
+    if unicodedata.category(char) in ("Mn", "Me", "Cf"):
+        return 0
+
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+def fit_width(line: str, width: int) -> str:
+    """Cuts the line to the given number of terminal cells.
+    """
+    cells: int = 0
+
+    for index, char in enumerate(line):
+        cells += _char_width(char)
+        if cells > width:
+            return line[:index]
+
+    return line
+
+#######################################################################
+
+def format_price(record: ProductRecord) -> str:
+    currency: str = record.vendor.currency if record.vendor else "EUR"
+    symbol: str = CURRENCY_SYMBOLS.get(currency, f" {currency}")
+
+    return f"{record.price}{symbol}"
+
+def format_progress(name: str, done: int, total: int) -> str:
+    """Formats the progress of the checks of a vendor as a bar.
+    """
+    filled: int = PROGRESS_WIDTH * done // total if total else PROGRESS_WIDTH
+    bar: str = "#" * filled + "-" * (PROGRESS_WIDTH - filled)
+
+    return f"{name:<16} [{bar}] {done}/{total}"
+
+class Dashboard:
+    """Status screen of the products in memory.
+
+    On a terminal, the screen is drawn once and then only the rows that
+    changed are rewritten, moving the cursor with ANSI escape sequences.
+    Product rows are only formatted again when their status changes, and
+    progress updates only redraw the progress rows.
+    Otherwise, e.g. when the output is redirected, the whole screen is
+    printed again whenever something changed.
+
+    Products can be filtered by `group` and by availability, and sorted
+    within their group by availability or price.
+    """
+
+    def __init__(self,
+                 stream: TextIO = sys.stdout,
+                 group: Optional[str] = None,
+                 available_only: bool = False,
+                 sort: str = SORT_GROUP,
+                 ansi: Optional[bool] = None):
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}")
+
+        self.stream: TextIO = stream
+        self.group: Optional[str] = group or None
+        self.available_only: bool = available_only
+        self.sort: str = sort
+        self.ansi: bool = stream.isatty() if ansi is None else ansi
+
+        self._lines: list[str] = []
+        self._products: int = 0
+        self._rows: dict[int, tuple[tuple[bool, float, str], str]] = {}
+        self._started: bool = False
+
+    def records(self, store: ProductStore) -> list[ProductRecord]:
+        """Returns the records the filters may show, read from the group or
+        availability indexes of the store instead of visiting every product.
+        Available products are listed in the order they became available.
+        """
+        if self.group is not None:
+            return store.by_group(self.group)
+
+        if self.available_only:
+            return store.available()
+
+        return store.records()
+
+    def _select(self, records: list[ProductRecord]) -> list[ProductRecord]:
+        """Applies the filters and the sort order. Products keep their
+        insertion order when sorted by group.
+        """
+        selected: list[ProductRecord] = [
+            record for record in records
+            if (self.group is None or record.group == self.group)
+            and (not self.available_only or record.available)
+        ]
+
+        if self.sort == SORT_AVAILABILITY:
+            selected.sort(key=lambda record: not record.available)
+        elif self.sort == SORT_PRICE:
+            # Unknown prices go last
+            selected.sort(key=lambda record: (record.price < 0, record.price))
+
+        return selected
+
+    def _row(self, record: ProductRecord, rows: dict) -> str:
+        """Returns the row of a product, formatted again only if its status
+        changed since it was last drawn, and keeps it in `rows`.
+        """
+        key: tuple[bool, float, str] = (record.available, record.price, record.url)
+        cached: Optional[tuple[tuple[bool, float, str], str]] = self._rows.get(record.id)
+
+        if cached is None or cached[0] != key:
+            availability: str = EVALID if record.available else ECROSS
+            cached = (key, f"{availability} {format_price(record):>12}  {record.url}")
+
+        rows[record.id] = cached
+        return cached[1]
+
+    def _build_products(self,
+                        records: list[ProductRecord],
+                        updated: Optional[dt] = None) -> list[str]:
+        """Builds the rows above the progress: the update time and the
+        products of each group.
+        """
+        lines: list[str] = [f"{ETIME} Last Update {updated or '-'} {ETIME}", ""]
+        # Rows of products not shown anymore are dropped
+        rows: dict[int, tuple[tuple[bool, float, str], str]] = {}
+
+        # Groups keep their order whatever the products are sorted by
+        groups: dict[str, list[ProductRecord]] = {record.group: [] for record in records}
+        for record in self._select(records):
+            groups.setdefault(record.group, []).append(record)
+
+        for group, group_records in groups.items():
+            if not group_records:
+                continue
+
+            lines.append(f"{EGROUP} {group} {EGROUP}")
+            lines.append("")
+            lines.extend(self._row(record, rows) for record in group_records)
+            lines.append("")
+
+        self._rows = rows
+        return lines
+
+    @staticmethod
+    def _build_footer(progress: Optional[dict[str, tuple[int, int]]] = None) -> list[str]:
+        """Builds the rows under the products: the progress and controls.
+        """
+        lines: list[str] = []
+
+        if progress:
+            lines.append("++ Checking ++")
+            for name, (done, total) in progress.items():
+                lines.append(format_progress(name, done, total))
+            lines.append("")
+
+        lines.append("++ Control ++")
+        lines.append("Please, hit Ctrl+C in case you want to stop monitoring...")
+
+        return lines
+
+    def build(self,
+              records: list[ProductRecord],
+              updated: Optional[dt] = None,
+              progress: Optional[dict[str, tuple[int, int]]] = None) -> list[str]:
+        """Builds the rows of the screen.
+
+        `progress` maps each vendor with checks running to the number of
+        checks done and queued in the current cycle.
+        """
+        return self._build_products(records, updated) + self._build_footer(progress)
+
+    @property
+    def drawn(self) -> bool:
+        """Checks if the products were drawn, so progress can be shown under
+        them.
+        """
+        return bool(self._lines)
+
+    def render(self,
+               records: list[ProductRecord],
+               updated: Optional[dt] = None,
+               progress: Optional[dict[str, tuple[int, int]]] = None) -> None:
+        """Draws the screen, writing only what changed since the last time.
+        Without ANSI support, progress is not shown, so the screen is not
+        printed again after every check.
+        """
+        products: list[str] = self._build_products(records, updated)
+        lines: list[str] = products + self._build_footer(progress if self.ansi else None)
+
+        if self.ansi:
+            self._draw_changes(lines)
+        elif lines != self._lines:
+            self.stream.write("\n".join(lines) + "\n\n")
+            self.stream.flush()
+
+        self._lines = lines
+        self._products = len(products)
+
+    def render_progress(self, progress: Optional[dict[str, tuple[int, int]]]) -> None:
+        """Draws the progress of the current cycle under the products drawn
+        last, without visiting the products again. Does nothing without
+        ANSI support.
+        """
+        if not self.ansi:
+            return
+
+        lines: list[str] = self._lines[:self._products] + self._build_footer(progress)
+        self._draw_changes(lines, self._products)
+        self._lines = lines
+
+    def _draw_changes(self, lines: list[str], start: int = 0) -> None:
+        """Writes the rows that changed, comparing them from the `start` row
+        on, as the ones before it are known to be unchanged.
+        """
+        width: int = shutil.get_terminal_size().columns
+        output: list[str] = []
+        previous: list[str] = self._lines
+
+        if not self._started:
+            output.append(_HIDE_CURSOR + _CLEAR_SCREEN + _HOME)
+            previous = []
+            start = 0
+            self._started = True
+
+        for row in range(start, len(lines)):
+            line: str = lines[row]
+            if row >= len(previous) or previous[row] != line:
+                # Rows longer than the terminal would wrap and shift the next ones
+                output.append(_move(row) + fit_width(line, width - 1) + _CLEAR_LINE)
+
+        if len(lines) < len(previous):
+            output.append(_move(len(lines)) + _CLEAR_BELOW)
+
+        if output:
+            self.stream.write("".join(output))
+            self.stream.flush()
+
+    def close(self) -> None:
+        """Leaves the cursor under the screen, visible again.
+        """
+        if self.ansi and self._started:
+            self.stream.write(_move(len(self._lines)) + _SHOW_CURSOR)
+            self.stream.flush()
+
+        self._started = False
+        self._lines = []
+        self._products = 0
@@ -1,13 +1,25 @@
+import os
+import csv
+import json
 import logging
 import sqlite3
 
-from typing import Optional
+from typing import Callable, Optional
+from urllib.parse import urlparse
 
 #######################################################################
 
+def _hostname(url: str) -> str:
+    """Returns the lowercase hostname of the given URL, without `www.`.
+    """
+    host: str = (urlparse(url).hostname or "").lower()
+
+    return host[4:] if host.startswith("www.") else host
+
 def _create_products_table(con: sqlite3.Connection):
-    """Creates the table for consolidated data.
-    If the table already exists, then nothing is done.
+    """Creates the table for consolidated data, and its indexes.
+    If the table already exists, then only missing columns and indexes
+    are added.
     """
 
     tb_exists: str = (
@@ -24,54 +36,276 @@ def _create_products_table(con: sqlite3.Connection):
             (ID INTEGER PRIMARY KEY,
             URL            TEXT    NOT NULL,
             PRODUCT_GROUP  TEXT    NOT NULL,
-            TIMESTAMP      DATETIME DEFAULT CURRENT_TIMESTAMP);''')
+            TIMESTAMP      DATETIME DEFAULT CURRENT_TIMESTAMP,
+            HOSTNAME       TEXT    NOT NULL DEFAULT '');''')
 
         logging.info("Table 'products' created!")
 
-#######################################################################
+    columns: list[str] = [row[1] for row in con.execute("PRAGMA table_info(products)")]
+
+    if "HOSTNAME" not in columns:
+
+        logging.info("Column 'products.HOSTNAME' not detected!")
 
-def _execute_non_reader_query(con: sqlite3.Connection, query: str) -> int:
-    """Execute a non-reader query that returns an `int` value indicating
-    if the execution was successful.
+        # Committed along with the migration running it
+        con.execute("ALTER TABLE products ADD COLUMN HOSTNAME TEXT NOT NULL DEFAULT ''")
+        con.executemany("UPDATE products SET HOSTNAME = ? WHERE ID = ?",
+                        [(_hostname(url), product_id) for product_id, url
+                         in con.execute("SELECT ID, URL FROM products")])
 
-    If the command executed was an `update`, then the returned value
-    indicates the number of rows that have been updated.
+        logging.info("Column 'products.HOSTNAME' added!")
+
+    con.execute("CREATE INDEX IF NOT EXISTS idx_products_url ON products (URL)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_products_group ON products (PRODUCT_GROUP)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_products_hostname ON products (HOSTNAME)")
+
+def _create_fetch_cache_table(con: sqlite3.Connection):
+    """Creates the table for the per URL fetch cache, which keeps the HTTP
+    validators, the hash of the parsed page regions and the last result.
+    If the table already exists, then nothing is done.
     """
-    result: int = 1
 
-    try:
+    tb_exists: str = (
+        "SELECT name FROM sqlite_master "
+        "WHERE type='table' "
+        "AND name='fetch_cache'"
+    )
 
-        con.execute(query)
+    if not con.execute(tb_exists).fetchone():
+
+        logging.info("Table 'fetch_cache' not detected!")
+
+        con.execute('''CREATE TABLE fetch_cache
+            (URL            TEXT    PRIMARY KEY,
+            ETAG           TEXT,
+            LAST_MODIFIED  TEXT,
+            REGION_HASH    TEXT,
+            AVAILABLE      INTEGER NOT NULL,
+            PRICE          REAL    NOT NULL,
+            TIMESTAMP      DATETIME DEFAULT CURRENT_TIMESTAMP);''')
 
-        commit_commands: list[str] = [
-            "insert",
-            "update",
-            "delete"
-        ]
+        logging.info("Table 'fetch_cache' created!")
 
-        if query.split(" ")[0].lower() in commit_commands:
+def _create_checks_table(con: sqlite3.Connection):
+    """Creates the table for the price and availability history. Each row is
+    a change-point: the first and last time a product was seen with the
+    same availability and price. If the table already exists, then nothing
+    is done.
+    """
+
+    tb_exists: str = (
+        "SELECT name FROM sqlite_master "
+        "WHERE type='table' "
+        "AND name='checks'"
+    )
+
+    if not con.execute(tb_exists).fetchone():
+
+        logging.info("Table 'checks' not detected!")
+
+        con.execute('''CREATE TABLE checks
+            (ID INTEGER PRIMARY KEY,
+            PRODUCT_ID     INTEGER NOT NULL,
+            AVAILABLE      INTEGER NOT NULL,
+            PRICE          REAL    NOT NULL,
+            TIMESTAMP      DATETIME NOT NULL,
+            LAST_SEEN      DATETIME NOT NULL);''')
+
+        con.execute('''CREATE INDEX idx_checks_product_timestamp
+            ON checks (PRODUCT_ID, TIMESTAMP);''')
+
+        logging.info("Table 'checks' created!")
+
+#######################################################################
+
+def _migrate_base_tables(con: sqlite3.Connection) -> None:
+    """Version 1: products, fetch cache and checks tables. Databases created
+    before schema versions get their missing columns and indexes.
+    """
+    _create_products_table(con)
+    _create_fetch_cache_table(con)
+    _create_checks_table(con)
+
+def _migrate_product_metadata(con: sqlite3.Connection) -> None:
+    """Version 2: target price, currency, vendor, last status and next check
+    time of each product, so deals and due products can be queried without
+    loading every product. The last status is filled in from the checks
+    table; vendors and currencies by the library, when it loads them.
+    """
+    columns: list[str] = [row[1] for row in con.execute("PRAGMA table_info(products)")]
+
+    for column, definition in (("TARGET_PRICE", "REAL NOT NULL DEFAULT 0"),
+                               ("CURRENCY", "TEXT NOT NULL DEFAULT ''"),
+                               ("VENDOR", "TEXT NOT NULL DEFAULT ''"),
+                               ("AVAILABLE", "INTEGER"),
+                               ("PRICE", "REAL"),
+                               ("LAST_CHECK", "DATETIME"),
+                               ("NEXT_CHECK", "DATETIME")):
+        if column not in columns:
+            con.execute(f"ALTER TABLE products ADD COLUMN {column} {definition}")
+
+    con.execute('''UPDATE products SET (AVAILABLE, PRICE, LAST_CHECK) = (
+            SELECT c.AVAILABLE, c.PRICE, c.LAST_SEEN FROM checks c
+            WHERE c.PRODUCT_ID = products.ID
+            ORDER BY c.ID DESC LIMIT 1)
+        WHERE EXISTS (SELECT 1 FROM checks c WHERE c.PRODUCT_ID = products.ID);''')
+
+    con.execute("CREATE INDEX IF NOT EXISTS idx_products_vendor ON products (VENDOR)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_products_next_check ON products (NEXT_CHECK)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_products_deals "
+                "ON products (AVAILABLE, TARGET_PRICE, PRICE)")
+
+def _migrate_product_indexes(con: sqlite3.Connection) -> None:
+    """Version 3: indexes on the currency and target price of products.
+    """
+    con.execute("CREATE INDEX IF NOT EXISTS idx_products_currency ON products (CURRENCY)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_products_target_price ON products (TARGET_PRICE)")
+
+def _merge_products(con: sqlite3.Connection, merged: list[tuple[int, int]]) -> None:
+    """Merges each duplicate product into the one kept, in the transaction
+    of the caller: the checks of the duplicate are moved to the kept one,
+    which takes its target price, vendor and currency if it had none, and
+    its last status if it's more recent. Then the duplicate is removed.
+
+    Parameters:
+    - A `list` of `tuple` with 2 elements: ID of the duplicate and ID of
+    the product kept.
+    """
+    for duplicate_id, kept_id in merged:
+        con.execute("UPDATE checks SET PRODUCT_ID = ? WHERE PRODUCT_ID = ?",
+                    (kept_id, duplicate_id))
+
+        con.execute('''UPDATE products SET
+                (TARGET_PRICE, CURRENCY, VENDOR, AVAILABLE, PRICE, LAST_CHECK, NEXT_CHECK) = (
+                SELECT
+                    CASE WHEN products.TARGET_PRICE > 0 THEN products.TARGET_PRICE
+                         ELSE d.TARGET_PRICE END,
+                    CASE WHEN products.CURRENCY != '' THEN products.CURRENCY
+                         ELSE d.CURRENCY END,
+                    CASE WHEN products.VENDOR != '' THEN products.VENDOR
+                         ELSE d.VENDOR END,
+                    CASE WHEN d.LAST_CHECK > COALESCE(products.LAST_CHECK, '')
+                         THEN d.AVAILABLE ELSE products.AVAILABLE END,
+                    CASE WHEN d.LAST_CHECK > COALESCE(products.LAST_CHECK, '')
+                         THEN d.PRICE ELSE products.PRICE END,
+                    CASE WHEN d.LAST_CHECK > COALESCE(products.LAST_CHECK, '')
+                         THEN d.LAST_CHECK ELSE products.LAST_CHECK END,
+                    COALESCE(products.NEXT_CHECK, d.NEXT_CHECK)
+                FROM products d WHERE d.ID = ?)
+            WHERE ID = ?''', (duplicate_id, kept_id))
+
+        con.execute("DELETE FROM products WHERE ID = ?", (duplicate_id,))
+
+def _migrate_unique_products(con: sqlite3.Connection) -> None:
+    """Version 4: a product is stored once per group. Duplicates, e.g. of a
+    watchlist imported twice, are merged into the oldest one.
+    """
+    merged: list[tuple[int, int]] = con.execute(
+        "SELECT p.ID, k.KEPT_ID FROM products p JOIN "
+        "(SELECT URL, PRODUCT_GROUP, MIN(ID) AS KEPT_ID FROM products "
+        "GROUP BY URL, PRODUCT_GROUP) k "
+        "ON p.URL = k.URL AND p.PRODUCT_GROUP IS k.PRODUCT_GROUP "
+        "WHERE p.ID != k.KEPT_ID ORDER BY p.ID").fetchall()
+
+    _merge_products(con, merged)
+
+    con.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_products_url_group "
+                "ON products (URL, PRODUCT_GROUP)")
+
+# Schema migrations: the `i`th one takes the database to version `i + 1`.
+# Only append new ones, as the version reached is stored in the database
+MIGRATIONS: tuple[Callable[[sqlite3.Connection], None], ...] = (
+    _migrate_base_tables,
+    _migrate_product_metadata,
+    _migrate_product_indexes,
+    _migrate_unique_products,
+)
+
+SCHEMA_VERSION: int = len(MIGRATIONS)
+
+def _setup_schema(con: sqlite3.Connection) -> None:
+    """Upgrades the database in place, running the migrations after its
+    version, stored in `PRAGMA user_version`. Each one is committed along
+    with its new version. Up to date databases are only asked for their
+    version, so it's done once and not on every connection.
+    """
+    version: int = con.execute("PRAGMA user_version").fetchone()[0]
+
+    if version > SCHEMA_VERSION:
+        logging.warning(f"Database schema version {version} is newer than "
+                        + f"the supported one, {SCHEMA_VERSION}")
+
+    while version < SCHEMA_VERSION:
+        migration = MIGRATIONS[version]
+
+        try:
+            con.execute("BEGIN")
+            migration(con)
+            con.execute(f"PRAGMA user_version = {version + 1}")
             con.commit()
 
-        if query.split(" ")[0].lower() == "update":
-            result = con.total_changes
+        except Exception:
+            con.rollback()
+            logging.error(f"Database migration to version {version + 1} failed")
+            raise
+
+        version += 1
+        logging.info(f"Database schema upgraded to version {version}: {migration.__name__}")
+
+#######################################################################
+
+def _execute_non_reader_query(con: sqlite3.Connection,
+                              query: str,
+                              params: tuple = ()) -> int:
+    """Execute a non-reader query with the given bound parameters, in its
+    own transaction.
+
+    Returns:
+    - An `int` with the number of rows affected, 0 if the query failed
+    """
+    result: int = 0
+
+    try:
+        with con:
+            result = con.execute(query, params).rowcount
 
     except Exception as e:
-        result = 0
         logging.warning(f"Couldn't execute non-reader query: \"{query}\"")
         logging.info(e)
 
     return result
 
-def _execute_reader_query(con: sqlite3.Connection, query: str) -> list:
-    """Execute a reader query that returns a `list` with the query
-    response.
+def _execute_many(con: sqlite3.Connection, query: str, rows: list) -> int:
+    """Execute a non-reader query once per row of bound parameters, all of
+    them in a single transaction.
+
+    Returns:
+    - An `int` with the number of rows affected, -1 if the query failed
+    and the transaction was rolled back
     """
-    cursor: sqlite3.Cursor = con.execute(query)
+    result: int = -1
+
+    try:
+        with con:
+            result = con.executemany(query, rows).rowcount
+
+    except Exception as e:
+        logging.warning(f"Couldn't execute query for {len(rows)} rows: \"{query}\"")
+        logging.info(e)
+
+    return result
+
+def _execute_reader_query(con: sqlite3.Connection,
+                          query: str,
+                          params: tuple = ()) -> list:
+    """Execute a reader query with the given bound parameters, that returns
+    a `list` with the query response.
+    """
+    cursor: sqlite3.Cursor = con.execute(query, params)
     rows: list = cursor.fetchall()
 
     return rows
 
-
 #######################################################################
 
 def open_database(db_file: str) -> Optional[sqlite3.Connection]:
@@ -81,49 +315,119 @@ def open_database(db_file: str) -> Optional[sqlite3.Connection]:
     - A `str` with the filename of the database without extension
 
     Returns:
-    - A `sqlite3.Connection` with the connection for the database
+    - A `sqlite3.Connection` with the connection for the database, `None`
+    if it couldn't be opened or its schema upgraded
     """
     filepath: str = f"./data/{db_file}.db"
     con: Optional[sqlite3.Connection] = None
 
     try:
-        con = sqlite3.connect(filepath)
-        _create_products_table(con)
+        # The check pipeline writes from a thread of its own, never while
+        # another thread uses the connection
+        con = sqlite3.connect(filepath, check_same_thread=False)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        _setup_schema(con)
 
     except Exception as e:
         logging.warning("Couldn't connect to the specified database" + \
                         f" \"{db_file}\"")
         logging.info(e)
 
+        # A schema left at an older version is not used
+        if con is not None:
+            con.close()
+            con = None
+
     return con
 
-def insert_product(con: sqlite3.Connection, data_tuple: tuple) -> bool:
+def insert_product(con: sqlite3.Connection, data_tuple: tuple) -> Optional[int]:
     """Inserts the given data tuple into the products table.
 
     Parameters:
-    - A `tuple` with 2 elements to be inserted into the table.
+    - A `tuple` with 2 elements to be inserted into the table: URL and group.
 
     Returns:
-    - A `bool` indicating if the insertion was accomplished (true)
+    - An `int` with the ID of the inserted product, `None` if the insertion
+    was not accomplished
     """
-    result: bool = True
+    result: Optional[int] = None
 
     if len(data_tuple) != 2:
-        result = False
         logging.warning(f"product data was not length 2 but {len(data_tuple)}")
     else:
-        query = "INSERT INTO products(" + \
-                "URL, PRODUCT_GROUP) VALUES " + \
-                "(\"" + '","'.join(str(i) for i in data_tuple) + "\")"
-        result = (1 == _execute_non_reader_query(con, query))
+        query = (
+            "INSERT INTO products(URL, PRODUCT_GROUP, HOSTNAME) "
+            "VALUES (?, ?, ?)"
+        )
+        url, group = data_tuple
+
+        try:
+            with con:
+                result = con.execute(query, (url, group, _hostname(url))).lastrowid
+
+        except Exception as e:
+            logging.warning(f"Couldn't insert product: {url}")
+            logging.info(e)
 
     return result
 
+def insert_products(con: sqlite3.Connection, data_tuples: list[tuple]) -> int:
+    """Inserts the given data tuples into the products table, all of them
+    in a single transaction. Products already in their group are skipped.
+
+    Parameters:
+    - A `list` of `tuple` with 2 or 3 elements: URL, group and, optionally,
+    target price.
+
+    Returns:
+    - An `int` with the number of products inserted, -1 if the insertion
+    failed
+    """
+    query = (
+        "INSERT OR IGNORE INTO products(URL, PRODUCT_GROUP, HOSTNAME, TARGET_PRICE) "
+        "VALUES (?, ?, ?, ?)"
+    )
+
+    return _execute_many(con, query,
+                         [(url, group, _hostname(url), max(0.0, target_price))
+                          for url, group, target_price
+                          in ((*row, 0.0)[:3] for row in data_tuples)])
+
+def update_product_urls(con: sqlite3.Connection,
+                        data_tuples: list[tuple],
+                        merged: Optional[list[tuple[int, int]]] = None) -> bool:
+    """Changes the URL of the given products, after merging the `merged`
+    duplicates, e.g. the ones the new URLs would duplicate, into the
+    products kept, all of it in a single transaction.
+
+    Parameters:
+    - A `list` of `tuple` with 2 elements: new URL and product ID.
+    - A `list` of `tuple` with 2 elements: ID of the duplicate and ID of
+    the product kept.
+
+    Returns:
+    - A `bool` indicating if the products were updated (true)
+    """
+    try:
+        with con:
+            _merge_products(con, merged or [])
+            con.executemany("UPDATE products SET URL = ?, HOSTNAME = ? WHERE ID = ?",
+                            [(url, _hostname(url), product_id)
+                             for url, product_id in data_tuples])
+
+    except Exception as e:
+        logging.warning(f"Couldn't update the URL of {len(data_tuples)} products")
+        logging.info(e)
+        return False
+
+    return True
+
 def remove_product(con: sqlite3.Connection, data_tuple: tuple) -> bool:
-    """Removes the given data tuple into the products table.
+    """Removes the given data tuple from the products table.
 
     Parameters:
-    - A `tuple` with 2 elements to be removed from the table.
+    - A `tuple` with 2 elements to be removed from the table: URL and group.
 
     Returns:
     - A `bool` indicating if the removal was accomplished (true)
@@ -134,73 +438,361 @@ def remove_product(con: sqlite3.Connection, data_tuple: tuple) -> bool:
         result = False
         logging.warning(f"product data was not length 2 but {len(data_tuple)}")
     else:
-        query = "DELETE FROM products WHERE " + \
-                f"URL = \"{data_tuple[0]}\" " + \
-                f"AND PRODUCT_GROUP = \"{data_tuple[1]}\""
-        result = (1 == _execute_non_reader_query(con, query))
+        query = "DELETE FROM products WHERE URL = ? AND PRODUCT_GROUP = ?"
+        result = (0 < _execute_non_reader_query(con, query, tuple(data_tuple)))
 
     return result
 
-def read_products_by_group(con: sqlite3.Connection, group: str) -> Optional[list]:
-    """Queries the products table by group.
+def remove_product_by_id(con: sqlite3.Connection, product_id: int) -> bool:
+    """Removes the product with the given ID from the products table.
+
+    Returns:
+    - A `bool` indicating if the removal was accomplished (true)
+    """
+    query = "DELETE FROM products WHERE ID = ?"
+
+    return 0 < _execute_non_reader_query(con, query, (product_id,))
+
+def read_products(con: sqlite3.Connection) -> Optional[list]:
+    """Queries the products table and retrieves the products,
+    ordered by insertion time.
     """
     result: Optional[list] = None
 
-    query:str = (
+    query = (
         "SELECT ID, URL, PRODUCT_GROUP "
         " FROM products"
-        f" WHERE PRODUCT_GROUP=\"{group}\""
+        " ORDER BY ID"
     )
 
     try:
         result = _execute_reader_query(con, query)
 
     except Exception as e:
-        logging.warning(f"Couldn't retrieve data for the given group: {group}")
+        logging.warning(f"Couldn't retrieve data for products table")
         logging.info(e)
 
     return result
 
-def read_products_by_vendor(con: sqlite3.Connection, vendor: str) -> Optional[list]:
-    """Queries the products table by vendor, that should be present in the URL.
+def read_products_metadata(con: sqlite3.Connection) -> Optional[list]:
+    """Queries the products table for what is known of each product besides
+    its URL and group.
+
+    Returns:
+    - A `list` of `tuple` with ID, vendor, currency, target price, last
+    availability and price (`None` if never checked) and next check time
     """
     result: Optional[list] = None
 
     query = (
-        "SELECT ID, URL, PRODUCT_GROUP "
+        "SELECT ID, VENDOR, CURRENCY, TARGET_PRICE, AVAILABLE, PRICE, NEXT_CHECK "
         " FROM products"
-        f" WHERE LOCATE({vendor.lower()}, URL) > 0"
+        " ORDER BY ID"
     )
 
     try:
         result = _execute_reader_query(con, query)
 
     except Exception as e:
-        logging.warning(f"Couldn't get data for the given vendor: {vendor}")
+        logging.warning(f"Couldn't retrieve metadata of products")
         logging.info(e)
 
     return result
 
-def read_products(con: sqlite3.Connection) -> Optional[list]:
-    """Queries the products table and retrieves the products,
-    ordered by insertion time.
+def read_deals(con: sqlite3.Connection) -> Optional[list]:
+    """Queries the products last seen available at or under their target
+    price.
+
+    Returns:
+    - A `list` of `tuple` with ID, URL, group, price, target price and
+    currency
     """
     result: Optional[list] = None
 
     query = (
-        "SELECT ID, URL, PRODUCT_GROUP " + \
+        "SELECT ID, URL, PRODUCT_GROUP, PRICE, TARGET_PRICE, CURRENCY "
         " FROM products"
+        " WHERE AVAILABLE = 1 AND TARGET_PRICE > 0"
+        " AND PRICE > 0 AND PRICE <= TARGET_PRICE"
+        " ORDER BY PRODUCT_GROUP, ID"
     )
 
     try:
         result = _execute_reader_query(con, query)
 
     except Exception as e:
-        logging.warning(f"Couldn't retrieve data for products table")
+        logging.warning(f"Couldn't retrieve deals")
         logging.info(e)
 
     return result
 
+def update_product_vendors(con: sqlite3.Connection, data_tuples: list[tuple]) -> int:
+    """Sets the resolved vendor of the given products, all of them in a
+    single transaction.
+
+    Parameters:
+    - A `list` of `tuple` with 3 elements: vendor name, currency and
+    product ID.
+
+    Returns:
+    - An `int` with the number of products updated, -1 if none was
+    """
+    query = "UPDATE products SET VENDOR = ?, CURRENCY = ? WHERE ID = ?"
+
+    return _execute_many(con, query, data_tuples)
+
+def set_target_price(con: sqlite3.Connection, product_id: int, price: float) -> bool:
+    """Sets the target price of a product, 0 to have none.
+
+    Returns:
+    - A `bool` indicating if the product was updated (true)
+    """
+    query = "UPDATE products SET TARGET_PRICE = ? WHERE ID = ?"
+
+    return 0 < _execute_non_reader_query(con, query, (max(0.0, price), product_id))
+
+def save_product_status(con: sqlite3.Connection, data_tuples: list[tuple]) -> bool:
+    """Saves the last status and next check time of the given products, all
+    of them in a single transaction.
+
+    Parameters:
+    - A `list` of `tuple` with 5 elements: availability, price, last check
+    time, next check time and product ID.
+
+    Returns:
+    - A `bool` indicating if the products were updated (true)
+    """
+    if not data_tuples:
+        return True
+
+    query = (
+        "UPDATE products SET AVAILABLE = ?, PRICE = ?, LAST_CHECK = ?, NEXT_CHECK = ? "
+        "WHERE ID = ?"
+    )
+
+    if _execute_many(con, query, data_tuples) < 0:
+        logging.warning(f"Couldn't save the status of {len(data_tuples)} products")
+        return False
+
+    return True
+
+def read_fetch_cache(con: sqlite3.Connection) -> Optional[list]:
+    """Queries the fetch cache table and retrieves all its entries.
+    """
+    result: Optional[list] = None
+
+    query = (
+        "SELECT URL, ETAG, LAST_MODIFIED, REGION_HASH, AVAILABLE, PRICE "
+        " FROM fetch_cache"
+    )
+
+    try:
+        result = _execute_reader_query(con, query)
+
+    except Exception as e:
+        logging.warning(f"Couldn't retrieve data for fetch_cache table")
+        logging.info(e)
+
+    return result
+
+def save_fetch_cache(con: sqlite3.Connection, rows: list[tuple]) -> bool:
+    """Inserts or replaces the given fetch cache entries, all of them in a
+    single transaction.
+
+    Parameters:
+    - A `list` of `tuple` with 6 elements: URL, ETag, Last-Modified, region
+    hash, availability and price.
+
+    Returns:
+    - A `bool` indicating if the entries were saved (true)
+    """
+    result: bool = True
+
+    if not rows:
+        return result
+
+    query = (
+        "INSERT OR REPLACE INTO fetch_cache("
+        "URL, ETAG, LAST_MODIFIED, REGION_HASH, AVAILABLE, PRICE) "
+        "VALUES (?, ?, ?, ?, ?, ?)"
+    )
+
+    if _execute_many(con, query, rows) < 0:
+        result = False
+        logging.warning(f"Couldn't save {len(rows)} fetch cache entries")
+
+    return result
+
+def read_last_checks(con: sqlite3.Connection) -> Optional[list]:
+    """Queries the checks table for the last availability and price seen of
+    each product.
+    """
+    result: Optional[list] = None
+
+    query = (
+        "SELECT c.PRODUCT_ID, c.AVAILABLE, c.PRICE "
+        " FROM checks c"
+        " JOIN (SELECT MAX(ID) AS ID FROM checks GROUP BY PRODUCT_ID) last"
+        " ON c.ID = last.ID"
+    )
+
+    try:
+        result = _execute_reader_query(con, query)
+
+    except Exception as e:
+        logging.warning(f"Couldn't retrieve last checks")
+        logging.info(e)
+
+    return result
+
+def read_checks(con: sqlite3.Connection,
+                product_id: int,
+                since: str = "",
+                limit: int = 1000) -> Optional[list]:
+    """Queries the history of a product, newest first.
+
+    Parameters:
+    - An `int` with the product ID
+    - A `str` with the oldest timestamp to retrieve, `YYYY-MM-DD HH:MM:SS`
+    - An `int` with the maximum number of change-points to retrieve
+
+    Returns:
+    - A `list` of `tuple` with availability, price, the first and the last
+    time they were seen
+    """
+    result: Optional[list] = None
+
+    query = (
+        "SELECT AVAILABLE, PRICE, TIMESTAMP, LAST_SEEN "
+        " FROM checks"
+        " WHERE PRODUCT_ID = ? AND LAST_SEEN >= ?"
+        " ORDER BY TIMESTAMP DESC, ID DESC"
+        " LIMIT ?"
+    )
+
+    try:
+        result = _execute_reader_query(con, query, (product_id, since, limit))
+
+    except Exception as e:
+        logging.warning(f"Couldn't retrieve history for product {product_id}")
+        logging.info(e)
+
+    return result
+
+def save_checks(con: sqlite3.Connection,
+                inserts: list[tuple],
+                updates: list[tuple]) -> bool:
+    """Saves a batch of check results, all of them in a single transaction.
+
+    Parameters:
+    - A `list` of `tuple` with the new change-points: product ID,
+    availability, price and timestamp
+    - A `list` of `tuple` extending the last change-point of a product:
+    timestamp and product ID
+
+    Returns:
+    - A `bool` indicating if the batch was saved (true)
+    """
+    result: bool = True
+
+    if not inserts and not updates:
+        return result
+
+    insert_query = (
+        "INSERT INTO checks(PRODUCT_ID, AVAILABLE, PRICE, TIMESTAMP, LAST_SEEN) "
+        "VALUES (?, ?, ?, ?, ?)"
+    )
+    update_query = (
+        "UPDATE checks SET LAST_SEEN = ? "
+        "WHERE ID = (SELECT MAX(ID) FROM checks WHERE PRODUCT_ID = ?)"
+    )
+
+    try:
+        with con:
+            con.executemany(insert_query,
+                            [(pid, av, pr, ts, ts) for pid, av, pr, ts in inserts])
+            con.executemany(update_query, updates)
+
+    except Exception as e:
+        result = False
+        logging.warning(f"Couldn't save {len(inserts) + len(updates)} checks")
+        logging.info(e)
+
+    return result
+
+def import_products(con: sqlite3.Connection,
+                    path: str,
+                    normalize: Optional[Callable[[str], str]] = None) -> int:
+    """Imports a watchlist into the products table, in a single transaction.
+
+    Parameters:
+    - A `str` with the path of the watchlist: a `.json` file with a list of
+    objects with `url`, `group` and, optionally, `target_price` keys, or a
+    `.csv` file with those columns.
+    - A function applied to each URL before it's stored, if given.
+
+    Products already in their group are skipped.
+
+    Returns:
+    - An `int` with the number of products imported, -1 if it failed
+    """
+    rows: list[tuple] = []
+
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            if os.path.splitext(path)[1].lower() == ".json":
+                items: list = json.load(f)
+            else:
+                items = list(csv.DictReader(f))
+
+        for item in items:
+            if item.get("url"):
+                url: str = item["url"].strip()
+                rows.append((normalize(url) if normalize else url,
+                             (item.get("group") or "").strip(),
+                             float(item.get("target_price") or 0)))
+
+    except Exception as e:
+        logging.warning(f"Couldn't read watchlist \"{path}\"")
+        logging.info(e)
+        return -1
+
+    return insert_products(con, rows)
+
+def export_products(con: sqlite3.Connection, path: str) -> int:
+    """Exports the products table as a watchlist, in the format given by the
+    file extension: `.json` or `.csv`.
+
+    Returns:
+    - An `int` with the number of products exported, -1 if it failed
+    """
+    products: Optional[list] = read_products(con)
+    metadata: Optional[list] = read_products_metadata(con)
+
+    if products is None or metadata is None:
+        return -1
+
+    target_prices: dict[int, float] = {row[0]: row[3] for row in metadata}
+    items: list[dict] = [{"url": url, "group": group,
+                          "target_price": target_prices.get(product_id, 0.0)}
+                         for product_id, url, group in products]
+
+    try:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            if os.path.splitext(path)[1].lower() == ".json":
+                json.dump(items, f, indent=2)
+            else:
+                writer = csv.DictWriter(f, fieldnames=["url", "group", "target_price"])
+                writer.writeheader()
+                writer.writerows(items)
+
+    except Exception as e:
+        logging.warning(f"Couldn't write watchlist \"{path}\"")
+        logging.info(e)
+        return -1
+
+    return len(items)
+
 def close_database(con: sqlite3.Connection):
     """Close the given database connection
     """
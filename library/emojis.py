@@ -1,6 +1,9 @@
+import emoji
 
-ETIME: str = ":alarm_clock:"
-EGROUP: str = ":bell:"
+# Resolved once at import time, so they can be printed as they are
 
-ECROSS: str = ":cross_mark:"
-EVALID: str = ":check_mark_button:"
\ No newline at end of file
+ETIME: str = emoji.emojize(":alarm_clock:")
+EGROUP: str = emoji.emojize(":bell:")
+
+ECROSS: str = emoji.emojize(":cross_mark:")
+EVALID: str = emoji.emojize(":check_mark_button:")
@@ -0,0 +1,43 @@
+import importlib.util
+
+from typing import Any, Optional, TYPE_CHECKING
+
+# bs4 is only imported once the first page is parsed
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, SoupStrainer
+
+#######################################################################
+
+# `lxml` is optional, but several times faster than the pure Python parser
+PARSER: str = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+#######################################################################
+
+def make_strainer(targets: Any) -> "SoupStrainer":
+    """Builds a `SoupStrainer` from the arguments of its constructor, e.g.
+    `("div", {"class": "price"})`. A `SoupStrainer` is returned as it is.
+    """
+    from bs4 import SoupStrainer
+
+    if isinstance(targets, SoupStrainer):
+        return targets
+
+    return SoupStrainer(*targets)
+
+def make_soup(page: str,
+              targets: Optional["SoupStrainer"] = None,
+              parser: str = PARSER) -> "BeautifulSoup":
+    """Parses the given page into a `BeautifulSoup` tree.
+
+    Parameters:
+    - A `str` with the page content
+    - A `SoupStrainer` with the only elements to be kept in the tree, with
+    all their descendants. If `None`, the whole page is kept.
+    - A `str` with the parser backend, by default the fastest one installed
+
+    Returns:
+    - A `BeautifulSoup` with the (partial) page tree
+    """
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(page, parser, parse_only=targets)
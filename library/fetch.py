@@ -0,0 +1,144 @@
+import logging
+import threading
+
+from typing import Optional, TypedDict, TYPE_CHECKING
+
+# requests is only imported by the first HTTP fetch
+if TYPE_CHECKING:
+    import requests
+
+#######################################################################
+
+FETCH_HTTP: str = "http"
+FETCH_BROWSER: str = "browser"
+FETCH_AUTO: str = "auto"
+
+HTTP_TIMEOUT: float = 10.0
+HTTP_POOL_SIZE: int = 16
+
+HEADERS: dict[str, str] = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 " \
+        + "(KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+}
+
+class FetchCacheEntry(TypedDict):
+    etag:          str
+    last_modified: str
+    region_hash:   str
+    available:     bool
+    price:         float
+
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+
+_rewrites: list[tuple[str, str]] = []
+
+#######################################################################
+
+def get_session() -> "requests.Session":
+    """Returns the `requests.Session` shared by all HTTP fetches, creating
+    it on first use. Its connection pool keeps connections to each vendor
+    alive between checks.
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE,
+                                  pool_maxsize=HTTP_POOL_SIZE)
+            _session = requests.Session()
+            _session.headers.update(HEADERS)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+
+    return _session
+
+def close_session() -> None:
+    """Closes the shared session and all its pooled connections.
+    """
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def add_rewrite(prefix: str, replacement: str) -> None:
+    """Fetches the URLs starting with `prefix` from `replacement` instead,
+    e.g. to point the checks at a local stand-in of a vendor. Products keep
+    their URL, so vendors and rate limits are still resolved from it.
+    """
+    _rewrites.append((prefix, replacement))
+
+def clear_rewrites() -> None:
+    _rewrites.clear()
+
+def rewrites() -> list[tuple[str, str]]:
+    """Returns the rewrites added, as `(prefix, replacement)` pairs.
+    """
+    return list(_rewrites)
+
+def rewrite_url(url: str) -> str:
+    """Returns the URL a product page is actually fetched from.
+    """
+    for prefix, replacement in _rewrites:
+        if url.startswith(prefix):
+            return replacement + url[len(prefix):]
+
+    return url
+
+def get_web_conditionally(url: str,
+                          etag: str = "",
+                          last_modified: str = "",
+                          timeout: float = HTTP_TIMEOUT) -> tuple[Optional[str], str, str]:
+    """Get the webpage through a plain HTTP GET request, made conditional on
+    the given `etag` and `last_modified` validators when present.
+
+    Returns:
+    - A `tuple` with the page content, or `None` if the server answered
+    `304 Not Modified`, followed by the `ETag` and `Last-Modified` validators
+    to be sent next time
+
+    Raises `requests.HTTPError` if the server doesn't answer with a 2xx/304.
+    """
+    headers: dict[str, str] = {}
+
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    response: "requests.Response" = get_session().get(rewrite_url(url),
+                                                    headers=headers,
+                                                    timeout=timeout)
+
+    logging.info(f"HTTP {response.status_code} for {url} " \
+                 + f"in {response.elapsed.total_seconds():.3f}s")
+
+    if response.status_code == 304:
+        return (None,
+                response.headers.get("ETag", etag),
+                response.headers.get("Last-Modified", last_modified))
+
+    response.raise_for_status()
+
+    return (response.text,
+            response.headers.get("ETag", ""),
+            response.headers.get("Last-Modified", ""))
+
+def get_web_through_http(url: str, timeout: float = HTTP_TIMEOUT) -> str:
+    """Get the webpage through a plain HTTP GET request.
+
+    Returns:
+    - A `str` with the page content
+
+    Raises `requests.HTTPError` if the server doesn't answer with a 2xx.
+    """
+    page, _, _ = get_web_conditionally(url, timeout=timeout)
+
+    return page or ""
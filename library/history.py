@@ -0,0 +1,84 @@
+import sqlite3
+import logging
+import threading
+
+from datetime import datetime, timezone
+
+if "pronotify" in __name__:
+    import pronotify.library.database as database # type: ignore
+else:
+    import library.database as database
+
+#######################################################################
+
+def _now() -> str:
+    """Returns the current UTC time as stored by SQLite, `YYYY-MM-DD HH:MM:SS`.
+    """
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+class HistoryRecorder:
+    """Buffers check results in memory, and writes them to the `checks`
+    table in a single transaction per flush.
+
+    Only change-points are stored: a result equal to the last one seen for
+    the product just extends the `LAST_SEEN` time of its last row.
+    """
+
+    def __init__(self):
+        self._pending: dict[str, tuple[bool, float, str, list[int]]] = {}
+        self._last: dict[int, tuple[bool, float]] = {}
+        self._loaded: bool = False
+        self._lock = threading.Lock()
+
+    def record(self, url: str, result: tuple[bool, float], product_ids: list[int]) -> None:
+        """Buffers the result of a check for the stored products, one per
+        group, watching the URL. If the URL was already checked since the
+        last flush, only the newest result is kept. Failed checks, with a
+        negative price, are not recorded.
+        """
+        available, price = result
+
+        if price < 0 or not product_ids:
+            return
+
+        with self._lock:
+            self._pending[url] = (bool(available), float(price), _now(), list(product_ids))
+
+    def flush(self, con: sqlite3.Connection) -> int:
+        """Writes the buffered results to the database.
+
+        Returns:
+        - An `int` with the number of new change-points
+        """
+        with self._lock:
+            pending: dict[str, tuple[bool, float, str, list[int]]] = self._pending
+            self._pending = {}
+
+        if not pending:
+            return 0
+
+        if not self._loaded:
+            self._last = {
+                product_id: (bool(available), float(price))
+                for product_id, available, price in database.read_last_checks(con) or []
+            }
+            self._loaded = True
+
+        inserts: list[tuple] = []
+        updates: list[tuple] = []
+
+        for available, price, timestamp, product_ids in pending.values():
+            for product_id in product_ids:
+                if self._last.get(product_id) == (available, price):
+                    updates.append((timestamp, product_id))
+                else:
+                    inserts.append((product_id, int(available), price, timestamp))
+
+        if not database.save_checks(con, inserts, updates):
+            logging.warning("Check results lost!")
+            return 0
+
+        for product_id, available, price, _ in inserts:
+            self._last[product_id] = (bool(available), price)
+
+        return len(inserts)
@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+from typing import Iterator, Optional, TypedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+#######################################################################
+
+# Stages of a check
+STAGE_FETCH: str = "fetch"
+STAGE_RENDER: str = "render"
+STAGE_WAIT: str = "wait"
+STAGE_PARSE: str = "parse"
+STAGE_EXTRACT: str = "extract"
+STAGE_TOTAL: str = "total"
+
+# Outcomes of a check
+OUTCOME_PARSED: str = "parsed"
+OUTCOME_NOT_MODIFIED: str = "not_modified"
+OUTCOME_UNCHANGED: str = "unchanged"
+OUTCOME_EMPTY: str = "empty"
+OUTCOME_ERROR: str = "error"
+OUTCOME_SKIPPED: str = "skipped"
+
+BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                              1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+DEFAULT_DUMP_SIZE: int = 50 * 1024 * 1024
+
+class MetricsState(TypedDict):
+    checks:     dict[tuple[str, str], int]
+    seconds:    dict[tuple[str, str], tuple[list[int], float, int]]
+    page_bytes: dict[str, int]
+
+#######################################################################
+
+class CheckStats:
+    """Timing of the stages of a single check, and its outcome.
+    """
+    __slots__ = ("vendor", "outcome", "stages", "page_bytes")
+
+    def __init__(self, vendor: str):
+        self.vendor: str = vendor
+        self.outcome: str = OUTCOME_PARSED
+        self.stages: dict[str, float] = {}
+        self.page_bytes: int = 0
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        """Adds the time spent in the body to the given stage.
+        """
+        start: float = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.stages[stage] = self.stages.get(stage, 0.0) \
+                + time.perf_counter() - start
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, as Prometheus exposes them.
+    """
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts: list[int] = [0] * len(BUCKETS)
+        self.total: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+class Metrics:
+    """Counters of checks per vendor and outcome, and histograms of the
+    time spent per vendor and stage. Exported as Prometheus text or JSON.
+    """
+
+    def __init__(self):
+        self._checks: dict[tuple[str, str], int] = {}
+        self._seconds: dict[tuple[str, str], Histogram] = {}
+        self._page_bytes: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stats: CheckStats) -> None:
+        with self._lock:
+            key: tuple[str, str] = (stats.vendor, stats.outcome)
+            self._checks[key] = self._checks.get(key, 0) + 1
+            self._page_bytes[stats.vendor] = self._page_bytes.get(stats.vendor, 0) \
+                + stats.page_bytes
+
+            for stage, seconds in stats.stages.items():
+                self._seconds.setdefault((stats.vendor, stage), Histogram()).observe(seconds)
+
+    def pop_state(self) -> MetricsState:
+        """Returns what was observed since the last call, and starts over.
+        Used by shard workers to send their metrics to the coordinator.
+        """
+        with self._lock:
+            state: MetricsState = {
+                "checks": self._checks,
+                "seconds": {key: (histogram.counts, histogram.total, histogram.count)
+                            for key, histogram in self._seconds.items()},
+                "page_bytes": self._page_bytes
+            }
+            self._checks, self._seconds, self._page_bytes = {}, {}, {}
+
+        return state
+
+    def merge_state(self, state: MetricsState) -> None:
+        """Adds the observations of another process, as returned by its
+        `pop_state`.
+        """
+        with self._lock:
+            for key, count in state["checks"].items():
+                self._checks[key] = self._checks.get(key, 0) + count
+
+            for vendor, size in state["page_bytes"].items():
+                self._page_bytes[vendor] = self._page_bytes.get(vendor, 0) + size
+
+            for key, (counts, total, count) in state["seconds"].items():
+                histogram: Histogram = self._seconds.setdefault(key, Histogram())
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.total += total
+                histogram.count += count
+
+    def to_json(self) -> dict:
+        with self._lock:
+            return {
+                "checks": [{"vendor": vendor, "outcome": outcome, "count": count}
+                           for (vendor, outcome), count in sorted(self._checks.items())],
+                "page_bytes": dict(sorted(self._page_bytes.items())),
+                "seconds": [{"vendor": vendor, "stage": stage, "count": histogram.count,
+                             "sum": histogram.total,
+                             "buckets": dict(zip((str(bound) for bound in BUCKETS),
+                                                 histogram.counts))}
+                            for (vendor, stage), histogram in sorted(self._seconds.items())]
+            }
+
+    def to_prometheus(self) -> str:
+        lines: list[str] = [
+            "# HELP pronotify_checks_total Product checks by vendor and outcome.",
+            "# TYPE pronotify_checks_total counter"
+        ]
+
+        with self._lock:
+            for (vendor, outcome), count in sorted(self._checks.items()):
+                lines.append(f'pronotify_checks_total{{vendor="{vendor}",outcome="{outcome}"}} {count}')
+
+            lines.append("# HELP pronotify_page_bytes_total Bytes of the product pages fetched.")
+            lines.append("# TYPE pronotify_page_bytes_total counter")
+            for vendor, size in sorted(self._page_bytes.items()):
+                lines.append(f'pronotify_page_bytes_total{{vendor="{vendor}"}} {size}')
+
+            lines.append("# HELP pronotify_check_seconds Time spent per check stage.")
+            lines.append("# TYPE pronotify_check_seconds histogram")
+            for (vendor, stage), histogram in sorted(self._seconds.items()):
+                labels: str = f'vendor="{vendor}",stage="{stage}"'
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    lines.append(f'pronotify_check_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'pronotify_check_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'pronotify_check_seconds_sum{{{labels}}} {histogram.total}')
+                lines.append(f'pronotify_check_seconds_count{{{labels}}} {histogram.count}')
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Writes the metrics to a file, as JSON if it ends in `.json` and
+        as Prometheus text otherwise. The file is replaced atomically, so
+        collectors never read it half written.
+        """
+        if path.endswith(".json"):
+            content: str = json.dumps(self.to_json(), indent=4) + "\n"
+        else:
+            content = self.to_prometheus()
+
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+
+        except OSError as e:
+            logging.warning(f"Couldn't write metrics to {path}: {e}")
+
+#######################################################################
+
+class PageDumper:
+    """Saves raw product pages as samples into a directory, deleting the
+    oldest ones so the directory never grows beyond `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_DUMP_SIZE):
+        self.directory: str = directory
+        self.max_bytes: int = max(0, max_bytes)
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._files: list[tuple[str, int]] = []
+        self._size: int = 0
+        self._lock = threading.Lock()
+
+        # Samples of previous runs count towards the limit
+        paths: list[str] = [os.path.join(directory, name) for name in os.listdir(directory)
+                            if name.endswith(".html")]
+        for path in sorted(paths, key=os.path.getmtime):
+            size: int = os.path.getsize(path)
+            self._files.append((path, size))
+            self._size += size
+
+    def dump(self, vendor: str, url: str, page: str) -> Optional[str]:
+        """Saves a page, named after its vendor, time and URL.
+
+        Returns:
+        - A `str` with the path of the sample, `None` if it wasn't saved
+        """
+        content: bytes = page.encode("utf-8")
+
+        if len(content) > self.max_bytes:
+            return None
+
+        timestamp: str = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        digest: str = hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+        path: str = os.path.join(self.directory, f"{vendor}_{timestamp}_{digest}.html")
+
+        with self._lock:
+            if os.path.exists(path):
+                return None
+
+            while self._files and self._size + len(content) > self.max_bytes:
+                oldest, size = self._files.pop(0)
+                self._size -= size
+                try:
+                    os.remove(oldest)
+                except OSError:
+                    pass
+
+            try:
+                with open(path, "wb") as f:
+                    f.write(content)
+            except OSError as e:
+                logging.warning(f"Couldn't dump page of {url}: {e}")
+                return None
+
+            self._files.append((path, len(content)))
+            self._size += len(content)
+
+        return path
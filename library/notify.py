@@ -0,0 +1,338 @@
+import sys
+import json
+import time
+import queue
+import logging
+import threading
+
+from typing import Optional, TypedDict
+from urllib.parse import urlparse, unquote
+from datetime import datetime, timezone
+
+#######################################################################
+
+BACK_IN_STOCK: str = "back_in_stock"
+OUT_OF_STOCK: str = "out_of_stock"
+PRICE_DROP: str = "price_drop"
+BELOW_MINPRICE: str = "below_minprice"
+
+DEFAULT_WINDOW: float = 60.0
+SINK_QUEUE_SIZE: int = 100
+
+class Event(TypedDict):
+    kind:           str
+    product_id:     int
+    url:            str
+    group:          str
+    currency:       str
+    available:      bool
+    price:          float
+    previous_price: float
+    minprice:       float
+    timestamp:      str
+
+#######################################################################
+
+def detect_events(record, previous: tuple[bool, float]) -> list[Event]:
+    """Compares the current status of a product record with its previous
+    `(available, price)`, and returns the events for its transitions.
+
+    Nothing is emitted if any of both statuses is unknown or failed, i.e.
+    has a negative price.
+    """
+    was_available, previous_price = previous
+    events: list[Event] = []
+
+    if previous_price < 0 or record.price < 0:
+        return events
+
+    kinds: list[str] = []
+
+    if record.available and not was_available:
+        kinds.append(BACK_IN_STOCK)
+    elif was_available and not record.available:
+        kinds.append(OUT_OF_STOCK)
+
+    if 0 < record.price < previous_price:
+        kinds.append(PRICE_DROP)
+
+    if record.is_deal and (not was_available or previous_price > record.minprice):
+        kinds.append(BELOW_MINPRICE)
+
+    timestamp: str = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    for kind in kinds:
+        events.append({
+            "kind": kind,
+            "product_id": record.id,
+            "url": record.url,
+            "group": record.group,
+            "currency": record.vendor.currency if record.vendor else "",
+            "available": record.available,
+            "price": record.price,
+            "previous_price": previous_price,
+            "minprice": record.minprice,
+            "timestamp": timestamp
+        })
+
+    return events
+
+def format_event(event: Event) -> str:
+    """Formats an event as a single human readable line.
+    """
+    texts: dict[str, str] = {
+        BACK_IN_STOCK: "Back in stock",
+        OUT_OF_STOCK: "Out of stock",
+        PRICE_DROP: f"Price drop from {event['previous_price']}",
+        BELOW_MINPRICE: f"Under minimum price {event['minprice']}"
+    }
+
+    return f"[{event['group']}] {texts.get(event['kind'], event['kind'])}: " \
+        + f"{event['price']} {event['currency']} - {event['url']}"
+
+#######################################################################
+
+class Sink:
+    """Destination of notifications. Batches are delivered from a dedicated
+    thread, through a bounded queue: if the sink can't keep up, the oldest
+    batches are dropped, so the checks are never stalled.
+    """
+    name: str = "sink"
+
+    def __init__(self, queue_size: int = SINK_QUEUE_SIZE):
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+
+    def send(self, group: str, events: list[Event]) -> None:
+        """Delivers a batch of events of a group.
+        """
+        raise NotImplementedError
+
+    def start(self) -> None:
+        """Starts the delivery thread.
+        """
+        self._thread = threading.Thread(target=self._deliver,
+                                        name=f"notify-{self.name}",
+                                        daemon=True)
+        self._thread.start()
+
+    def put(self, group: str, events: list[Event]) -> None:
+        """Queues a batch without blocking, dropping the oldest one if the
+        queue is full.
+        """
+        while True:
+            try:
+                self._queue.put_nowait((group, events))
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    logging.warning(f"Notification sink {self.name} is too slow, batch dropped")
+                except queue.Empty:
+                    pass
+
+    def _deliver(self) -> None:
+        while True:
+            item = self._queue.get()
+
+            if item is None:
+                return
+
+            try:
+                self.send(*item)
+            except Exception as e:
+                logging.warning(f"Notification sink {self.name} failed: {e}")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stops the delivery thread once the queued batches are delivered,
+        or the timeout expires.
+        """
+        if self._thread is None:
+            return
+
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+
+        self._thread.join(timeout)
+        self._thread = None
+
+class StdoutSink(Sink):
+    name = "stdout"
+
+    def send(self, group: str, events: list[Event]) -> None:
+        for event in events:
+            print(format_event(event), file=sys.stdout, flush=True)
+
+class FileSink(Sink):
+    """Appends each event to a file, as a JSON line.
+    """
+    name = "file"
+
+    def __init__(self, path: str, queue_size: int = SINK_QUEUE_SIZE):
+        super().__init__(queue_size)
+        self.path: str = path
+
+    def send(self, group: str, events: list[Event]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+
+class WebhookSink(Sink):
+    """POSTs each batch as JSON: `{"group": ..., "events": [...]}`.
+    """
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = 10.0,
+                 queue_size: int = SINK_QUEUE_SIZE):
+        super().__init__(queue_size)
+        self.url: str = url
+        self.timeout: float = timeout
+
+    def send(self, group: str, events: list[Event]) -> None:
+        import requests
+
+        response = requests.post(self.url,
+                                 json={"group": group, "events": events},
+                                 timeout=self.timeout)
+        response.raise_for_status()
+
+class EmailSink(Sink):
+    """Sends each batch as an email through SMTP with STARTTLS.
+    """
+    name = "email"
+
+    def __init__(self, host: str, port: int, sender: str, recipient: str,
+                 user: str = "", password: str = "",
+                 queue_size: int = SINK_QUEUE_SIZE):
+        super().__init__(queue_size)
+        self.host: str = host
+        self.port: int = port
+        self.sender: str = sender
+        self.recipient: str = recipient
+        self.user: str = user
+        self.password: str = password
+
+    def send(self, group: str, events: list[Event]) -> None:
+        import smtplib
+        from email.message import EmailMessage
+
+        message = EmailMessage()
+        message["Subject"] = f"pronotify: {len(events)} updates in {group}"
+        message["From"] = self.sender
+        message["To"] = self.recipient
+        message.set_content("\n".join(format_event(event) for event in events))
+
+        with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+            smtp.starttls()
+            if self.user:
+                smtp.login(self.user, self.password)
+            smtp.send_message(message)
+
+def make_sink(spec: str) -> Sink:
+    """Builds a sink from its specification:
+
+    - `stdout`
+    - `file:<path>`
+    - `webhook:<url>`
+    - `smtp://<user>:<password>@<host>:<port>/<recipient>?from=<sender>`
+    """
+    if spec == "stdout":
+        return StdoutSink()
+
+    if spec.startswith("file:"):
+        return FileSink(spec[len("file:"):])
+
+    if spec.startswith("webhook:"):
+        return WebhookSink(spec[len("webhook:"):])
+
+    if spec.startswith("smtp://"):
+        parsed = urlparse(spec)
+        recipient: str = unquote(parsed.path.lstrip("/"))
+        query: dict[str, str] = dict(item.split("=", 1) for item
+                                     in parsed.query.split("&") if "=" in item)
+
+        return EmailSink(parsed.hostname or "localhost", parsed.port or 587,
+                         unquote(query.get("from", recipient)), recipient,
+                         unquote(parsed.username or ""), unquote(parsed.password or ""))
+
+    raise ValueError(f"Unknown notification sink: {spec}")
+
+#######################################################################
+
+class Notifier:
+    """Coalesces events per group during `window` seconds, and hands each
+    group batch to every sink. Only the last event of each kind is kept per
+    product and window.
+    """
+
+    def __init__(self, sinks: list[Sink], window: float = DEFAULT_WINDOW):
+        self.sinks: list[Sink] = sinks
+        self.window: float = max(0.0, window)
+
+        self._pending: dict[str, dict[tuple[int, str], Event]] = {}
+        self._deadlines: dict[str, float] = {}
+        self._condition = threading.Condition()
+        self._stopped: bool = False
+
+        for sink in self.sinks:
+            sink.start()
+
+        self._thread = threading.Thread(target=self._dispatch,
+                                        name="notify-dispatcher",
+                                        daemon=True)
+        self._thread.start()
+
+    def publish(self, events: list[Event]) -> None:
+        """Adds events to the batches of their groups. Never blocks on the
+        sinks.
+        """
+        if not events:
+            return
+
+        with self._condition:
+            for event in events:
+                group: str = event["group"]
+                self._pending.setdefault(group, {})[(event["product_id"], event["kind"])] = event
+                self._deadlines.setdefault(group, time.monotonic() + self.window)
+
+            self._condition.notify()
+
+    def _flush(self, groups: list[str]) -> None:
+        """Hands the batches of the given groups to the sinks. Must be
+        called holding the condition.
+        """
+        for group in groups:
+            events: list[Event] = list(self._pending.pop(group, {}).values())
+            self._deadlines.pop(group, None)
+
+            if events:
+                for sink in self.sinks:
+                    sink.put(group, events)
+
+    def _dispatch(self) -> None:
+        with self._condition:
+            while not self._stopped:
+                now: float = time.monotonic()
+                self._flush([group for group, deadline in self._deadlines.items()
+                             if deadline <= now])
+
+                timeout: Optional[float] = None
+                if self._deadlines:
+                    timeout = max(0.0, min(self._deadlines.values()) - now)
+
+                self._condition.wait(timeout)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Delivers the pending batches and stops the sinks.
+        """
+        with self._condition:
+            self._stopped = True
+            self._flush(list(self._pending))
+            self._condition.notify()
+
+        self._thread.join(timeout)
+
+        for sink in self.sinks:
+            sink.stop(timeout)
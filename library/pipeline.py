@@ -0,0 +1,313 @@
+import time
+import asyncio
+import logging
+import sqlite3
+import itertools
+
+from typing import Callable, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+
+if "pronotify" in __name__:
+    import pronotify.library.processes as processes # type: ignore
+    import pronotify.library.vendors as vendors # type: ignore
+    import pronotify.library.metrics as metrics # type: ignore
+    from pronotify.library.vendors import Vendor # type: ignore
+    from pronotify.library.browser import BrowserPool # type: ignore
+    from pronotify.library.metrics import CheckStats # type: ignore
+    from pronotify.library.ratelimit import HostLimiter # type: ignore
+    from pronotify.library.fetch import FetchCacheEntry # type: ignore
+else:
+    import library.processes as processes
+    import library.vendors as vendors
+    import library.metrics as metrics
+    from library.vendors import Vendor
+    from library.browser import BrowserPool
+    from library.metrics import CheckStats
+    from library.ratelimit import HostLimiter
+    from library.fetch import FetchCacheEntry
+
+#######################################################################
+
+PARSE_WORKERS: int = 2
+QUEUE_SIZE: int = 64
+PERSIST_BATCH: int = 100
+
+#######################################################################
+
+class Check:
+    """A check going through the pipeline: each stage fills in its part.
+    """
+    __slots__ = ("url", "vendor", "stats", "limiter", "entry", "start",
+                 "fetched", "result", "new_entry")
+
+    def __init__(self, url: str, vendor: Vendor):
+        self.url: str = url
+        self.vendor: Vendor = vendor
+        self.stats: CheckStats = CheckStats(vendor.name)
+        self.limiter: Optional[HostLimiter] = None
+        self.entry: Optional[FetchCacheEntry] = None
+        self.start: float = 0.0
+        self.fetched: Optional[tuple[Union[str, dict, None], str, str]] = None
+        self.result: Optional[tuple[bool, float]] = None
+        self.new_entry: Optional[FetchCacheEntry] = None
+
+def _interleave(jobs: dict[str, Vendor]) -> list[tuple[str, Vendor]]:
+    """Orders the jobs taking one of each vendor in turn, so a vendor at
+    its limit doesn't hold every fetcher waiting for it.
+    """
+    by_vendor: dict[str, list[tuple[str, Vendor]]] = {}
+    for url, vendor in jobs.items():
+        by_vendor.setdefault(vendor.name, []).append((url, vendor))
+
+    return [job for turn in itertools.zip_longest(*by_vendor.values())
+            for job in turn if job is not None]
+
+#######################################################################
+
+class CheckPipeline:
+    """Runs checks as an asyncio pipeline of stages, connected by bounded
+    queues:
+
+    - schedule: queues the checks to fetch, one vendor after another
+    - fetch: `workers` fetchers, each waiting for its vendor limit and host
+    token, and fetching the page in a thread
+    - parse: `parsers` parsers, checking the pages in a thread
+    - persist: writes each result into the library, and every
+    `persist_every` results into `db_conn`, if given, in a thread
+
+    A full queue makes the stage before it wait, so fetches outpacing the
+    parsers, or parsers outpacing the database, never pile up more than
+    `queue_size` pages or results in memory.
+
+    Fetches stay blocking, through `requests` and the browser pool, so they
+    run in a thread each. Database writes run in a single thread of their
+    own, so they are never concurrent and don't hold the other stages.
+    """
+
+    def __init__(self,
+                 pool: BrowserPool,
+                 workers: int = processes.CHECK_WORKERS,
+                 vendor_workers: int = processes.VENDOR_WORKERS,
+                 parsers: int = PARSE_WORKERS,
+                 queue_size: int = QUEUE_SIZE,
+                 db_conn: Optional[sqlite3.Connection] = None,
+                 persist_every: int = PERSIST_BATCH,
+                 report: bool = False,
+                 progress: Optional[Callable[[dict[str, tuple[int, int]]], None]] = None):
+        self.pool: BrowserPool = pool
+        self.workers: int = max(1, workers)
+        self.vendor_workers: int = max(1, vendor_workers)
+        self.parsers: int = max(1, parsers)
+        self.queue_size: int = max(1, queue_size)
+        self.db_conn: Optional[sqlite3.Connection] = db_conn
+        self.persist_every: int = max(1, persist_every)
+        self.report: bool = report
+        self.progress = progress
+
+    async def run(self, jobs: dict[str, Vendor]) -> dict[str, tuple[bool, float]]:
+        """Checks the given URLs, with the vendor of each one. With `report`,
+        the library scheduler is given each result as soon as it's written.
+
+        Returns:
+        - A `dict` with the result of each URL checked, skipped ones excluded
+        """
+        results: dict[str, tuple[bool, float]] = {}
+
+        if not jobs:
+            return results
+
+        fetch_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        parse_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        persist_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        limits: dict[str, asyncio.Semaphore] = {
+            vendor.name: asyncio.Semaphore(min(self.vendor_workers, max(1, vendor.max_workers)))
+            for vendor in jobs.values()
+        }
+
+        counts: dict[str, tuple[int, int]] = {}
+        for vendor in jobs.values():
+            counts[vendor.name] = (0, counts.get(vendor.name, (0, 0))[1] + 1)
+
+        if self.progress is not None:
+            self.progress(dict(counts))
+
+        fetch_executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix="pipeline-fetch")
+        parse_executor = ThreadPoolExecutor(max_workers=self.parsers,
+                                            thread_name_prefix="pipeline-parse")
+        persist_executor = ThreadPoolExecutor(max_workers=1,
+                                              thread_name_prefix="pipeline-persist")
+
+        fetchers: list[asyncio.Task] = [
+            asyncio.create_task(self._fetch(fetch_queue, parse_queue, persist_queue,
+                                            limits, fetch_executor))
+            for _ in range(self.workers)
+        ]
+        parsers: list[asyncio.Task] = [
+            asyncio.create_task(self._parse(parse_queue, persist_queue, parse_executor))
+            for _ in range(self.parsers)
+        ]
+        persister: asyncio.Task = asyncio.create_task(
+            self._persist(persist_queue, results, counts, persist_executor))
+
+        try:
+            # Each stage is told to stop once the one before it finished
+            await self._schedule(jobs, fetch_queue)
+            for _ in fetchers:
+                await fetch_queue.put(None)
+            await asyncio.gather(*fetchers)
+
+            for _ in parsers:
+                await parse_queue.put(None)
+            await asyncio.gather(*parsers)
+
+            await persist_queue.put(None)
+            await persister
+
+        except BaseException:
+            for task in (*fetchers, *parsers, persister):
+                task.cancel()
+            raise
+
+        finally:
+            fetch_executor.shutdown(wait=False, cancel_futures=True)
+            parse_executor.shutdown(wait=False, cancel_futures=True)
+            # A write already running is finished, so no batch is left halfway
+            persist_executor.shutdown(wait=True, cancel_futures=True)
+
+        return results
+
+    #######################################################################
+
+    async def _schedule(self, jobs: dict[str, Vendor], fetch_queue: asyncio.Queue) -> None:
+        for url, vendor in _interleave(jobs):
+            await fetch_queue.put(Check(url, vendor))
+
+    async def _fetch(self,
+                     fetch_queue: asyncio.Queue,
+                     parse_queue: asyncio.Queue,
+                     persist_queue: asyncio.Queue,
+                     limits: dict[str, asyncio.Semaphore],
+                     executor: ThreadPoolExecutor) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            check: Optional[Check] = await fetch_queue.get()
+
+            if check is None:
+                return
+
+            async with limits[check.vendor.name]:
+                await loop.run_in_executor(executor, self._fetch_page, check)
+
+            # Skipped and failed checks have nothing to parse
+            if check.fetched is None:
+                await persist_queue.put(check)
+            else:
+                await parse_queue.put(check)
+
+    def _fetch_page(self, check: Check) -> None:
+        """Waits for a token of the vendor host and fetches the page, in a
+        fetch thread.
+        """
+        library = processes.ProductLibrary
+        check.limiter = library.rate_limiter.host(vendors.hostname(check.url),
+                                                  check.vendor.rate_limit,
+                                                  check.vendor.max_workers)
+
+        if not check.limiter.acquire():
+            logging.info(f"Skipping {check.url}, {check.limiter.host} is backing off")
+            check.stats.outcome = metrics.OUTCOME_SKIPPED
+            return
+
+        check.start = time.perf_counter()
+        check.entry = library.fetch_cache.get(check.url)
+
+        try:
+            logging.info(f"Checking {check.url}")
+            check.fetched = processes._fetch_page(check.url, check.vendor, self.pool,
+                                                  check.entry, check.stats)
+
+        except Exception as e:
+            library._check_failed(check.url, check.limiter, check.stats, e)
+            check.result = (False, -1)
+
+    async def _parse(self,
+                     parse_queue: asyncio.Queue,
+                     persist_queue: asyncio.Queue,
+                     executor: ThreadPoolExecutor) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            check: Optional[Check] = await parse_queue.get()
+
+            if check is None:
+                return
+
+            await loop.run_in_executor(executor, self._parse_page, check)
+            await persist_queue.put(check)
+
+    def _parse_page(self, check: Check) -> None:
+        """Checks the fetched page with the vendor parser, in a parse
+        thread.
+        """
+        assert check.fetched is not None and check.limiter is not None
+
+        try:
+            check.result, check.new_entry = processes._check_page(
+                check.url, check.vendor, check.fetched, check.entry, check.stats,
+                processes.ProductLibrary.page_dumper)
+            check.limiter.success()
+
+        except Exception as e:
+            processes.ProductLibrary._check_failed(check.url, check.limiter, check.stats, e)
+            check.result = (False, -1)
+
+        # The page is not needed anymore, don't keep it queued
+        check.fetched = None
+
+    async def _persist(self,
+                       persist_queue: asyncio.Queue,
+                       results: dict[str, tuple[bool, float]],
+                       counts: dict[str, tuple[int, int]],
+                       executor: ThreadPoolExecutor) -> None:
+        loop = asyncio.get_running_loop()
+        library = processes.ProductLibrary
+        unsaved: int = 0
+
+        while True:
+            check: Optional[Check] = await persist_queue.get()
+
+            if check is None:
+                break
+
+            if check.start:
+                check.stats.stages[metrics.STAGE_TOTAL] = time.perf_counter() - check.start
+            library.metrics.observe(check.stats)
+
+            try:
+                if check.result is not None:
+                    library._store_entry(check.url, check.new_entry)
+                    results[check.url] = check.result
+                    library._apply_result(check.url, check.result)
+
+                if self.report:
+                    library.scheduler.report(check.url, check.result)
+
+            except Exception as e:
+                logging.error(f"Couldn't save the result of {check.url}: {e}")
+
+            done, total = counts[check.vendor.name]
+            counts[check.vendor.name] = (done + 1, total)
+
+            if self.progress is not None:
+                self.progress(dict(counts))
+
+            unsaved += 1
+            if self.db_conn is not None and unsaved >= self.persist_every:
+                await loop.run_in_executor(executor, library.persist, self.db_conn)
+                unsaved = 0
+
+        if self.db_conn is not None and unsaved:
+            await loop.run_in_executor(executor, library.persist, self.db_conn)
@@ -1,20 +1,53 @@
+import json
 import time
+import hashlib
 import logging
-import requests
+import sqlite3
 import platform
 
-from typing import TypedDict
-from types import FunctionType
-
-from bs4 import BeautifulSoup
-from bs4.element import Tag
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from typing import Callable, Optional, TypedDict, Union, TYPE_CHECKING
+from collections import deque
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 
 if "pronotify" in __name__:
     import pronotify.library.database as database # type: ignore
+    from pronotify.library.browser import BrowserPool, DEFAULT_POOL_SIZE, DEFAULT_MAX_PAGES # type: ignore
+    import pronotify.library.vendors as vendors # type: ignore
+    from pronotify.library.vendors import Vendor # type: ignore
+    from pronotify.library.extract import make_soup # type: ignore
+    from pronotify.library.ratelimit import RateLimiter, HostLimiter, retry_after # type: ignore
+    from pronotify.library.scheduler import PollScheduler # type: ignore
+    from pronotify.library.history import HistoryRecorder # type: ignore
+    from pronotify.library.results import ResultCache # type: ignore
+    from pronotify.library.store import ProductStore, ProductRecord, ProductStatus # type: ignore
+    from pronotify.library.notify import Notifier, detect_events # type: ignore
+    import pronotify.library.metrics as metrics # type: ignore
+    from pronotify.library.metrics import Metrics, CheckStats, PageDumper # type: ignore
+    from pronotify.library.fetch import get_web_conditionally, rewrite_url, close_session, FetchCacheEntry, FETCH_HTTP, FETCH_AUTO # type: ignore
 else:
     import library.database as database
+    from library.browser import BrowserPool, DEFAULT_POOL_SIZE, DEFAULT_MAX_PAGES
+    import library.vendors as vendors
+    from library.vendors import Vendor
+    from library.extract import make_soup
+    from library.ratelimit import RateLimiter, HostLimiter, retry_after
+    from library.scheduler import PollScheduler
+    from library.history import HistoryRecorder
+    from library.results import ResultCache
+    from library.store import ProductStore, ProductRecord, ProductStatus
+    from library.notify import Notifier, detect_events
+    import library.metrics as metrics
+    from library.metrics import Metrics, CheckStats, PageDumper
+    from library.fetch import get_web_conditionally, rewrite_url, close_session, FetchCacheEntry, FETCH_HTTP, FETCH_AUTO
+
+# Only needed once a check uses them: bs4 and selenium are imported by the
+# first page parsed or rendered, the status API by `start_library` and the
+# shard workers by `start_shards`
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+    from library.api import StatusServer
+    from library.sharding import ShardedChecker, Job
 
 #######################################################################
 
@@ -26,167 +59,286 @@ platforms: dict[str, str] = {
 PLATFORM: str = platform.system().lower()
 chromedriver_binary: str = platforms.get(PLATFORM, "./chromedriver/chromedriver")
 
+CHECK_WORKERS: int = 4
+VENDOR_WORKERS: int = 2
+
+REGION_BEFORE: int = 256
+REGION_AFTER: int = 4096
+
+RENDER_TIMEOUT: float = 10.0
+RENDER_POLL: float = 0.1
+
+# Times stored in the database, in UTC
+DB_TIME_FORMAT: str = "%Y-%m-%d %H:%M:%S"
+
+# Returns the outer HTML of the elements matching the given selectors
+FRAGMENTS_SCRIPT: str = """
+return arguments[0].map(function (selector) {
+    return Array.from(document.querySelectorAll(selector))
+        .map(function (element) { return element.outerHTML; }).join("\\n");
+}).join("\\n");
+"""
+
+#######################################################################
+
+class EmptyPageError(Exception):
+    """Raised when a fetched page lacks the product details of its vendor.
+    """
+
 #######################################################################
 
 def _get_web_through_chromedriver(url: str,
-                                  chromium_path: str,
-                                  slowcon: int = 1) -> BeautifulSoup:
-    """Get the webpage through a chromium driver. For slow connections,
-    increase the `slowcon` parameter (1 is default, 2 is double load time, etc).
+                                  pool: BrowserPool,
+                                  slowcon: int = 1,
+                                  ready: tuple[str, ...] = (),
+                                  timeout: float = RENDER_TIMEOUT,
+                                  stats: Optional[CheckStats] = None,
+                                  fragments: tuple[str, ...] = (),
+                                  script: str = "",
+                                  unavailable: tuple[str, ...] = ()) -> Union[str, dict]:
+    """Get the webpage through a chromium driver borrowed from the given
+    pool. The page is read as soon as every `ready` CSS selector matches an
+    element, or any `unavailable` one does, or after `timeout` seconds. For
+    slow connections, increase the `slowcon` parameter (1 is default, 2 is
+    double wait time, etc).
+
+    Instead of the whole page, only what is needed can be extracted inside
+    the browser: the `dict` returned by the JavaScript `script`, empty if
+    it returns nothing, or else the HTML of the elements matching the
+    `fragments` CSS selectors.
     """
-    # Prepare options for the chrome driver
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument('--disable-extensions')
-    chrome_options.add_argument("--window-size=1920x1080")
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--disable-infobars')
-
-    # Just in case of windows execution
-    # https://bugs.chromium.org/p/chromium/issues/detail?id=737678
-    if platform.system().lower() == "windows":
-        chrome_options.add_argument('--disable-gpu')
-
-    if len(chromium_path) > 0:
-        chrome_options.binary_location = chromium_path
-
-    # Supress chrome logs
-    # https://stackoverflow.com/questions/47392423/python-selenium-devtools-listening-on-ws-127-0-0-1
-    chrome_options.add_argument("--log-level=3")
-    chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-
-    # start chrome browser
-    driver = webdriver.Chrome(options=chrome_options)
-        #executable_path=chromedriver_binary,
-    driver.get(url)
-
-    soup = BeautifulSoup(driver.page_source.encode("utf-8"), "html.parser")
-    logging.info("Web content: \n" + str(soup))
-    driver.quit()
-
-    return soup
-
-def _check_coolmod_product(url: str, chromium_path: str) -> tuple[bool, float]:
-    """Checks a Coolmod product page for availability and price.
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    stats = stats or CheckStats("")
+
+    with pool.driver() as driver:
+        driver.get(rewrite_url(url))
+
+        if ready:
+            with stats.timed(metrics.STAGE_WAIT):
+                try:
+                    WebDriverWait(driver, timeout * max(1, slowcon), RENDER_POLL).until(
+                        lambda d: all(d.find_elements(By.CSS_SELECTOR, selector)
+                                      for selector in ready)
+                        or any(d.find_elements(By.CSS_SELECTOR, selector)
+                               for selector in unavailable))
+                except TimeoutException:
+                    logging.warning(f"Timed out waiting for {', '.join(ready)} in {url}")
+
+        if script:
+            with stats.timed(metrics.STAGE_EXTRACT):
+                payload: Optional[dict] = driver.execute_script(script)
+            return payload or {}
+
+        if fragments:
+            return driver.execute_script(FRAGMENTS_SCRIPT, list(fragments)) or ""
+
+        page_source: str = driver.page_source
+
+    return page_source
+
+def _fetch_page(url: str,
+                vendor: Vendor,
+                pool: BrowserPool,
+                entry: Optional[FetchCacheEntry] = None,
+                stats: Optional[CheckStats] = None) -> tuple[Union[str, dict, None], str, str]:
+    """Gets the product page following the vendor fetch strategy. HTTP
+    requests are made conditional on the validators of the cache `entry`.
+    Time spent on HTTP and in the browser is added to `stats`.
+
+    `FETCH_AUTO` vendors are tried through plain HTTP first, and only
+    rendered in the browser if the page lacks the vendor `marker`, e.g.
+    because the content is built with JavaScript or the request was blocked.
+    HTTP 429 and 5xx answers are raised, so the host is backed off.
+
+    Vendors extracting in the browser get the payload of their script as
+    page, or the HTML of their fragments.
+
+    Returns:
+    - A `tuple` with the page, `None` if not modified, and its validators
     """
-    price: float = float(0)
-    available: bool = False
-
-    soup: BeautifulSoup = _get_web_through_chromedriver(url, chromium_path)
-    #response: requests.Response = requests.get(url)
-    #soup = BeautifulSoup(response.text, "html.parser")
-
-    div_group = soup.find("div", {"class": "product-details-prices"})
-
-    if div_group is None:
-        logging.warning("Product details group not found")
-        return (False, 0.0)
-
-    buy_button: Tag | None = div_group.find("span", {"class": "add-to-cart"})
-    
-    if buy_button is None:
-        logging.warning("Product availability not found")
-        return (False, 0.0)
-    
-    item: str
-    for item in buy_button.strings:
-        if "reserva" in item.lower():
-            available = False
-        elif "sin stock" in item.lower():
-            available = False
-        elif "añadir a la cesta" in item.lower():
-            available = True
-
-    main_price_element = div_group.find("span", {"class": "product_price int_price"})
-    sup_price_element = div_group.find("span", {"class": "product_price_sup"})
-    
-    if main_price_element is None or sup_price_element is None:
-        logging.warning("Price elements not found")
-        return (available, 0.0)
-    
-    main_price: str = main_price_element.string # type: ignore
-    sup_price: str = sup_price_element.string.replace(",", "").replace("€", "") # type: ignore
-
-    price = float(main_price) + float(sup_price)/100
-
-    return (available, price)
-
-def _check_pccomp_product(url: str, chromium_path: str) -> tuple[bool, float]:
+    etag: str = entry["etag"] if entry else ""
+    last_modified: str = entry["last_modified"] if entry else ""
+    stats = stats or CheckStats(vendor.name)
+
+    if vendor.strategy == FETCH_HTTP:
+        with stats.timed(metrics.STAGE_FETCH):
+            return get_web_conditionally(url, etag, last_modified)
+
+    if vendor.strategy == FETCH_AUTO:
+        try:
+            with stats.timed(metrics.STAGE_FETCH):
+                page, etag, last_modified = get_web_conditionally(url, etag, last_modified)
+            if page is None or vendor.marker in page:
+                return (page, etag, last_modified)
+            logging.info(f"HTTP page not enough for {vendor.name}, rendering it")
+
+        except Exception as e:
+            # Throttling and server errors back off the host instead: the
+            # browser would be throttled too, at the cost of a render
+            status: int = getattr(getattr(e, "response", None), "status_code", 0)
+            if status == 429 or status >= 500:
+                raise
+
+            logging.info(f"HTTP fetch failed for {vendor.name}, rendering it: {e}")
+
+    with stats.timed(metrics.STAGE_RENDER):
+        return (_get_web_through_chromedriver(url, pool, vendor.slowcon, vendor.ready,
+                                              vendor.render_timeout, stats,
+                                              vendor.fragments, vendor.extract_script,
+                                              vendor.unavailable), "", "")
+
+def _db_time(timestamp: float) -> str:
+    """Returns a Unix time as stored by SQLite, `YYYY-MM-DD HH:MM:SS` in UTC.
     """
-    Sample `chromium_path`:
-    C:\\Program Files (x86)\\BraveSoftware\\Brave-Browser\\Application\brave.exe
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(DB_TIME_FORMAT)
+
+def _seconds_until(db_time: str, now: float) -> float:
+    """Returns the seconds from the Unix time `now` to a time stored by
+    SQLite, 0 if it's past or not valid.
     """
-    price: float = float(0)
-    available: bool = False
-
-    soup: BeautifulSoup = _get_web_through_chromedriver(url, chromium_path, slowcon=3)
-
-    #from IPython import embed
-    #embed()
-
-    # TODO: check if the items are found and handle gracefully
-    buy_button = None
-    buy_buttons = soup.find_all("button")
-    logging.error(f"Total buttons found: {len(buy_buttons)}")
-    for button in buy_buttons:
-        button_class = button.get("class")
-        if button_class and any(cls.startswith("addToCartButton-") for cls in button_class):
-            buy_button = button
-            logging.error(f"Buy button found: {buy_button}")
-            exit(1)
-            break
-        else:
-            logging.error(f"Button class not found or doesn't match: {button_class}")
-            exit(1)
-    
-    if buy_button is not None and buy_button.string is not None:
-        available = "comprar" in buy_button.string.lower()
-        logging.info(f"Availability: {buy_button.string.lower()}")
+    try:
+        moment = datetime.strptime(db_time, DB_TIME_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return 0.0
+
+    return max(0.0, moment.timestamp() - now)
 
-    full_price = soup.find("div", attrs={"class": "precioMain"})
-    if full_price is not None:
-        price = float(full_price['data-price']) # type: ignore
+def _hash_regions(page: str, regions: tuple[str, ...]) -> str:
+    """Hashes the parts of the page around each of the `regions` markers,
+    which hold everything the vendor parser reads. If any marker is missing,
+    an empty `str` is returned so the page is always parsed.
+    """
+    digest = hashlib.sha1()
+
+    for marker in regions:
+        index: int = page.find(marker)
+        if index < 0:
+            return ""
+        digest.update(page[max(0, index - REGION_BEFORE):index + REGION_AFTER].encode("utf-8"))
+
+    return digest.hexdigest()
+
+def _check_payload(payload: dict,
+                   vendor: Vendor,
+                   entry: Optional[FetchCacheEntry],
+                   stats: CheckStats
+                   ) -> tuple[tuple[bool, float], Optional[FetchCacheEntry]]:
+    """Checks the payload extracted in the browser by the vendor script, as
+    `_check_product` does with pages. The whole payload is hashed.
+    """
+    if not payload:
+        stats.outcome = metrics.OUTCOME_EMPTY
+        raise EmptyPageError(f"Page lacks {vendor.name} product details")
+
+    serialized: str = json.dumps(payload, sort_keys=True)
+    stats.page_bytes = len(serialized)
+    region_hash: str = hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+
+    if entry is not None and region_hash == entry["region_hash"]:
+        stats.outcome = metrics.OUTCOME_UNCHANGED
+        result: tuple[bool, float] = (entry["available"], entry["price"])
+    else:
+        with stats.timed(metrics.STAGE_PARSE):
+            result = vendor.parse_extracted(payload)
+
+    new_entry: FetchCacheEntry = {
+        "etag": "",
+        "last_modified": "",
+        "region_hash": region_hash,
+        "available": result[0],
+        "price": result[1]
+    }
 
-    return (available, price)
+    return (result, None if new_entry == entry else new_entry)
 
-def _check_neobyte_product(url: str, chromium_path: str) -> tuple[bool, float]:
+def _check_product(url: str,
+                   vendor: Vendor,
+                   pool: BrowserPool,
+                   entry: Optional[FetchCacheEntry] = None,
+                   stats: Optional[CheckStats] = None,
+                   dumper: Optional[PageDumper] = None
+                   ) -> tuple[tuple[bool, float], Optional[FetchCacheEntry]]:
+    """Checks a product page for availability and price, fetching it as the
+    vendor requires and parsing it with the vendor parser.
+
+    The time of each stage and the outcome are recorded in `stats`. If a
+    `dumper` is given, the fetched page is saved as a sample. Payloads
+    extracted in the browser are checked by `_check_payload`.
+
+    If the page is not modified since the cached `entry`, or the regions the
+    parser reads hash the same, the cached result is reused without parsing.
+
+    Raises `EmptyPageError` if the page lacks the vendor marker, which
+    usually means the vendor is blocking or throttling us.
+
+    Returns:
+    - A `tuple` with the `(available, price)` result and the new cache entry,
+    or `None` if the cache entry didn't change
     """
-    Sample `chromium_path`:
-    C:\\Program Files (x86)\\BraveSoftware\\Brave-Browser\\Application\brave.exe
+    stats = stats or CheckStats(vendor.name)
+
+    return _check_page(url, vendor, _fetch_page(url, vendor, pool, entry, stats),
+                       entry, stats, dumper)
+
+def _check_page(url: str,
+                vendor: Vendor,
+                fetched: tuple[Union[str, dict, None], str, str],
+                entry: Optional[FetchCacheEntry],
+                stats: CheckStats,
+                dumper: Optional[PageDumper] = None
+                ) -> tuple[tuple[bool, float], Optional[FetchCacheEntry]]:
+    """Second half of `_check_product`: checks the page, and validators,
+    returned by `_fetch_page`, so fetching and parsing can run apart.
+
+    Returns:
+    - A `tuple` with the `(available, price)` result and the new cache entry,
+    or `None` if the cache entry didn't change
     """
-    price: float = float(0)
-    available: bool = False
+    page, etag, last_modified = fetched
+
+    if page is None and entry is not None:
+        logging.info(f"Not modified: {url}")
+        stats.outcome = metrics.OUTCOME_NOT_MODIFIED
+        return ((entry["available"], entry["price"]), None)
 
-    soup: BeautifulSoup = _get_web_through_chromedriver(url, chromium_path)
+    if isinstance(page, dict):
+        return _check_payload(page, vendor, entry, stats)
 
-    # Get the div which contains the availability and price info
-    group_div = soup.find("div", {"class": "product-prices"})
+    page = page or ""
+    stats.page_bytes = len(page)
 
-    if group_div is None:
-        logging.warning("Product info group not found")
-        return (False, 0.0)
-    
-    dom_available = group_div.find("span", {"id": "product-availability"})
+    if dumper is not None:
+        dumper.dump(vendor.name, url, page)
 
-    if dom_available is None:
-        logging.warning("Availability element not found")
-        return (False, 0.0)
-    
-    available_class = dom_available.get('class')
-    available = available_class is not None and "badge-success" in available_class
+    if vendor.marker and vendor.marker not in page:
+        stats.outcome = metrics.OUTCOME_EMPTY
+        raise EmptyPageError(f"Page lacks {vendor.name} product details")
 
-    dom_price_element = group_div.find("span", {"class": "product-price"})
-    if dom_price_element is None or dom_price_element.string is None:
-        logging.warning("Price element not found")
-        return (available, 0.0)
-    
-    dom_price = str(dom_price_element.attrs.get('content'))
+    region_hash: str = _hash_regions(page, vendor.regions)
 
-    assert dom_price is not None, "Price not found, can't process it!"
-    price = float(dom_price)
+    if entry is not None and region_hash and region_hash == entry["region_hash"]:
+        logging.info(f"Unchanged regions: {url}")
+        stats.outcome = metrics.OUTCOME_UNCHANGED
+        result: tuple[bool, float] = (entry["available"], entry["price"])
 
-    return (available, price)
+    else:
+        with stats.timed(metrics.STAGE_PARSE):
+            soup: "BeautifulSoup" = make_soup(page, vendor.strainer)
+        with stats.timed(metrics.STAGE_EXTRACT):
+            result = vendor.parse(soup)
+
+    new_entry: FetchCacheEntry = {
+        "etag": etag,
+        "last_modified": last_modified,
+        "region_hash": region_hash,
+        "available": result[0],
+        "price": result[1]
+    }
+
+    return (result, None if new_entry == entry else new_entry)
 
 #######################################################################
 
@@ -199,14 +351,284 @@ class Product(TypedDict):
     minprice: float
 
 
+class Snapshot(TypedDict):
+    updated:  str
+    products: list[ProductStatus]
+    groups:   dict[str, list[ProductStatus]]
+    deals:    list[ProductStatus]
+
+
 class ProductLibrary:
     """Class that models the library containing all the products to be checked.
     """
-    products: dict = {}
+    products: ProductStore = ProductStore()
+    browser_pool: Optional[BrowserPool] = None
+    rate_limiter: RateLimiter = RateLimiter()
+    scheduler: PollScheduler = PollScheduler()
+    history: HistoryRecorder = HistoryRecorder()
+    result_cache: ResultCache = ResultCache()
+    notifier: Optional[Notifier] = None
+    api_server: Optional["StatusServer"] = None
+    sharded: Optional["ShardedChecker"] = None
+    metrics: Metrics = Metrics()
+    metrics_file: str = ""
+    page_dumper: Optional[PageDumper] = None
+    snapshot: Snapshot = {"updated": "", "products": [], "groups": {}, "deals": []}
+
+    fetch_cache: dict[str, FetchCacheEntry] = {}
+    fetch_cache_dirty: set[str] = set()
+    status_dirty: set[str] = set()
 
     @staticmethod
-    def add_product(url: str, group: str) -> bool:
+    def load_database(db_conn: sqlite3.Connection) -> int:
+        """Loads the products and the fetch cache stored in the database
+        into memory. Products resume from their last status, target price
+        and next check time, and their vendor is saved if it wasn't yet.
+
+        Returns:
+        - An `int` with the number of products loaded
         """
+        rows: list = database.read_products(db_conn) or []
+
+        # Products stored before URLs were canonicalized are updated once,
+        # and the ones that turn out to be the same product, in the same
+        # group, are merged into the oldest
+        renamed: list[tuple[str, int]] = []
+        merged: list[tuple[int, int]] = []
+        kept: dict[tuple[str, str], int] = {}
+        canonical_rows: list[tuple[int, str, str]] = []
+
+        for product_id, url, group in rows:
+            canonical: str = vendors.canonical_url(url)
+
+            if (canonical, group) in kept:
+                merged.append((product_id, kept[(canonical, group)]))
+                continue
+
+            kept[(canonical, group)] = product_id
+            canonical_rows.append((product_id, canonical, group))
+            if canonical != url:
+                renamed.append((canonical, product_id))
+
+        rows = canonical_rows
+
+        if renamed or merged:
+            database.update_product_urls(db_conn, renamed, merged)
+
+        metadata: dict[int, tuple] = {row[0]: row[1:] for row
+                                      in database.read_products_metadata(db_conn) or []}
+        now: float = time.time()
+
+        resolved: dict[str, Optional[Vendor]] = {}
+        for _, url, _ in rows:
+            if url not in resolved:
+                resolved[url] = vendors.resolve(url)
+                if resolved[url] is None:
+                    logging.warning(f"Webpage not supported! {url}")
+
+        loaded: int = ProductLibrary.products.load(rows, resolved)
+
+        vendor_rows: list[tuple[str, str, int]] = []
+        scheduled: dict[str, tuple[float, float, Optional[tuple[bool, float]]]] = {}
+
+        for product_id, url, _ in rows:
+            vendor_name, currency, target_price, available, price, next_check = \
+                metadata.get(product_id, ("", "", 0.0, None, None, None))
+            vendor: Optional[Vendor] = resolved[url]
+
+            if vendor is not None and (vendor_name, currency) != (vendor.name, vendor.currency):
+                vendor_rows.append((vendor.name, vendor.currency, product_id))
+
+            if target_price:
+                ProductLibrary.products.set_minprice(product_id, target_price)
+
+            result: Optional[tuple[bool, float]] = None
+            if price is not None:
+                result = (bool(available), float(price))
+                ProductLibrary.products.update(product_id, *result)
+
+            # Products of a URL are polled together, as soon as any is due
+            delay: float = _seconds_until(next_check, now) if next_check else 0.0
+            previous = scheduled.get(url)
+            if previous is not None:
+                delay = min(delay, previous[0])
+                target_price = max(target_price, previous[1])
+                result = result or previous[2]
+            scheduled[url] = (delay, target_price, result)
+
+        for url, (delay, target_price, result) in scheduled.items():
+            ProductLibrary.scheduler.add(url, target_price, delay, result)
+
+        if vendor_rows:
+            database.update_product_vendors(db_conn, vendor_rows)
+
+        ProductLibrary.load_fetch_cache(database.read_fetch_cache(db_conn) or [])
+        ProductLibrary.publish_snapshot()
+
+        return loaded
+
+    @staticmethod
+    def publish_snapshot() -> Snapshot:
+        """Copies the status of the products into a new snapshot, and
+        replaces the published one with it in a single assignment. Readers
+        of `ProductLibrary.snapshot` never take the store lock, and never
+        see a cycle half written.
+        """
+        products: list[ProductStatus] = ProductLibrary.products.statuses()
+
+        groups: dict[str, list[ProductStatus]] = {}
+        deals: list[ProductStatus] = []
+        for status in products:
+            groups.setdefault(status["group"], []).append(status)
+
+            # Same rule as `ProductRecord.is_deal`, on the copied status
+            if status["available"] and 0 < status["price"] <= status["minprice"]:
+                deals.append(status)
+
+        snapshot: Snapshot = {
+            "updated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "products": products,
+            "groups": groups,
+            "deals": deals
+        }
+        ProductLibrary.snapshot = snapshot
+
+        return snapshot
+
+    @staticmethod
+    def persist(db_conn: sqlite3.Connection) -> None:
+        """Writes to the database what changed since the last call: fetch
+        cache entries, check results and the last status and next check
+        time of the products checked.
+        """
+        database.save_fetch_cache(db_conn, ProductLibrary.pop_dirty_fetch_cache())
+        ProductLibrary.history.flush(db_conn)
+        database.save_product_status(db_conn, ProductLibrary.pop_dirty_status())
+
+    @staticmethod
+    def load_fetch_cache(rows: list) -> None:
+        """Loads the fetch cache from the rows read from the database.
+        """
+        for url, etag, last_modified, region_hash, available, price in rows:
+            ProductLibrary.fetch_cache[url] = {
+                "etag": etag or "",
+                "last_modified": last_modified or "",
+                "region_hash": region_hash or "",
+                "available": bool(available),
+                "price": float(price)
+            }
+
+    @staticmethod
+    def pop_dirty_fetch_cache() -> list[tuple]:
+        """Returns the fetch cache entries changed since the last call as
+        rows to be saved in the database.
+        """
+        rows: list[tuple] = []
+
+        while ProductLibrary.fetch_cache_dirty:
+            url: str = ProductLibrary.fetch_cache_dirty.pop()
+            entry: Optional[FetchCacheEntry] = ProductLibrary.fetch_cache.get(url)
+
+            if entry is not None:
+                rows.append((url, entry["etag"], entry["last_modified"],
+                             entry["region_hash"], int(entry["available"]),
+                             entry["price"]))
+
+        return rows
+
+    @staticmethod
+    def pop_dirty_status() -> list[tuple]:
+        """Returns the status of the stored products checked since the last
+        call, as rows to be saved in the database.
+        """
+        rows: list[tuple] = []
+        now: float = time.time()
+        last_check: str = _db_time(now)
+
+        while ProductLibrary.status_dirty:
+            url: str = ProductLibrary.status_dirty.pop()
+            delay: Optional[float] = ProductLibrary.scheduler.next_check(url)
+            next_check: Optional[str] = None if delay is None else _db_time(now + delay)
+
+            for record in ProductLibrary.products.by_url(url):
+                # Negative IDs are products only kept in memory
+                if record.id >= 0:
+                    rows.append((int(record.available), record.price,
+                                 last_check, next_check, record.id))
+
+        return rows
+
+    @staticmethod
+    def start_browser_pool(chromium_path: str,
+                           size: int = DEFAULT_POOL_SIZE,
+                           max_pages: int = DEFAULT_MAX_PAGES) -> BrowserPool:
+        """Creates the pool of headless drivers shared by all checks,
+        replacing (and shutting down) any previous one.
+        """
+        if ProductLibrary.browser_pool is not None:
+            ProductLibrary.browser_pool.shutdown()
+
+        ProductLibrary.browser_pool = BrowserPool(chromium_path, size, max_pages)
+
+        return ProductLibrary.browser_pool
+
+    @staticmethod
+    def start_shards(chromium_path: str,
+                     shards: int,
+                     shard_by: str,
+                     size: int = DEFAULT_POOL_SIZE,
+                     max_pages: int = DEFAULT_MAX_PAGES) -> "ShardedChecker":
+        """Starts `shards` worker processes, each with a browser pool of
+        the given `size`, and makes `check_products` run the checks there.
+        """
+        if "pronotify" in __name__:
+            from pronotify.library.sharding import ShardedChecker # type: ignore
+        else:
+            from library.sharding import ShardedChecker
+
+        if ProductLibrary.sharded is not None:
+            ProductLibrary.sharded.shutdown()
+
+        ProductLibrary.sharded = ShardedChecker(shards, chromium_path, size,
+                                                max_pages, shard_by)
+        ProductLibrary.sharded.start()
+
+        return ProductLibrary.sharded
+
+    @staticmethod
+    def shutdown() -> None:
+        """Releases every resource held by the library, e.g. the drivers.
+        """
+        if ProductLibrary.sharded is not None:
+            ProductLibrary.sharded.shutdown()
+            ProductLibrary.sharded = None
+
+        if ProductLibrary.browser_pool is not None:
+            ProductLibrary.browser_pool.shutdown()
+            ProductLibrary.browser_pool = None
+
+        if ProductLibrary.api_server is not None:
+            ProductLibrary.api_server.shutdown()
+            ProductLibrary.api_server = None
+
+        if ProductLibrary.notifier is not None:
+            ProductLibrary.notifier.shutdown()
+            ProductLibrary.notifier = None
+
+        close_session()
+
+    @staticmethod
+    def add_product(url: str,
+                    group: str,
+                    minprice: float = 0.0,
+                    product_id: Optional[int] = None) -> bool:
+        """
+        Adds the product to the given group, and to the scheduler, by its
+        canonical URL. A `minprice` makes the product be polled more often
+        when its price gets close to it. `product_id` is the ID of the
+        product in the database, if it's stored. If the URL is already
+        watched by another group, its last result is shared right away.
+
         Returns:
         - A `bool` indicating if the insertion was accomplished (true)
         """
@@ -215,12 +637,20 @@ class ProductLibrary:
         if group == "":
             group = "default"
 
-        if group in ProductLibrary.products:
-            ProductLibrary.products[group][url] = False
-        else:
-            ProductLibrary.products[group] = {
-                f"{url}": False
-            }
+        url = vendors.canonical_url(url)
+        known: list[ProductRecord] = ProductLibrary.products.by_url(url)
+        vendor: Optional[Vendor] = known[0].vendor if known else vendors.resolve(url)
+
+        if vendor is None:
+            logging.warning(f"Webpage not supported! {url}")
+
+        record: ProductRecord = ProductLibrary.products.add(url, group, product_id,
+                                                            vendor, minprice)
+        if known and known[0].price >= 0 and record.price < 0:
+            ProductLibrary.products.update(record.id, *known[0].status)
+
+        ProductLibrary.scheduler.add(url, minprice)
+        ProductLibrary.publish_snapshot()
 
         return result
 
@@ -235,12 +665,21 @@ class ProductLibrary:
         if group == "":
             group = "default"
 
-        if group in ProductLibrary.products:
-            if url in ProductLibrary.products[group]:
-                del ProductLibrary.products[group][url]
-            else:
-                logging.warning(f"URL doesn't exist in this group!")
-                result = False
+        url = vendors.canonical_url(url)
+        record: Optional[ProductRecord] = ProductLibrary.products.find(url, group)
+
+        if record is not None:
+            ProductLibrary.products.remove(record.id)
+
+            if not ProductLibrary.products.has_url(url):
+                ProductLibrary.scheduler.remove(url)
+                ProductLibrary.result_cache.discard(url)
+
+            ProductLibrary.publish_snapshot()
+
+        elif ProductLibrary.products.by_group(group):
+            logging.warning(f"URL doesn't exist in this group!")
+            result = False
         else:
             logging.warning(f"Group {group} doesn't exist!")
             result = False
@@ -248,38 +687,421 @@ class ProductLibrary:
         return result
 
     @staticmethod
-    def check_products(chromium_path: str):
+    def check_due_products(chromium_path: str,
+                           workers: int = CHECK_WORKERS,
+                           vendor_workers: int = VENDOR_WORKERS,
+                           progress: Optional[Callable[[dict[str, tuple[int, int]]], None]] = None) -> float:
+        """
+        Runs the checks only for the products due in the library scheduler,
+        and schedules their next check from the results. `progress` is passed
+        to `check_products`. If the checks are interrupted, the products
+        due are scheduled again at once.
+
+        Returns:
+        - A `float` with the seconds until the next product is due
+        """
+        due: list[str] = ProductLibrary.scheduler.due()
+
+        try:
+            if due:
+                results = ProductLibrary.check_products(chromium_path, workers,
+                                                        vendor_workers, set(due),
+                                                        progress)
+                for url in due:
+                    ProductLibrary.scheduler.report(url, results.get(url))
+
+        finally:
+            ProductLibrary.scheduler.restore(due)
+
+        return ProductLibrary.scheduler.next_due()
+
+    @staticmethod
+    async def check_due_products_async(chromium_path: str,
+                                       workers: int = CHECK_WORKERS,
+                                       vendor_workers: int = VENDOR_WORKERS,
+                                       progress: Optional[Callable[[dict[str, tuple[int, int]]], None]] = None,
+                                       db_conn: Optional[sqlite3.Connection] = None) -> float:
         """
-        Runs the checks for all products in the library.
+        Async version of `check_due_products`, running the checks through
+        `check_products_async`. Each product is scheduled again as soon as
+        its result is written.
+
+        Returns:
+        - A `float` with the seconds until the next product is due
+        """
+        due: list[str] = ProductLibrary.scheduler.due()
+
+        try:
+            if due:
+                results, checked = await ProductLibrary._run_pipeline(
+                    chromium_path, workers, vendor_workers, set(due), progress, db_conn,
+                    report=True)
+
+                for url in due:
+                    if url not in checked:
+                        ProductLibrary.scheduler.report(url, results.get(url))
+
+        finally:
+            ProductLibrary.scheduler.restore(due)
+
+        return ProductLibrary.scheduler.next_due()
+
+    @staticmethod
+    async def check_products_async(chromium_path: str,
+                                   workers: int = CHECK_WORKERS,
+                                   vendor_workers: int = VENDOR_WORKERS,
+                                   urls: Optional[set[str]] = None,
+                                   progress: Optional[Callable[[dict[str, tuple[int, int]]], None]] = None,
+                                   db_conn: Optional[sqlite3.Connection] = None) -> dict[str, tuple[bool, float]]:
+        """
+        Async version of `check_products`, with the same limits, running the
+        checks through a `CheckPipeline`: pages are fetched, parsed and
+        written by separate stages connected by bounded queues. If `db_conn`
+        is given, results are persisted into it as they come, in batches.
+
+        With shard workers started, the checks run there, waited for in a
+        thread.
+
+        Returns:
+        - A `dict` with the result of each URL checked, skipped ones excluded
+        """
+        results, _ = await ProductLibrary._run_pipeline(chromium_path, workers,
+                                                        vendor_workers, urls,
+                                                        progress, db_conn)
+        return results
+
+    @staticmethod
+    async def _run_pipeline(chromium_path: str,
+                            workers: int,
+                            vendor_workers: int,
+                            urls: Optional[set[str]],
+                            progress: Optional[Callable[[dict[str, tuple[int, int]]], None]],
+                            db_conn: Optional[sqlite3.Connection],
+                            report: bool = False) -> tuple[dict[str, tuple[bool, float]], set[str]]:
         """
+        Runs the checks of `check_products_async`, reporting each result to
+        the scheduler if `report` is set.
+
+        Returns:
+        - A `tuple` with the result of each URL, and the URLs whose result
+        the scheduler was given
+        """
+        # Imported here, along with asyncio, as the pipeline imports this module
+        if "pronotify" in __name__:
+            from pronotify.library.pipeline import CheckPipeline # type: ignore
+        else:
+            from library.pipeline import CheckPipeline
+        import asyncio
+
+        if ProductLibrary.sharded is not None:
+            results: dict[str, tuple[bool, float]] = await asyncio.get_running_loop().run_in_executor(
+                None, ProductLibrary._check_sharded, ProductLibrary.sharded, workers,
+                vendor_workers, urls, progress)
+
+            if db_conn is not None:
+                ProductLibrary.persist(db_conn)
+
+            return (results, set())
+
+        pool: BrowserPool = ProductLibrary.browser_pool \
+            or ProductLibrary.start_browser_pool(chromium_path)
+
+        results = {}
+        jobs: dict[str, Vendor] = ProductLibrary._plan_checks(urls, results)
+
+        pipeline = CheckPipeline(pool, workers, vendor_workers, db_conn=db_conn,
+                                 report=report, progress=progress)
+        results.update(await pipeline.run(jobs))
+
+        ProductLibrary.publish_snapshot()
+
+        if ProductLibrary.metrics_file:
+            ProductLibrary.metrics.write(ProductLibrary.metrics_file)
+
+        return (results, set(jobs) if report else set())
+
+    @staticmethod
+    def check_products(chromium_path: str,
+                       workers: int = CHECK_WORKERS,
+                       vendor_workers: int = VENDOR_WORKERS,
+                       urls: Optional[set[str]] = None,
+                       progress: Optional[Callable[[dict[str, tuple[int, int]]], None]] = None) -> dict[str, tuple[bool, float]]:
+        """
+        Runs the checks for all products in the library, or only for the
+        given `urls`. Drivers are
+        borrowed from the library browser pool, which is started with the
+        default settings if it doesn't exist yet.
+
+        Up to `workers` checks run at the same time, and no more than
+        `vendor_workers` (or the vendor own limit, if lower) of them against
+        the same vendor. Each URL is checked once, however many groups
+        watch it, and not at all if the result cache has a fresh result for
+        it. Each result is written back into every product of its URL as
+        soon as its check finishes.
+
+        Requests to each vendor host are limited by its token bucket. Hosts
+        failing or throttling us are backed off, and their products keep
+        their previous result until the host recovers.
+
+        If given, `progress` is called from the calling thread whenever a
+        check finishes, with the checks done and queued of each vendor.
+
+        With shard workers started, the checks run there instead, see
+        `_check_sharded`.
+
+        Returns:
+        - A `dict` with the result of each URL checked, skipped ones excluded
+        """
+        if ProductLibrary.sharded is not None:
+            return ProductLibrary._check_sharded(ProductLibrary.sharded, workers,
+                                                 vendor_workers, urls, progress)
+
+        pool: BrowserPool = ProductLibrary.browser_pool \
+            or ProductLibrary.start_browser_pool(chromium_path)
+
+        workers = max(1, workers)
+        vendor_workers = max(1, vendor_workers)
+
+        def run_check(vendor: Vendor, product: str) -> Optional[tuple[bool, float]]:
+            limiter: HostLimiter = ProductLibrary.rate_limiter.host(
+                vendors.hostname(product), vendor.rate_limit, vendor.max_workers)
+
+            stats: CheckStats = CheckStats(vendor.name)
+
+            if not limiter.acquire():
+                logging.info(f"Skipping {product}, {limiter.host} is backing off")
+                stats.outcome = metrics.OUTCOME_SKIPPED
+                ProductLibrary.metrics.observe(stats)
+                return None
 
-        def run_check(check_function: FunctionType , product: str) -> tuple[bool, float]:
             availability, price = False, -1
+            start: float = time.perf_counter()
             try:
-                availability, price = check_function(product, chromium_path)
+                logging.info(f"Checking {product}")
+                (availability, price), entry = _check_product(
+                    product, vendor, pool, ProductLibrary.fetch_cache.get(product),
+                    stats, ProductLibrary.page_dumper)
+
+                ProductLibrary._store_entry(product, entry)
+                limiter.success()
+
             except Exception as e:
-                logging.warning(f"Error checking product {product}: {e}")
+                ProductLibrary._check_failed(product, limiter, stats, e)
+
+            stats.stages[metrics.STAGE_TOTAL] = time.perf_counter() - start
+            ProductLibrary.metrics.observe(stats)
 
             return availability, price
 
-        for group in ProductLibrary.products:
+        results: dict[str, tuple[bool, float]] = {}
 
-            logging.info(f"Group {group}")
+        # Queue the checks per vendor, so the vendor limit can be honoured
+        # without blocking workers that could serve a different vendor
+        pending: dict[str, deque] = {}
 
-            for product in ProductLibrary.products[group]:
-                logging.info(f"Checking {product}")
+        for product, vendor in ProductLibrary._plan_checks(urls, results).items():
+            pending.setdefault(vendor.name, deque()).append((product, vendor))
+
+        running: dict[str, int] = {name: 0 for name in pending}
+        limits: dict[str, int] = {
+            name: min(vendor_workers, max(1, pending[name][0][1].max_workers))
+            for name in pending
+        }
+        futures: dict[Future, tuple[str, str]] = {}
+        counts: dict[str, tuple[int, int]] = {name: (0, len(jobs))
+                                              for name, jobs in pending.items()}
+
+        if progress is not None and counts:
+            progress(dict(counts))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+
+            while pending or futures:
+
+                for name in list(pending):
+                    jobs: deque = pending[name]
+
+                    while jobs and running[name] < limits[name] \
+                            and len(futures) < workers:
+                        product, vendor = jobs.popleft()
+                        future = executor.submit(run_check, vendor, product)
+                        futures[future] = (name, product)
+                        running[name] += 1
+
+                    if not jobs:
+                        del pending[name]
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    name, product = futures.pop(future)
+                    running[name] -= 1
+
+                    result: Optional[tuple[bool, float]] = future.result()
+
+                    if result is not None:
+                        results[product] = result
+                        ProductLibrary._apply_result(product, result)
+
+                    done_count, total = counts[name]
+                    counts[name] = (done_count + 1, total)
+
+                if progress is not None:
+                    progress(dict(counts))
+
+        ProductLibrary.publish_snapshot()
+
+        if ProductLibrary.metrics_file:
+            ProductLibrary.metrics.write(ProductLibrary.metrics_file)
+
+        return results
+
+    @staticmethod
+    def _store_entry(url: str, entry: Optional[FetchCacheEntry]) -> None:
+        """Keeps the new fetch cache entry of a URL, if it changed, to be
+        saved by `persist`.
+        """
+        if entry is not None:
+            ProductLibrary.fetch_cache[url] = entry
+            ProductLibrary.fetch_cache_dirty.add(url)
+
+    @staticmethod
+    def _check_failed(url: str,
+                      limiter: HostLimiter,
+                      stats: CheckStats,
+                      error: Exception) -> None:
+        """Records a failed check, and backs off its host unless the error
+        was caused by the product URL.
+        """
+        logging.warning(f"Error checking product {url}: {error}")
+
+        if stats.outcome != metrics.OUTCOME_EMPTY:
+            stats.outcome = metrics.OUTCOME_ERROR
+
+        # Client errors other than throttling, e.g. a 404, are caused
+        # by the product URL and not by the host
+        status: int = getattr(getattr(error, "response", None), "status_code", 0)
+        if status == 429 or not 400 <= status < 500:
+            limiter.failure(retry_after(error))
+
+    @staticmethod
+    def _plan_checks(urls: Optional[set[str]],
+                     results: dict[str, tuple[bool, float]]) -> dict[str, Vendor]:
+        """Picks the URLs to be checked among all products, or the given
+        `urls`: each one once, however many groups watch it. URLs with a
+        fresh result in the result cache are not checked again; their result
+        is added to `results` and written into their products instead.
+
+        Returns:
+        - A `dict` with the vendor of each URL to check
+        """
+        planned: dict[str, Vendor] = {}
+
+        for record in ProductLibrary.products:
+            url: str = record.url
+
+            if record.vendor is None or url in planned or url in results \
+                    or (urls is not None and url not in urls):
+                continue
+
+            cached: Optional[tuple[bool, float]] = ProductLibrary.result_cache.get(url)
+
+            if cached is not None:
+                results[url] = cached
+                ProductLibrary._fan_out(url, cached)
+            else:
+                planned[url] = record.vendor
+
+        return planned
+
+    @staticmethod
+    def _apply_result(url: str, result: tuple[bool, float]) -> None:
+        """Records the result of a check in the history and the result
+        cache, and writes it into every product watching the URL.
+        """
+        # Negative IDs are products only kept in memory
+        ProductLibrary.history.record(url, result,
+                                      [record.id for record in ProductLibrary.products.by_url(url)
+                                       if record.id >= 0])
+        ProductLibrary.status_dirty.add(url)
+
+        # Failed checks are retried on the next cycle
+        if result[1] >= 0:
+            ProductLibrary.result_cache.put(url, result)
+
+        ProductLibrary._fan_out(url, result)
+
+    @staticmethod
+    def _fan_out(url: str, result: tuple[bool, float]) -> None:
+        """Writes a result into the records of every group watching the URL,
+        and publishes the events it raises. Failed checks, with a negative
+        price, don't replace a good status, so the next good result is
+        compared against the last one seen.
+        """
+        for record in ProductLibrary.products.by_url(url):
+            previous: tuple[bool, float] = record.status
+
+            if result[1] < 0 and previous[1] >= 0:
+                continue
+
+            ProductLibrary.products.update(record.id, *result)
+
+            if ProductLibrary.notifier is not None:
+                ProductLibrary.notifier.publish(detect_events(record, previous))
+
+    @staticmethod
+    def _check_sharded(sharded: "ShardedChecker",
+                       workers: int,
+                       vendor_workers: int,
+                       urls: Optional[set[str]] = None,
+                       progress: Optional[Callable[[dict[str, tuple[int, int]]], None]] = None) -> dict[str, tuple[bool, float]]:
+        """
+        Runs the checks of `check_products` in the shard workers. Results,
+        fetch cache entries and metrics are written back as each shard
+        finishes.
+
+        Returns:
+        - A `dict` with the result of each URL checked, skipped ones excluded
+        """
+        results: dict[str, tuple[bool, float]] = {}
+        jobs: dict[str, str] = {url: vendor.name for url, vendor
+                                in ProductLibrary._plan_checks(urls, results).items()}
+
+        counts: dict[str, tuple[int, int]] = {}
+        for name in jobs.values():
+            counts[name] = (0, counts.get(name, (0, 0))[1] + 1)
+
+        if progress is not None and counts:
+            progress(dict(counts))
+
+        batch: list["Job"] = list(jobs.items())
+
+        for answer in sharded.check(batch, ProductLibrary.fetch_cache,
+                                    workers, vendor_workers):
+
+            for url, entry in answer["entries"].items():
+                ProductLibrary.fetch_cache[url] = entry
+                ProductLibrary.fetch_cache_dirty.add(url)
+
+            if answer["metrics"] is not None:
+                ProductLibrary.metrics.merge_state(answer["metrics"])
+
+            for url, name in answer["jobs"]:
+                result: Optional[tuple[bool, float]] = answer["results"].get(url)
+
+                if result is not None:
+                    results[url] = result
+                    ProductLibrary._apply_result(url, result)
+
+                done_count, total = counts[name]
+                counts[name] = (done_count + 1, total)
 
-                if "coolmod" in product.lower():
-                    ProductLibrary.products[group][product] = \
-                        run_check(_check_coolmod_product, product)
+            if progress is not None:
+                progress(dict(counts))
 
-                elif "pccomponentes" in product.lower():
-                    ProductLibrary.products[group][product] = \
-                        run_check(_check_pccomp_product, product)
+        ProductLibrary.publish_snapshot()
 
-                elif "neobyte" in product.lower():
-                    ProductLibrary.products[group][product] = \
-                        run_check(_check_neobyte_product, product)
+        if ProductLibrary.metrics_file:
+            ProductLibrary.metrics.write(ProductLibrary.metrics_file)
 
-                else:
-                    logging.warning("Webpage not supported!")
+        return results
@@ -0,0 +1,142 @@
+import time
+import random
+import logging
+import threading
+
+from typing import Optional
+
+#######################################################################
+
+BACKOFF_BASE: float = 30.0
+BACKOFF_MAX: float = 1800.0
+BACKOFF_JITTER: float = 0.5
+
+MIN_RATE_FACTOR: float = 0.1
+RECOVERY_FACTOR: float = 1.25
+
+#######################################################################
+
+class HostLimiter:
+    """Token bucket limiting the requests sent to a single vendor host, that
+    adapts to how the host is answering.
+
+    Every failure (errors, throttling, blocked pages) halves the request
+    rate and bans the host for an exponentially growing, jittered period.
+    Every success then recovers the rate and the backoff step by step.
+    """
+
+    def __init__(self, host: str, rate: float, burst: int = 1):
+        self.host: str = host
+        self.rate: float = max(rate, 1e-3)
+        self.burst: int = max(1, burst)
+
+        self.current_rate: float = self.rate
+        self.failures: int = 0
+        self.blocked_until: float = 0.0
+
+        self._tokens: float = float(self.burst)
+        self._updated: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Adds the tokens earned since the last update.
+        """
+        self._tokens = min(float(self.burst),
+                           self._tokens + (now - self._updated) * self.current_rate)
+        self._updated = now
+
+    def backing_off(self) -> bool:
+        """Checks if the host is banned after a failure.
+        """
+        return time.monotonic() < self.blocked_until
+
+    def acquire(self) -> bool:
+        """Waits for a token to send a request to the host.
+
+        Returns:
+        - A `bool` indicating if the request may be sent (true), or the
+        host is backing off and it should be skipped (false)
+        """
+        while True:
+            with self._lock:
+                now: float = time.monotonic()
+
+                if now < self.blocked_until:
+                    return False
+
+                self._refill(now)
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+
+                wait: float = (1 - self._tokens) / self.current_rate
+
+            time.sleep(wait)
+
+    def success(self) -> None:
+        """Reports a successful request, recovering rate and backoff.
+        """
+        with self._lock:
+            self.failures = max(0, self.failures - 1)
+            self.current_rate = min(self.rate, self.current_rate * RECOVERY_FACTOR)
+
+    def failure(self, retry_after: Optional[float] = None) -> None:
+        """Reports a failed request, slowing down and banning the host for a
+        while. A `retry_after` given by the host takes precedence.
+        """
+        with self._lock:
+            self.failures += 1
+            self.current_rate = max(self.rate * MIN_RATE_FACTOR, self.current_rate / 2)
+
+            delay: float = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.failures - 1))
+            delay *= 1 + random.uniform(-BACKOFF_JITTER, BACKOFF_JITTER)
+
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+
+            self.blocked_until = time.monotonic() + delay
+            self._tokens = 0.0
+
+        logging.warning(f"Backing off {self.host} for {delay:.0f}s " \
+                        + f"after {self.failures} failures")
+
+class RateLimiter:
+    """Holds a `HostLimiter` per vendor host, created on first use.
+    """
+
+    def __init__(self):
+        self._hosts: dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def host(self, host: str, rate: float, burst: int = 1) -> HostLimiter:
+        """Returns the limiter of the given host.
+        """
+        with self._lock:
+            limiter: Optional[HostLimiter] = self._hosts.get(host)
+
+            if limiter is None:
+                limiter = HostLimiter(host, rate, burst)
+                self._hosts[host] = limiter
+
+        return limiter
+
+    def hosts(self) -> list[HostLimiter]:
+        """Returns the limiters of all the hosts seen.
+        """
+        with self._lock:
+            return list(self._hosts.values())
+
+#######################################################################
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Returns the seconds asked to wait by the `Retry-After` header of an
+    HTTP error response, if any.
+    """
+    response = getattr(error, "response", None)
+    value: str = response.headers.get("Retry-After", "") if response is not None else ""
+
+    try:
+        return float(value)
+    except ValueError:
+        return None
@@ -0,0 +1,53 @@
+import time
+import threading
+
+from typing import Optional
+
+#######################################################################
+
+DEFAULT_TTL: float = 15.0
+
+#######################################################################
+
+class ResultCache:
+    """Results of the latest check of each URL, reused while younger than
+    `ttl` seconds, so a product watched by several groups, or checked again
+    right away, is fetched once.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.ttl: float = max(0.0, ttl)
+
+        self._results: dict[str, tuple[tuple[bool, float], float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[tuple[bool, float]]:
+        """Returns the result of the URL if it's still fresh.
+        """
+        with self._lock:
+            cached: Optional[tuple[tuple[bool, float], float]] = self._results.get(url)
+
+            if cached is None:
+                return None
+
+            result, checked = cached
+            if time.monotonic() - checked >= self.ttl:
+                del self._results[url]
+                return None
+
+        return result
+
+    def put(self, url: str, result: tuple[bool, float]) -> None:
+        if self.ttl <= 0:
+            return
+
+        with self._lock:
+            self._results[url] = (result, time.monotonic())
+
+    def discard(self, url: str) -> None:
+        with self._lock:
+            self._results.pop(url, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
@@ -0,0 +1,199 @@
+import time
+import heapq
+import itertools
+import threading
+
+from typing import Optional
+
+#######################################################################
+
+MIN_INTERVAL: float = 30.0
+MAX_INTERVAL: float = 3600.0
+HOT_INTERVAL: float = 60.0
+
+GROWTH_FACTOR: float = 1.5
+NEAR_MINPRICE: float = 0.10
+
+#######################################################################
+
+class PollState:
+    """Polling state of a single URL.
+    """
+    __slots__ = ("url", "interval", "next_check", "result", "minprice", "version")
+
+    def __init__(self, url: str, minprice: float = 0.0):
+        self.url: str = url
+        self.interval: float = MIN_INTERVAL
+        self.next_check: float = 0.0
+        self.result: Optional[tuple[bool, float]] = None
+        self.minprice: float = minprice
+        self.version: int = 0
+
+class PollScheduler:
+    """Priority queue giving each URL its own next check time.
+
+    A URL is polled every `min_interval` seconds after its availability or
+    price changes, and `GROWTH_FACTOR` times less often after each check
+    that sees no change, up to `max_interval`. URLs close to their minimum
+    price are never polled less often than `hot_interval`.
+    """
+
+    def __init__(self,
+                 min_interval: float = MIN_INTERVAL,
+                 max_interval: float = MAX_INTERVAL,
+                 hot_interval: float = HOT_INTERVAL):
+        self.min_interval: float = min_interval
+        self.max_interval: float = max(min_interval, max_interval)
+        self.hot_interval: float = max(min_interval, hot_interval)
+
+        self._states: dict[str, PollState] = {}
+        self._heap: list[tuple[float, int, str]] = []
+        self._checking: set[str] = set()
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _push(self, state: PollState) -> None:
+        """Queues the state at its next check time. Older heap entries of
+        the URL are outdated by the version and dropped when popped.
+        """
+        state.version = next(self._versions)
+        heapq.heappush(self._heap, (state.next_check, state.version, state.url))
+
+    def add(self, url: str,
+            minprice: float = 0.0,
+            delay: float = 0.0,
+            result: Optional[tuple[bool, float]] = None) -> None:
+        """Adds a URL, due to be checked after `delay` seconds, straight away
+        by default. `result` is the last one seen, e.g. in a previous run.
+        If the URL is already scheduled, only its minimum price is updated.
+        """
+        with self._lock:
+            state: Optional[PollState] = self._states.get(url)
+
+            if state is not None:
+                state.minprice = minprice
+                return
+
+            state = PollState(url, minprice)
+            state.interval = self.min_interval
+            state.next_check = time.monotonic() + max(0.0, delay)
+            state.result = result
+            self._states[url] = state
+            self._push(state)
+
+    def remove(self, url: str) -> None:
+        """Stops scheduling a URL.
+        """
+        with self._lock:
+            self._states.pop(url, None)
+            self._checking.discard(url)
+
+    def due(self, now: Optional[float] = None) -> list[str]:
+        """Pops the URLs whose next check time has been reached. They are
+        not scheduled again until their result is reported, or they are
+        given back with `restore`.
+        """
+        now = time.monotonic() if now is None else now
+        urls: list[str] = []
+
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, version, url = heapq.heappop(self._heap)
+                state: Optional[PollState] = self._states.get(url)
+
+                if state is not None and state.version == version:
+                    urls.append(url)
+                    self._checking.add(url)
+
+        return urls
+
+    def restore(self, urls: list[str], now: Optional[float] = None) -> None:
+        """Schedules again, due at once, the given URLs popped by `due`
+        whose result was never reported, e.g. because the check was
+        interrupted. Otherwise they would never be checked again.
+        """
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            for url in urls:
+                state: Optional[PollState] = self._states.get(url)
+
+                if url in self._checking and state is not None:
+                    self._checking.discard(url)
+                    state.next_check = now
+                    self._push(state)
+
+    def report(self, url: str,
+               result: Optional[tuple[bool, float]],
+               now: Optional[float] = None) -> None:
+        """Reports the result of a check and schedules the next one. A
+        `None` result, e.g. a skipped check, keeps the current interval, as
+        does a failed check, with a negative price: an erroring host is not
+        a change, and must not be polled harder.
+        """
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            state: Optional[PollState] = self._states.get(url)
+            self._checking.discard(url)
+
+            if state is None:
+                return
+
+            if result is not None and result[1] >= 0:
+                if state.result is not None and result != state.result:
+                    state.interval = self.min_interval
+                elif state.result is not None:
+                    state.interval = min(self.max_interval,
+                                         state.interval * GROWTH_FACTOR)
+                state.result = result
+
+            interval: float = state.interval
+            if self._is_hot(state):
+                interval = min(interval, self.hot_interval)
+
+            state.next_check = now + interval
+            self._push(state)
+
+    def next_check(self, url: str, now: Optional[float] = None) -> Optional[float]:
+        """Returns the seconds until the next check of the URL, `None` if
+        it's not scheduled. URLs being checked are due at once.
+        """
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            state: Optional[PollState] = self._states.get(url)
+
+            if state is None:
+                return None
+
+            return max(0.0, state.next_check - now)
+
+    def _is_hot(self, state: PollState) -> bool:
+        """Checks if the last price seen is close to the minimum price.
+        """
+        if state.minprice <= 0 or state.result is None or state.result[1] <= 0:
+            return False
+
+        return state.result[1] <= state.minprice * (1 + NEAR_MINPRICE)
+
+    def next_due(self, now: Optional[float] = None) -> float:
+        """Returns the seconds until the next URL is due, `max_interval` if
+        nothing is scheduled.
+        """
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            while self._heap:
+                next_check, version, url = self._heap[0]
+                state: Optional[PollState] = self._states.get(url)
+
+                if state is not None and state.version == version:
+                    return max(0.0, next_check - now)
+
+                heapq.heappop(self._heap)
+
+        return self.max_interval
+
+    def __len__(self) -> int:
+        return len(self._states)
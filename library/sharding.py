@@ -0,0 +1,273 @@
+import zlib
+import logging
+import multiprocessing
+
+from typing import Any, Iterator, Optional, TypedDict
+from multiprocessing.connection import Connection, wait
+
+if "pronotify" in __name__:
+    import pronotify.library.vendors as vendors # type: ignore
+    from pronotify.library.fetch import FetchCacheEntry, rewrites, add_rewrite # type: ignore
+    from pronotify.library.metrics import MetricsState # type: ignore
+else:
+    import library.vendors as vendors
+    from library.fetch import FetchCacheEntry, rewrites, add_rewrite
+    from library.metrics import MetricsState
+
+#######################################################################
+
+SHARD_BY_URL: str = "url"
+SHARD_BY_VENDOR: str = "vendor"
+SHARD_KEYS: tuple[str, ...] = (SHARD_BY_URL, SHARD_BY_VENDOR)
+
+STOP_TIMEOUT: float = 30.0
+
+# A check job: URL and vendor name
+Job = tuple[str, str]
+
+class ShardResult(TypedDict):
+    shard:    int
+    jobs:     list[Job]
+    results:  dict[str, tuple[bool, float]]
+    entries:  dict[str, FetchCacheEntry]
+    metrics:  Optional[MetricsState]
+
+class WorkerSettings(TypedDict):
+    shards:        int
+    shard_by:      str
+    chromium_path: str
+    pool_size:     int
+    max_pages:     int
+    vendors:       dict[str, tuple[float, int]]
+    rewrites:      list[tuple[str, str]]
+    log_disable:   int
+
+#######################################################################
+
+def shard_of(key: str, shards: int) -> int:
+    """Returns the shard of a key. Unlike `hash`, CRC32 is the same in
+    every process and run, so a product always lands on the same worker.
+    """
+    return zlib.crc32(key.encode("utf-8")) % max(1, shards)
+
+def _run_worker(conn: Connection, settings: WorkerSettings) -> None:
+    """Entry point of a shard worker process.
+
+    The worker runs its own `ProductLibrary`, with its own browser pool,
+    HTTP session and rate limiters. For each batch of jobs received, it
+    checks them and answers with their results, the fetch cache entries
+    that changed and the metrics observed. It stops on `None` or when the
+    coordinator goes away.
+    """
+    # Imported here, as the library imports this module
+    if "pronotify" in __name__:
+        import pronotify.library.processes as processes # type: ignore
+    else:
+        import library.processes as processes
+
+    library = processes.ProductLibrary
+
+    logging.disable(settings["log_disable"])
+    vendors.load_plugins()
+
+    # Every worker checks part of the products of each vendor when sharding
+    # by URL, so each one gets its share of the vendor rate
+    for vendor in vendors.vendors():
+        rate_limit, max_workers = settings["vendors"].get(
+            vendor.name, (vendor.rate_limit, vendor.max_workers))
+
+        if settings["shard_by"] == SHARD_BY_URL:
+            rate_limit /= settings["shards"]
+
+        vendor.rate_limit, vendor.max_workers = rate_limit, max_workers
+
+    for prefix, replacement in settings["rewrites"]:
+        add_rewrite(prefix, replacement)
+
+    library.start_browser_pool(settings["chromium_path"], settings["pool_size"],
+                               settings["max_pages"])
+
+    # Results are reused by the coordinator
+    library.result_cache = processes.ResultCache(0)
+
+    try:
+        while True:
+            try:
+                message: Any = conn.recv()
+            except (EOFError, OSError):
+                break
+
+            if message is None:
+                break
+
+            jobs, cache, workers, vendor_workers = message
+
+            resolved: dict[str, Optional[vendors.Vendor]] = {
+                url: vendors.get_vendor(name) for url, name in jobs
+            }
+
+            library.products = processes.ProductStore()
+            library.products.load([(i, url, "shard") for i, (url, _) in enumerate(jobs)],
+                                  resolved)
+            library.history = processes.HistoryRecorder()
+            library.fetch_cache = cache
+            library.fetch_cache_dirty = set()
+
+            results: dict[str, tuple[bool, float]] = library.check_products(
+                settings["chromium_path"], workers, vendor_workers)
+
+            conn.send({
+                "results": results,
+                "entries": {url: library.fetch_cache[url]
+                            for url in library.fetch_cache_dirty
+                            if url in library.fetch_cache},
+                "metrics": library.metrics.pop_state()
+            })
+
+    finally:
+        library.shutdown()
+
+#######################################################################
+
+class ShardedChecker:
+    """Splits the checks of a cycle across worker processes, so parsing
+    is not bound to a single core.
+
+    Products are assigned to a shard by the hash of their URL, or of their
+    vendor name. Sharding by vendor keeps the vendor limits exact, but uses
+    no more workers than vendors; sharding by URL spreads the products
+    evenly, and splits the rate of each vendor among the workers.
+
+    Workers are started with the spawn method, so they don't inherit the
+    threads of the coordinator, and are restarted if they die.
+    """
+
+    def __init__(self,
+                 shards: int,
+                 chromium_path: str,
+                 pool_size: int,
+                 max_pages: int,
+                 shard_by: str = SHARD_BY_URL):
+        if shard_by not in SHARD_KEYS:
+            raise ValueError(f"Unknown shard key {shard_by}")
+
+        self.shards: int = max(1, shards)
+        self.shard_by: str = shard_by
+
+        self._settings: WorkerSettings = {
+            "shards": self.shards,
+            "shard_by": shard_by,
+            "chromium_path": chromium_path,
+            "pool_size": pool_size,
+            "max_pages": max_pages,
+            "vendors": {},
+            "rewrites": [],
+            "log_disable": logging.NOTSET
+        }
+
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: list[Optional[Any]] = [None] * self.shards
+        self._conns: list[Optional[Connection]] = [None] * self.shards
+
+    def start(self) -> None:
+        """Starts the worker processes. They get the vendor limits, the
+        URL rewrites and the logging level disabled that the coordinator
+        has at this point.
+        """
+        self._settings["vendors"] = {vendor.name: (vendor.rate_limit, vendor.max_workers)
+                                     for vendor in vendors.vendors()}
+        self._settings["rewrites"] = rewrites()
+        self._settings["log_disable"] = logging.root.manager.disable
+
+        for shard in range(self.shards):
+            self._start_worker(shard)
+
+        logging.info(f"Started {self.shards} shard workers, by {self.shard_by}")
+
+    def _start_worker(self, shard: int) -> None:
+        parent_conn, child_conn = self._context.Pipe()
+
+        process = self._context.Process(target=_run_worker,
+                                        args=(child_conn, self._settings),
+                                        name=f"shard-{shard}", daemon=True)
+        process.start()
+        child_conn.close()
+
+        self._processes[shard] = process
+        self._conns[shard] = parent_conn
+
+    def shard_of(self, url: str, vendor_name: str) -> int:
+        return shard_of(url if self.shard_by == SHARD_BY_URL else vendor_name,
+                        self.shards)
+
+    def check(self,
+              jobs: list[Job],
+              cache: dict[str, FetchCacheEntry],
+              workers: int,
+              vendor_workers: int) -> Iterator[ShardResult]:
+        """Sends each worker the jobs of its shard, along with their fetch
+        cache entries, and yields the result of each shard as it finishes.
+        `workers` and `vendor_workers` apply to each worker.
+
+        A worker that dies during the cycle is restarted, and its jobs are
+        reported without results.
+        """
+        batches: dict[int, list[Job]] = {}
+        for url, vendor_name in jobs:
+            batches.setdefault(self.shard_of(url, vendor_name), []).append((url, vendor_name))
+
+        waiting: dict[Connection, int] = {}
+
+        for shard, batch in batches.items():
+            conn: Optional[Connection] = self._conns[shard]
+            process = self._processes[shard]
+
+            if conn is None or process is None or not process.is_alive():
+                self._start_worker(shard)
+                conn = self._conns[shard]
+
+            assert conn is not None
+            conn.send((batch,
+                       {url: cache[url] for url, _ in batch if url in cache},
+                       workers, vendor_workers))
+            waiting[conn] = shard
+
+        while waiting:
+            for ready in wait(list(waiting)):
+                shard = waiting.pop(ready)  # type: ignore
+
+                try:
+                    answer: dict = ready.recv()  # type: ignore
+                except (EOFError, OSError):
+                    logging.error(f"Shard worker {shard} died, restarting it")
+                    self._stop_worker(shard, 0)
+                    self._start_worker(shard)
+                    answer = {"results": {}, "entries": {}, "metrics": None}
+
+                yield {"shard": shard, "jobs": batches[shard], **answer}  # type: ignore
+
+    def _stop_worker(self, shard: int, timeout: float) -> None:
+        conn: Optional[Connection] = self._conns[shard]
+        process = self._processes[shard]
+
+        if conn is not None:
+            try:
+                conn.send(None)
+            except (OSError, ValueError):
+                pass
+            conn.close()
+
+        if process is not None:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        self._conns[shard] = None
+        self._processes[shard] = None
+
+    def shutdown(self, timeout: float = STOP_TIMEOUT) -> None:
+        """Stops every worker, once it finishes its current batch.
+        """
+        for shard in range(self.shards):
+            self._stop_worker(shard, timeout)
@@ -0,0 +1,263 @@
+import threading
+
+from typing import Any, Iterator, Optional, TypedDict
+
+#######################################################################
+
+class ProductStatus(TypedDict):
+    id:        int
+    url:       str
+    group:     str
+    vendor:    str
+    currency:  str
+    minprice:  float
+    available: bool
+    price:     float
+
+class ProductRecord:
+    """A product watched in a group. `id` is the products table `ID`, or a
+    negative number while the product is only kept in memory.
+
+    `price` is negative until the product is checked successfully.
+    """
+    __slots__ = ("id", "url", "group", "vendor", "minprice", "available", "price")
+
+    def __init__(self,
+                 product_id: int,
+                 url: str,
+                 group: str,
+                 vendor: Any = None,
+                 minprice: float = 0.0):
+        self.id: int = product_id
+        self.url: str = url
+        self.group: str = group
+        self.vendor = vendor
+        self.minprice: float = minprice
+        self.available: bool = False
+        self.price: float = -1.0
+
+    @property
+    def status(self) -> tuple[bool, float]:
+        return (self.available, self.price)
+
+    @property
+    def is_deal(self) -> bool:
+        """Checks if the product is available at or under its minimum price.
+        """
+        return self.available and 0 < self.price <= self.minprice
+
+    def to_status(self) -> ProductStatus:
+        """Returns a copy of the record as a plain `dict`.
+        """
+        return {
+            "id": self.id,
+            "url": self.url,
+            "group": self.group,
+            "vendor": getattr(self.vendor, "name", "") if self.vendor is not None else "",
+            "currency": getattr(self.vendor, "currency", "") if self.vendor is not None else "",
+            "minprice": self.minprice,
+            "available": self.available,
+            "price": self.price
+        }
+
+    def __repr__(self) -> str:
+        return f"<ProductRecord {self.id} {self.group} {self.url}>"
+
+class ProductStore:
+    """In-memory store of the products of the library, with secondary
+    indexes by URL, group, vendor, availability and deals, so status queries
+    only visit the matching products.
+    """
+
+    def __init__(self):
+        self._records: dict[int, ProductRecord] = {}
+        self._by_url: dict[str, dict[int, None]] = {}
+        self._by_group: dict[str, dict[int, None]] = {}
+        self._by_vendor: dict[str, dict[int, None]] = {}
+        self._available: dict[int, None] = {}
+        self._deals: dict[int, None] = {}
+
+        self._next_memory_id: int = -1
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _vendor_name(vendor: Any) -> str:
+        return getattr(vendor, "name", "") if vendor is not None else ""
+
+    def _index(self, record: ProductRecord) -> None:
+        """Adds the record to the indexes. Dicts are used as ordered sets,
+        so products keep their insertion order.
+        """
+        self._by_url.setdefault(record.url, {})[record.id] = None
+        self._by_group.setdefault(record.group, {})[record.id] = None
+        self._by_vendor.setdefault(self._vendor_name(record.vendor), {})[record.id] = None
+        self._reindex_status(record)
+
+    def _unindex(self, record: ProductRecord) -> None:
+        """Removes the record from the indexes, dropping empty entries.
+        """
+        for index, key in ((self._by_url, record.url),
+                           (self._by_group, record.group),
+                           (self._by_vendor, self._vendor_name(record.vendor))):
+            ids: dict[int, None] = index.get(key, {})
+            ids.pop(record.id, None)
+            if not ids:
+                index.pop(key, None)
+
+        self._available.pop(record.id, None)
+        self._deals.pop(record.id, None)
+
+    def _reindex_status(self, record: ProductRecord) -> None:
+        """Updates the availability and deals indexes of the record.
+        """
+        for index, matches in ((self._available, record.available),
+                               (self._deals, record.is_deal)):
+            if matches:
+                index[record.id] = None
+            else:
+                index.pop(record.id, None)
+
+    #######################################################################
+
+    def add(self,
+            url: str,
+            group: str,
+            product_id: Optional[int] = None,
+            vendor: Any = None,
+            minprice: float = 0.0) -> ProductRecord:
+        """Adds a product. If it's already in the group, the existing record
+        is returned.
+        """
+        with self._lock:
+            existing: Optional[ProductRecord] = self.find(url, group)
+            if existing is not None:
+                return existing
+
+            if product_id is None or product_id in self._records:
+                product_id = self._next_memory_id
+                self._next_memory_id -= 1
+
+            record = ProductRecord(product_id, url, group, vendor, minprice)
+            self._records[product_id] = record
+            self._index(record)
+
+        return record
+
+    def load(self, rows: list[tuple], vendors: Optional[dict[str, Any]] = None) -> int:
+        """Adds products in bulk from the products table rows: ID, URL and
+        group. `vendors` maps each URL to its resolved vendor.
+
+        Returns:
+        - An `int` with the number of products added
+        """
+        vendors = vendors or {}
+        loaded: int = 0
+
+        with self._lock:
+            for product_id, url, group in rows:
+                if product_id in self._records:
+                    continue
+
+                record = ProductRecord(product_id, url, group or "default",
+                                       vendors.get(url))
+                self._records[product_id] = record
+                self._index(record)
+                loaded += 1
+
+        return loaded
+
+    def remove(self, product_id: int) -> Optional[ProductRecord]:
+        """Removes a product, returning its record if it was stored.
+        """
+        with self._lock:
+            record: Optional[ProductRecord] = self._records.pop(product_id, None)
+            if record is not None:
+                self._unindex(record)
+
+        return record
+
+    def update(self, product_id: int, available: bool, price: float) -> None:
+        """Updates the status of a product.
+        """
+        with self._lock:
+            record: Optional[ProductRecord] = self._records.get(product_id)
+            if record is None:
+                return
+
+            record.available = bool(available)
+            record.price = float(price)
+            self._reindex_status(record)
+
+    def set_minprice(self, product_id: int, minprice: float) -> None:
+        """Updates the minimum price of a product.
+        """
+        with self._lock:
+            record: Optional[ProductRecord] = self._records.get(product_id)
+            if record is not None:
+                record.minprice = minprice
+                self._reindex_status(record)
+
+    #######################################################################
+
+    def get(self, product_id: int) -> Optional[ProductRecord]:
+        return self._records.get(product_id)
+
+    def find(self, url: str, group: str) -> Optional[ProductRecord]:
+        """Returns the record of the URL in the given group, if any.
+        """
+        with self._lock:
+            for product_id in self._by_url.get(url, {}):
+                record: ProductRecord = self._records[product_id]
+                if record.group == group:
+                    return record
+
+        return None
+
+    def _select(self, ids: dict[int, None]) -> list[ProductRecord]:
+        with self._lock:
+            return [self._records[product_id] for product_id in ids]
+
+    def by_url(self, url: str) -> list[ProductRecord]:
+        return self._select(self._by_url.get(url, {}))
+
+    def by_group(self, group: str) -> list[ProductRecord]:
+        return self._select(self._by_group.get(group, {}))
+
+    def by_vendor(self, vendor_name: str) -> list[ProductRecord]:
+        return self._select(self._by_vendor.get(vendor_name, {}))
+
+    def available(self) -> list[ProductRecord]:
+        return self._select(self._available)
+
+    def deals(self) -> list[ProductRecord]:
+        """Returns the products available at or under their minimum price.
+        """
+        return self._select(self._deals)
+
+    def groups(self) -> list[str]:
+        with self._lock:
+            return list(self._by_group)
+
+    def urls(self) -> list[str]:
+        with self._lock:
+            return list(self._by_url)
+
+    def has_url(self, url: str) -> bool:
+        return url in self._by_url
+
+    def records(self) -> list[ProductRecord]:
+        with self._lock:
+            return list(self._records.values())
+
+    def statuses(self) -> list[ProductStatus]:
+        """Returns a consistent copy of the status of every product, taken
+        holding the lock.
+        """
+        with self._lock:
+            return [record.to_status() for record in self._records.values()]
+
+    def __iter__(self) -> Iterator[ProductRecord]:
+        return iter(self.records())
+
+    def __len__(self) -> int:
+        return len(self._records)
@@ -0,0 +1,12 @@
+if "pronotify" in __name__:
+    from pronotify.library.vendors.base import Vendor, register, resolve, get_vendor, vendors, hostname, canonical_url, load_plugins # type: ignore
+    import pronotify.library.vendors.coolmod # type: ignore
+    import pronotify.library.vendors.pccomponentes # type: ignore
+    import pronotify.library.vendors.neobyte # type: ignore
+    import pronotify.library.vendors.pckoubou # type: ignore
+else:
+    from library.vendors.base import Vendor, register, resolve, get_vendor, vendors, hostname, canonical_url, load_plugins
+    import library.vendors.coolmod
+    import library.vendors.pccomponentes
+    import library.vendors.neobyte
+    import library.vendors.pckoubou
@@ -0,0 +1,225 @@
+import logging
+
+from functools import cached_property
+from typing import Any, Optional, TYPE_CHECKING
+from urllib.parse import urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
+
+if "pronotify" in __name__:
+    from pronotify.library.fetch import FETCH_HTTP # type: ignore
+    from pronotify.library.extract import make_strainer # type: ignore
+else:
+    from library.fetch import FETCH_HTTP
+    from library.extract import make_strainer
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, SoupStrainer
+
+#######################################################################
+
+ENTRY_POINT_GROUP: str = "pronotify.vendors"
+
+# Query parameters added by campaigns and ads, never part of a product
+TRACKING_PREFIXES: tuple[str, ...] = ("utm_",)
+TRACKING_PARAMS: frozenset[str] = frozenset({
+    "gclid", "gbraid", "wbraid", "dclid", "fbclid", "msclkid", "yclid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "srsltid", "igshid", "ref_src"
+})
+
+DEFAULT_PORTS: dict[str, int] = {"http": 80, "https": 443}
+
+#######################################################################
+
+class Vendor:
+    """Base class for vendor plugins. Subclasses declare how the vendor
+    product pages are fetched and parsed, and are added to the registry
+    with the `register` decorator.
+
+    - `hosts`: hostnames served by the vendor, without `www.`
+    - `strategy`: one of the `fetch` strategies
+    - `marker`: HTML fragment present when the page has what `parse` needs
+    - `regions`: markers around the page parts read by `parse`, hashed to
+    detect unchanged pages
+    - `targets`: elements `parse` reads, so only those are parsed, as the
+    arguments of their `SoupStrainer`
+    - `ready`: CSS selectors of the elements `parse` needs, waited for
+    before reading a page rendered in the browser
+    - `unavailable`: CSS selectors of elements shown instead of the `ready`
+    ones when the product can't be bought, e.g. discontinued, so the wait
+    ends as soon as any of them is found
+    - `render_timeout`: seconds to wait for the `ready` elements
+    - `slowcon`: slow connection factor, multiplying `render_timeout`
+    - `fragments`: CSS selectors of the elements `parse` reads, so only
+    their HTML is taken out of the browser instead of the whole page
+    - `extract_script`: JavaScript run in the browser that returns a small
+    JSON object, read by `parse_extracted` instead of parsing any HTML
+    - `currency`: ISO 4217 code of the prices shown by the vendor
+    - `rate_limit`: maximum requests per second sent to the vendor
+    - `max_workers`: maximum checks running at the same time on the vendor
+    - `query_params`: query parameters identifying the product, the only
+    ones kept in canonical URLs. If `None`, every parameter but tracking
+    ones is kept
+    - `trailing_slash`: whether canonical URLs end their path with `/`
+    """
+    name: str = ""
+    hosts: tuple[str, ...] = ()
+    strategy: str = FETCH_HTTP
+    marker: str = ""
+    regions: tuple[str, ...] = ()
+    targets: Optional[Any] = None
+    ready: tuple[str, ...] = ()
+    unavailable: tuple[str, ...] = ()
+    render_timeout: float = 10.0
+    slowcon: int = 1
+    fragments: tuple[str, ...] = ()
+    extract_script: str = ""
+    currency: str = "EUR"
+    rate_limit: float = 1.0
+    max_workers: int = 2
+    query_params: Optional[tuple[str, ...]] = None
+    trailing_slash: bool = False
+
+    def keeps_param(self, key: str) -> bool:
+        """Checks if a query parameter is kept in canonical URLs.
+        """
+        if self.query_params is not None:
+            return key in self.query_params
+
+        key = key.lower()
+
+        return key not in TRACKING_PARAMS and not key.startswith(TRACKING_PREFIXES)
+
+    def canonical_url(self, url: str) -> str:
+        """Returns the URL the vendor product page is watched by: HTTPS,
+        lowercase host with `www.` for the vendor hosts, no default port nor
+        fragment, the path ending as the vendor does, and only the query
+        parameters that identify the product, sorted.
+        """
+        parts = urlsplit(url.strip())
+        scheme: str = "https"
+
+        host: str = (parts.hostname or "").lower()
+        if host in self.hosts:
+            host = "www." + host
+
+        # Explicit ports are kept along with their scheme, e.g. for mirrors
+        if parts.port is not None and parts.port != DEFAULT_PORTS.get(parts.scheme.lower()):
+            scheme = parts.scheme.lower()
+            host += f":{parts.port}"
+
+        path: str = parts.path.rstrip("/")
+        if self.trailing_slash or not path:
+            path += "/"
+
+        params: list[tuple[str, str]] = [
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if self.keeps_param(key)
+        ]
+
+        return urlunsplit((scheme, host, path, urlencode(sorted(params)), ""))
+
+    @cached_property
+    def strainer(self) -> Optional["SoupStrainer"]:
+        """The `SoupStrainer` of the `targets`, built on first use.
+        """
+        return make_strainer(self.targets) if self.targets is not None else None
+
+    def parse(self, soup: "BeautifulSoup") -> tuple[bool, float]:
+        """Parses a product page for availability and price.
+        """
+        raise NotImplementedError
+
+    def parse_extracted(self, payload: dict) -> tuple[bool, float]:
+        """Reads availability and price from the object returned by the
+        `extract_script` of the vendor.
+        """
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"<Vendor {self.name}>"
+
+#######################################################################
+
+_registry: dict[str, Vendor] = {}
+_by_name: dict[str, Vendor] = {}
+
+def hostname(url: str) -> str:
+    """Returns the lowercase hostname of the given URL, without `www.`.
+    """
+    host: str = (urlparse(url).hostname or "").lower()
+
+    if host.startswith("www."):
+        host = host[4:]
+
+    return host
+
+def register(vendor_class: type) -> type:
+    """Class decorator that adds a `Vendor` subclass to the registry, keyed
+    by each of its hosts.
+    """
+    vendor: Vendor = vendor_class()
+
+    for host in vendor.hosts:
+        if host in _registry:
+            logging.warning(f"Host {host} of {vendor.name} already registered "
+                            + f"by {_registry[host].name}, replacing it")
+        _registry[host] = vendor
+
+    _by_name[vendor.name] = vendor
+
+    return vendor_class
+
+def resolve(url: str) -> Optional[Vendor]:
+    """Returns the vendor serving the given URL, or `None` if the vendor is
+    not supported. Subdomains, e.g. `m.vendor.com`, resolve to the vendor
+    of their parent domain.
+    """
+    host: str = hostname(url)
+
+    while host:
+        vendor: Optional[Vendor] = _registry.get(host)
+        if vendor is not None:
+            return vendor
+
+        _, _, host = host.partition(".")
+
+    return None
+
+def canonical_url(url: str) -> str:
+    """Returns the canonical form of a product URL, as given by its vendor,
+    so the same product is watched and checked once however it was linked.
+    URLs of unsupported vendors are only stripped.
+    """
+    vendor: Optional[Vendor] = resolve(url)
+
+    return vendor.canonical_url(url) if vendor is not None else url.strip()
+
+def get_vendor(name: str) -> Optional[Vendor]:
+    """Returns the registered vendor with the given name, if any.
+    """
+    return _by_name.get(name)
+
+def vendors() -> list[Vendor]:
+    """Returns all the registered vendors.
+    """
+    return list(_by_name.values())
+
+def load_plugins() -> None:
+    """Loads third-party vendor plugins declared in the `pronotify.vendors`
+    entry point group. An entry point can be a module registering its
+    vendors on import, or a `Vendor` subclass.
+    """
+    from importlib.metadata import entry_points
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            plugin = entry_point.load()
+
+            if isinstance(plugin, type) and issubclass(plugin, Vendor) \
+                    and plugin.name not in _by_name:
+                register(plugin)
+
+            logging.info(f"Vendor plugin {entry_point.name} loaded")
+
+        except Exception as e:
+            logging.warning(f"Couldn't load vendor plugin {entry_point.name}")
+            logging.info(e)
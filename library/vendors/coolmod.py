@@ -0,0 +1,71 @@
+import logging
+
+from typing import TYPE_CHECKING
+
+if "pronotify" in __name__:
+    from pronotify.library.fetch import FETCH_HTTP # type: ignore
+    from pronotify.library.vendors.base import Vendor, register # type: ignore
+else:
+    from library.fetch import FETCH_HTTP
+    from library.vendors.base import Vendor, register
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+    from bs4.element import Tag
+
+#######################################################################
+
+@register
+class Coolmod(Vendor):
+    """Coolmod, Spanish vendor served as static HTML.
+    """
+    name = "coolmod"
+    hosts = ("coolmod.com",)
+    strategy = FETCH_HTTP
+    marker = "product-details-prices"
+    regions = ("product-details-prices",)
+    targets = ("div", {"class": "product-details-prices"})
+    currency = "EUR"
+    query_params = ()
+    trailing_slash = True
+
+    def parse(self, soup: "BeautifulSoup") -> tuple[bool, float]:
+        """Parses a Coolmod product page for availability and price.
+        """
+        price: float = float(0)
+        available: bool = False
+
+        div_group = soup.find("div", {"class": "product-details-prices"})
+
+        if div_group is None:
+            logging.warning("Product details group not found")
+            return (False, 0.0)
+
+        buy_button: Tag | None = div_group.find("span", {"class": "add-to-cart"})
+    
+        if buy_button is None:
+            logging.warning("Product availability not found")
+            return (False, 0.0)
+    
+        item: str
+        for item in buy_button.strings:
+            if "reserva" in item.lower():
+                available = False
+            elif "sin stock" in item.lower():
+                available = False
+            elif "añadir a la cesta" in item.lower():
+                available = True
+
+        main_price_element = div_group.find("span", {"class": "product_price int_price"})
+        sup_price_element = div_group.find("span", {"class": "product_price_sup"})
+    
+        if main_price_element is None or sup_price_element is None:
+            logging.warning("Price elements not found")
+            return (available, 0.0)
+    
+        main_price: str = main_price_element.string # type: ignore
+        sup_price: str = sup_price_element.string.replace(",", "").replace("€", "") # type: ignore
+
+        price = float(main_price) + float(sup_price)/100
+
+        return (available, price)
@@ -0,0 +1,62 @@
+import logging
+
+from typing import TYPE_CHECKING
+
+if "pronotify" in __name__:
+    from pronotify.library.fetch import FETCH_HTTP # type: ignore
+    from pronotify.library.vendors.base import Vendor, register # type: ignore
+else:
+    from library.fetch import FETCH_HTTP
+    from library.vendors.base import Vendor, register
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+#######################################################################
+
+@register
+class NeoByte(Vendor):
+    """NeoByte, Spanish vendor served as static HTML.
+    """
+    name = "neobyte"
+    hosts = ("neobyte.es",)
+    strategy = FETCH_HTTP
+    marker = "product-prices"
+    regions = ("product-prices",)
+    targets = ("div", {"class": "product-prices"})
+    currency = "EUR"
+    query_params = ()
+
+    def parse(self, soup: "BeautifulSoup") -> tuple[bool, float]:
+        """Parses a NeoByte product page for availability and price.
+        """
+        price: float = float(0)
+        available: bool = False
+
+        # Get the div which contains the availability and price info
+        group_div = soup.find("div", {"class": "product-prices"})
+
+        if group_div is None:
+            logging.warning("Product info group not found")
+            return (False, 0.0)
+    
+        dom_available = group_div.find("span", {"id": "product-availability"})
+
+        if dom_available is None:
+            logging.warning("Availability element not found")
+            return (False, 0.0)
+    
+        available_class = dom_available.get('class')
+        available = available_class is not None and "badge-success" in available_class
+
+        dom_price_element = group_div.find("span", {"class": "product-price"})
+        if dom_price_element is None or dom_price_element.string is None:
+            logging.warning("Price element not found")
+            return (available, 0.0)
+    
+        dom_price = str(dom_price_element.attrs.get('content'))
+
+        assert dom_price is not None, "Price not found, can't process it!"
+        price = float(dom_price)
+
+        return (available, price)
@@ -0,0 +1,92 @@
+import re
+import logging
+
+from typing import TYPE_CHECKING
+
+if "pronotify" in __name__:
+    from pronotify.library.fetch import FETCH_AUTO # type: ignore
+    from pronotify.library.vendors.base import Vendor, register # type: ignore
+else:
+    from library.fetch import FETCH_AUTO
+    from library.vendors.base import Vendor, register
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+#######################################################################
+
+@register
+class PCComponentes(Vendor):
+    """PCComponentes, served behind Cloudflare and partially built with
+    JavaScript, so it may need to be rendered in the browser.
+    """
+    name = "pccomponentes"
+    hosts = ("pccomponentes.com", "pccomponentes.pt", "pccomponentes.fr",
+             "pccomponentes.it", "pccomponentes.de")
+    strategy = FETCH_AUTO
+    marker = "addToCartButton-"
+    regions = ("addToCartButton-", "precioMain")
+    targets = (["button", "div"],
+               {"class": re.compile(r"addToCartButton-|precioMain")})
+    ready = ("button[class*='addToCartButton-']", "div.precioMain")
+    # Notices of discontinued and unlisted products, which have neither
+    unavailable = ("[class*='discontinued']", "[class*='productNotAvailable']")
+    render_timeout = 5.0
+    extract_script = """
+        var button = document.querySelector("button[class*='addToCartButton-']");
+        var price = document.querySelector("div.precioMain");
+        var unavailable = document.querySelector(
+            "[class*='discontinued'], [class*='productNotAvailable']");
+        if (!button && !price && !unavailable) {
+            return null;
+        }
+        return {
+            "button": button ? button.textContent.trim() : null,
+            "price": price ? price.getAttribute("data-price") : null,
+            "unavailable": !!unavailable
+        };
+    """
+    slowcon = 3
+    currency = "EUR"
+    query_params = ()
+    max_workers = 1
+
+    def parse(self, soup: "BeautifulSoup") -> tuple[bool, float]:
+        """Parses a PCComponentes product page for availability and price.
+        """
+        price: float = float(0)
+        available: bool = False
+
+        buy_button = None
+        for button in soup.find_all("button"):
+            button_class = button.get("class")
+            if button_class and any(cls.startswith("addToCartButton-") for cls in button_class):
+                buy_button = button
+                break
+
+        if buy_button is None:
+            logging.warning("Buy button not found")
+        elif buy_button.string is not None:
+            available = "comprar" in buy_button.string.lower()
+            logging.info(f"Availability: {buy_button.string.lower()}")
+
+        full_price = soup.find("div", attrs={"class": "precioMain"})
+        if full_price is not None:
+            price = float(full_price['data-price']) # type: ignore
+
+        return (available, price)
+
+    def parse_extracted(self, payload: dict) -> tuple[bool, float]:
+        """Reads the buy button label and the price extracted in the browser.
+        """
+        if payload.get("unavailable"):
+            logging.info("Product not available anymore")
+            return (False, 0.0)
+
+        button: str = (payload.get("button") or "").lower()
+        available: bool = "comprar" in button
+
+        if not button:
+            logging.warning("Buy button not found")
+
+        return (available, float(payload.get("price") or 0))
@@ -0,0 +1,67 @@
+import json
+import logging
+
+from typing import TYPE_CHECKING
+
+if "pronotify" in __name__:
+    from pronotify.library.fetch import FETCH_HTTP # type: ignore
+    from pronotify.library.vendors.base import Vendor, register # type: ignore
+else:
+    from library.fetch import FETCH_HTTP
+    from library.vendors.base import Vendor, register
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+#######################################################################
+
+@register
+class PCKoubou(Vendor):
+    """pc-koubou, Japanese vendor. Product pages publish their offer as
+    schema.org structured data, which is read instead of the visual layout.
+    """
+    name = "pckoubou"
+    hosts = ("pc-koubou.jp",)
+    strategy = FETCH_HTTP
+    marker = "schema.org"
+    regions = ('"offers"',)
+    targets = (["script", "meta", "link"],)
+    ready = ("script[type='application/ld+json'], [itemprop='price']",)
+    currency = "JPY"
+    query_params = ("product_id",)
+
+    def parse(self, soup: "BeautifulSoup") -> tuple[bool, float]:
+        """Parses a pc-koubou product page for availability and price.
+        """
+        # JSON-LD product offer
+        for script in soup.find_all("script", {"type": "application/ld+json"}):
+            try:
+                data = json.loads(script.string or "")
+            except ValueError:
+                continue
+
+            for item in data if isinstance(data, list) else [data]:
+                if not isinstance(item, dict) or item.get("@type") != "Product":
+                    continue
+
+                offer = item.get("offers", {})
+                if isinstance(offer, list):
+                    offer = offer[0] if offer else {}
+
+                available: bool = "instock" in str(offer.get("availability", "")).lower()
+                price: float = float(offer.get("price", 0) or 0)
+
+                return (available, price)
+
+        # Microdata product offer
+        dom_price = soup.find("meta", {"itemprop": "price"})
+        dom_available = soup.find(["link", "meta"], {"itemprop": "availability"})
+
+        if dom_price is None or dom_available is None:
+            logging.warning("Product offer not found")
+            return (False, 0.0)
+
+        availability: str = str(dom_available.get("href") or dom_available.get("content"))
+
+        return ("instock" in availability.lower(),
+                float(str(dom_price.get("content", "0")).replace(",", "")))
@@ -1,7 +1,10 @@
+import sys
 import logging
 import argparse
 
 import library.UI as UI
+import library.database as db
+import library.commands as commands
 
 #######################################################################
 
@@ -9,7 +12,61 @@ logging.basicConfig(level=logging.INFO,
                     format='%(name)s - %(levelname)s - %(funcName)s - %(message)s',
                     filename='pronotify.log',)
 
-DEBUG: bool = False
+#######################################################################
+
+def _run_command(args: argparse.Namespace) -> int:
+    """Runs a non-interactive command.
+
+    Returns:
+    - An `int` with the exit code of the program
+    """
+    db_conn = db.open_database(UI.DB_NAME)
+    if not db_conn:
+        logging.error("Database connection could not be established!")
+        return 1
+
+    result: bool = True
+
+    try:
+        if args.command == "add":
+            result = commands.add_product(db_conn, args.url, args.group, args.target_price)
+
+        elif args.command == "remove":
+            result = commands.remove_product(db_conn, args.url, args.group)
+
+        elif args.command == "list":
+            commands.list_products(db_conn)
+
+        elif args.command == "deals":
+            commands.list_deals(db_conn)
+
+        elif args.command == "import":
+            imported: int = commands.import_products(db_conn, args.file)
+            print(f"{max(imported, 0)} products imported")
+            result = imported >= 0
+
+        elif args.command == "export":
+            exported: int = db.export_products(db_conn, args.file)
+            print(f"{max(exported, 0)} products exported")
+            result = exported >= 0
+
+        else:
+            # Only the commands checking products load the library
+            import library.daemon as daemon
+
+            daemon.start_library(db_conn, UI.library_settings())
+
+            if args.command == "check-once":
+                daemon.check_once(db_conn, UI.CHROMIUM_PATH or "",
+                                  UI.CHECK_WORKERS, UI.VENDOR_WORKERS, UI.PIPELINE)
+            else:
+                daemon.Daemon(db_conn, UI.CHROMIUM_PATH or "",
+                              UI.CHECK_WORKERS, UI.VENDOR_WORKERS, UI.PIPELINE).run()
+
+    finally:
+        db.close_database(db_conn)
+
+    return 0 if result else 1
 
 #######################################################################
 
@@ -18,11 +75,91 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('--chromium', help='Specify a chromium browser,' \
         + ' different from regular Chrome')
+    parser.add_argument('--browsers', type=int, default=UI.BROWSER_POOL_SIZE,
+        help='Number of headless browsers kept alive to check products')
+    parser.add_argument('--browser-pages', type=int, default=UI.BROWSER_MAX_PAGES,
+        help='Pages served by a headless browser before it is recycled')
+    parser.add_argument('--workers', type=int, default=UI.CHECK_WORKERS,
+        help='Number of products checked at the same time')
+    parser.add_argument('--vendor-workers', type=int, default=UI.VENDOR_WORKERS,
+        help='Number of products checked at the same time on each vendor')
+    parser.add_argument('--poll', type=int, default=UI.POLL_SECONDS,
+        help='Seconds between checks of products that changed recently')
+    parser.add_argument('--max-poll', type=int, default=UI.MAX_POLL_SECONDS,
+        help='Maximum seconds between checks of products that never change')
+    parser.add_argument('--notify', action='append', default=[],
+        help='Notification sink, can be repeated: stdout, file:<path>, ' \
+        + 'webhook:<url> or smtp://<user>:<password>@<host>:<port>/<to>?from=<from>')
+    parser.add_argument('--notify-window', type=float, default=UI.NOTIFY_WINDOW,
+        help='Seconds during which notifications of a group are batched')
+    parser.add_argument('--api-port', type=int, default=UI.API_PORT,
+        help='Port to serve the status API on, disabled if 0')
+    parser.add_argument('--api-host', default=UI.API_HOST,
+        help='Address to serve the status API on')
+    parser.add_argument('--metrics-file', default=UI.METRICS_FILE,
+        help='File to write check metrics to after each cycle, as JSON ' \
+        + 'if it ends in .json and in Prometheus text format otherwise')
+    parser.add_argument('--dump-pages', default=UI.DUMP_PAGES,
+        help='Directory to save the fetched pages to, as samples')
+    parser.add_argument('--dump-max-mb', type=int, default=UI.DUMP_MAX_MB,
+        help='Maximum size of the page samples directory, in MB')
+    parser.add_argument('--shards', type=int, default=UI.SHARDS,
+        help='Number of worker processes the checks are split across, ' \
+        + 'checked in this process if 1 or less')
+    parser.add_argument('--shard-by', choices=('url', 'vendor'), default=UI.SHARD_BY,
+        help='Split products across workers by the hash of their URL or vendor')
+    parser.add_argument('--result-ttl', type=float, default=UI.RESULT_TTL,
+        help='Seconds a check result is reused instead of fetching the product again')
+    parser.add_argument('--pipeline', action='store_true',
+        help='Check products through the asyncio pipeline, with separate fetch, ' \
+        + 'parse and persistence stages')
+
+    subparsers = parser.add_subparsers(dest='command',
+        help='Command to run without prompts. If none, the menu is shown')
+    subparsers.add_parser('run', aliases=['daemon'],
+        help='Check products continuously until stopped by a signal')
+    subparsers.add_parser('check-once',
+        help='Check every product once and print their status')
+    subparsers.add_parser('list', help='List the stored products')
+    subparsers.add_parser('deals',
+        help='List the products last seen available at or under their target price')
+    for command in ('add', 'remove'):
+        subparser = subparsers.add_parser(command, help=f'{command.capitalize()} a product')
+        subparser.add_argument('url', help='URL of the product')
+        subparser.add_argument('--group', default='', help='Group of the product')
+    subparsers.choices['add'].add_argument('--target-price', type=float, default=0.0,
+        help='Price at or under which the product is a deal, and polled more often near it')
+    for command in ('import', 'export'):
+        subparser = subparsers.add_parser(command,
+            help=f'{command.capitalize()} the products as a CSV or JSON watchlist')
+        subparser.add_argument('file', help='Watchlist file, .csv or .json')
+
     args = parser.parse_args()
 
     if args.chromium:
         UI.CHROMIUM_PATH = args.chromium
     else:
-        UI.CHROMIUM_PATH = None
+        UI.CHROMIUM_PATH = ""
 
-    UI.menu()
+    UI.BROWSER_POOL_SIZE = args.browsers
+    UI.BROWSER_MAX_PAGES = args.browser_pages
+    UI.CHECK_WORKERS = args.workers
+    UI.VENDOR_WORKERS = args.vendor_workers
+    UI.POLL_SECONDS = args.poll
+    UI.MAX_POLL_SECONDS = args.max_poll
+    UI.NOTIFY_SINKS = args.notify
+    UI.NOTIFY_WINDOW = args.notify_window
+    UI.API_PORT = args.api_port
+    UI.API_HOST = args.api_host
+    UI.METRICS_FILE = args.metrics_file
+    UI.DUMP_PAGES = args.dump_pages
+    UI.DUMP_MAX_MB = args.dump_max_mb
+    UI.SHARDS = args.shards
+    UI.SHARD_BY = args.shard_by
+    UI.RESULT_TTL = args.result_ttl
+    UI.PIPELINE = args.pipeline
+
+    if args.command is None:
+        UI.menu()
+    else:
+        sys.exit(_run_command(args))